@@ -1,332 +1,867 @@
-import sys
-import sqlite3
 import re
-import stanza
 import datetime
-import time
+import os
+import cProfile
+import pstats
 import unicodedata
 import json
+import hashlib
+import codecs
+import heapq
+from collections import namedtuple
+from analysis.policyChunker import sentence_spans, stream_sentences, DEFAULT_CHUNK_TOKENS
+from analysis.sentimentBackends import StanzaBackend, LexiconBackend, get_backend
+from analysis.sentimentCache import SentimentCache
+from analysis.stageTimer import StageTimer, STAGES
+from analysis.termMatcher import TermMatcher, get_generic_matcher, get_sensitive_matcher, terms_version
+from analysis.database import connect, database_path
+from analysis.migrations import ensure_schema
+
+GENERIC_TERMS_FILE = "./analysis/genericTerms.txt"
+SENSITIVE_TERMS_FILE = "./analysis/sensitiveTerms.txt"
+
+# ============================
+# Helper Functions
+# ============================
+def normalize_text(text):
+    """Normalize text by stripping spaces and converting to lowercase."""
+    return unicodedata.normalize("NFKC", text).strip().lower()
+
+def load_terms(file_path):
+    """Load sensitive / generic keywords from a file (one per line)."""
+    try:
+        with open(file_path, "r") as f:
+            keywords = [line.strip() for line in f if line.strip()]
+        return keywords
+    except Exception as e:
+        print(f"Error loading terms from {file_path}: {e}")
+        return []
+
+def is_generic_sentence(text, generic_terms):
+    """
+    Detects if a sentence is generic or header-like.
+    A sentence is considered generic if it is very short or if it contains any generic term
+    (unless that term is negated).
+    Differentiates between "privacy" and "privacy policy" by requiring that "privacy" appears
+    as a standalone word (i.e. not immediately followed by "policy").
+    generic_terms may be a term list or a matcher from get_generic_matcher.
+    """
+    text = normalize_text(text).strip().lower()
+
+    # Flag very short sentences (fewer than 4 words) as generic
+    if len(text.split()) < 4:
+        return True, "sentence fewer than 4 words"
+
+    # All generic terms (and their negations) are matched in a single precompiled pass
+    matcher = generic_terms if isinstance(generic_terms, TermMatcher) else get_generic_matcher(generic_terms)
+    detected_terms = matcher.find(text)
+
+    return (bool(detected_terms), detected_terms)
+
+def sentence_key(text):
+    """Cache key of a sentence: hash of its normalized text."""
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+
+def score_sentences(sentences, nlp=None, max_tokens=DEFAULT_CHUNK_TOKENS):
+    """
+    Return one Stanza sentiment score per sentence text.
+    Without an explicit pipeline the sentences go through the shared inference scheduler,
+    which batches them with those of other analyses running at the same time.
+    """
+    return StanzaBackend(nlp, max_tokens).score(sentences)
+
+def score_policy_sentences(policy_text, nlp=None, max_tokens=DEFAULT_CHUNK_TOKENS, cache=None, timer=None, backend=None,
+                           previous=None):
+    """
+    Score every sentence of a policy.
+    Returns a list of (offset, sentence_text, sentiment_score), where offset is the
+    sentence's character position in policy_text. Sentences scored by the app's previous
+    analysis (previous, a StoredScores) or found in the sentiment cache are not sent to
+    the backend (Stanza, via nlp or the shared pipeline, unless another backend is given).
+    A StageTimer, if given, gets the cache lookup, pipeline acquisition and inference
+    times and the sentence / chunk counts.
+    """
+    spans = sentence_spans(policy_text, max_tokens)
+    sentences = [policy_text[start:end] for start, end in spans]
+    scores = score_sentence_batch(sentences, backend or StanzaBackend(nlp, max_tokens), max_tokens, cache, timer, previous)
+    return [(start, sentence, score) for (start, _), sentence, score in zip(spans, sentences, scores)]
+
+def score_sentence_batch(sentences, backend, max_tokens=DEFAULT_CHUNK_TOKENS, cache=None, timer=None, previous=None):
+    """
+    One sentiment score per sentence text. Sentences unchanged since the previous analysis and
+    cache hits are not rescored, and each distinct remaining sentence is scored once.
+    """
+    timer = timer or StageTimer()
+    if not backend.cacheable:
+        cache = None
+    keys = [sentence_key(sentence) for sentence in sentences]
+    timer.count("sentences", len(sentences))
+
+    with timer.stage("cache_lookup"):
+        scores = {}
+        if previous is not None:
+            scores = {sentence_key(text): score for text, score in previous.get_many(sentences).items()}
+            timer.count("sentences_reused", sum(1 for key in keys if key in scores))
+        if cache is not None:
+            scores.update(cache.get_many([key for key in keys if key not in scores]))
+
+    # Score each distinct uncached sentence once
+    missing = {}
+    for key, sentence in zip(keys, sentences):
+        if key not in scores:
+            missing.setdefault(key, sentence)
+    if missing:
+        timer.count("sentences_scored", len(missing))
+        # Loading the shared pipeline (first use in this process) is timed apart from inference
+        with timer.stage("pipeline"):
+            backend.prepare()
+        with timer.stage("inference"):
+            missing_scores, chunks = backend.score_counted(list(missing.values()))
+            new_scores = dict(zip(missing, missing_scores))
+        timer.count("chunks", chunks)
+        with timer.stage("cache_lookup"):
+            if cache is not None:
+                cache.put_many(new_scores)
+        scores.update(new_scores)
+
+    return [scores[key] for key in keys]
+
+# One classified sentence of a policy. category is 'generic', 'sensitive' or 'other';
+# adjusted_score includes the sensitive-term penalty.
+ClassifiedSentence = namedtuple("ClassifiedSentence", "offset text normalized category matched_terms score adjusted_score")
+
+def classify_sentences(scored_sentences, sensitive_terms, generic_terms):
+    """
+    Classify (offset, sentence_text, sentiment_score) tuples from score_policy_sentences.
+    Returns ClassifiedSentence rows in policy order.
+    """
+    return list(iter_classified(scored_sentences, sensitive_terms, generic_terms))
+
+def iter_classified(scored_sentences, sensitive_terms, generic_terms):
+    """Generator form of classify_sentences, for scored sentences that arrive as a stream."""
+    # Compile the term lists once for the whole policy
+    generic_matcher = get_generic_matcher(generic_terms)
+    sensitive_matcher = get_sensitive_matcher(sensitive_terms)
+
+    for offset, text, sentiment_score in scored_sentences:
+        sentence_text = normalize_text(text)
+
+        # Skip generic sentences
+        is_generic, matched_generic_terms = is_generic_sentence(sentence_text, generic_matcher)
+        if is_generic:
+            yield ClassifiedSentence(offset, text, sentence_text, "generic", matched_generic_terms, sentiment_score, sentiment_score)
+            continue
+
+        # Adjust sentiment if the sentence contains any sensitive term
+        matched_sensitive_terms = sensitive_matcher.find(sentence_text)
+        if matched_sensitive_terms:  # Check if there are any matches
+            adjusted_score = sentiment_score - 0.5  # Reduce score for sensitive terms
+            yield ClassifiedSentence(offset, text, sentence_text, "sensitive", matched_sensitive_terms, sentiment_score, adjusted_score)
+            continue
+
+        # Only consider non-empty sentences
+        if sentence_text.split():
+            yield ClassifiedSentence(offset, text, sentence_text, "other", [], sentiment_score, sentiment_score)
+
+def bucket_sentences(classified):
+    """Split classified sentences into the generic / sensitive / concerning lists stored in analysis_log."""
+    generic_sentences = [(s.normalized, s.matched_terms, s.score) for s in classified if s.category == "generic"]
+    sensitive_sentences = [(s.normalized, s.matched_terms, s.adjusted_score) for s in classified if s.category == "sensitive"]
+    concerning_sentences = [(s.normalized, s.adjusted_score) for s in classified if s.category != "generic"]
+
+    # Sort sentences by sentiment score (ascending order: worst first)
+    concerning_sentences.sort(key=lambda x: x[1])
+
+    return generic_sentences, sensitive_sentences, concerning_sentences
+
+def find_most_concerning_sentence(scored_sentences, sensitive_terms, generic_terms):
+    """
+    Identifies and ranks all concerning sentences based on sentiment scores.
+    Takes (offset, sentence_text, sentiment_score) tuples from score_policy_sentences.
+    Returns a sorted list of sentences (worst first).
+    """
+    return bucket_sentences(classify_sentences(scored_sentences, sensitive_terms, generic_terms))
+
+def summarize_classified(classified):
+    """Bucket classified sentences and average their raw sentiment."""
+    generic_sentences, sensitive_sentences, concerning_sentences = bucket_sentences(classified)
+
+    # Calculate average sentiment across the entire policy
+    all_sentiment_scores = [s.score for s in classified]
+    policy_avg_sentiment = sum(all_sentiment_scores) / len(all_sentiment_scores) if all_sentiment_scores else 0
+
+    return generic_sentences, sensitive_sentences, concerning_sentences, policy_avg_sentiment
+
+def summarize_policy(scored_sentences, sensitive_terms, generic_terms):
+    """Categorize scored sentences and average their raw sentiment. Needs no pipeline."""
+    return summarize_classified(classify_sentences(scored_sentences, sensitive_terms, generic_terms))
+
+def process_policy(policy_text, sensitive_terms, generic_terms, nlp=None, max_tokens=DEFAULT_CHUNK_TOKENS, cache=None, backend=None):
+    # Score every sentence of the policy; cache misses go through the pipeline in a single batched call
+    scored_sentences = score_policy_sentences(policy_text, nlp, max_tokens, cache, backend=backend)
+    return summarize_policy(scored_sentences, sensitive_terms, generic_terms)
+
+def extract_permission_category(permission):
+    match = re.search(r'\((.*?)\)', permission)
+    return match.group(1).strip() if match else "Unknown"
+
+def process_permissions(permissions_str):
+    # Define dangerous permissions with custom ranking (lower means more concerning)
+    dangerous_ranking = {
+        'contacts': 0.8,
+        'location': 0.1,
+        'camera': 0.3,
+        'microphone': 0.3,
+        'photos/media/files': 0.5,
+        'storage': 1.0
+    }
+
+    # Split the permissions string into individual permissions (assuming semicolon-separated)
+    permissions = [p.strip() for p in re.split(r';\s*', permissions_str) if p.strip()]
+
+    extracted_permissions = []
+
+    for perm in permissions:
+        match = re.match(r'(.+?)\s*\((.+?)\)', perm)  # Extract "take pictures and videos" & "Camera"
+        if match:
+            perm_name, category = match.groups()
+            category = category.lower()  # Normalize category for lookup
+        else:
+            perm_name, category = perm, "unknown"
+
+        extracted_permissions.append((perm_name, category))
+
+    # Assign scores and sort
+    permission_scores = [
+        (category, perm, dangerous_ranking.get(category, 1.0))
+        for perm, category in extracted_permissions
+    ]
+
+    sorted_permissions = sorted(permission_scores, key=lambda x: x[2])  # Sort by score (ascending)
+
+    # Calculate average score
+    avg_weight = sum(score for _, _, score in sorted_permissions) / len(sorted_permissions) if sorted_permissions else 2.0
+
+    return sorted_permissions, avg_weight
+
+def compute_overall_rating(privacy_rating, permission_rating):
+    avg_sentiment = (privacy_rating + permission_rating) /2
+    if avg_sentiment >= 0.9:
+        return "good", avg_sentiment
+    elif avg_sentiment >= 0.8:
+        return "okay", avg_sentiment
+    else:
+        return "bad", avg_sentiment
+
+def content_digest(text):
+    """SHA-256 of a stored text column (None is treated as empty)."""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+def analysis_terms_version(generic_terms, sensitive_terms):
+    """Version of both term files; part of the digest that decides whether a stored analysis is still valid."""
+    return terms_version(generic_terms) + ":" + terms_version(sensitive_terms)
+
+def save_sentences(cursor, app_id, classified):
+    """Replace the stored sentences (and their matched terms) of an app with ClassifiedSentence rows."""
+    clear_sentences(cursor, app_id)
+    insert_sentences(cursor, app_id, classified)
+
+def clear_sentences(cursor, app_id):
+    cursor.execute("DELETE FROM analysis_sentences WHERE app_id = ?", (app_id,))
+    cursor.execute("DELETE FROM analysis_sentence_terms WHERE app_id = ?", (app_id,))
+
+def insert_sentences(cursor, app_id, classified, tables=("analysis_sentences", "analysis_sentence_terms")):
+    """Add ClassifiedSentence rows (and their matched terms) to the stored sentences of an app."""
+    sentences_table, terms_table = tables
+    cursor.executemany(
+        f'''INSERT INTO {sentences_table} (app_id, sentence_offset, sentence_text, score, category, matched_terms, adjusted_score)
+           VALUES (?, ?, ?, ?, ?, ?, ?)''',
+        [(app_id, s.offset, s.text, s.score, s.category, json.dumps(sentence_terms(s)), s.adjusted_score) for s in classified]
+    )
+    cursor.executemany(
+        f"INSERT OR IGNORE INTO {terms_table} (term, app_id, sentence_offset, category) VALUES (?, ?, ?, ?)",
+        [(term, app_id, s.offset, s.category) for s in classified for term in sentence_terms(s)]
+    )
+
+# The streaming analysis writes its sentences here, to replace the stored ones only when it is done
+STAGED_TABLES = ("temp.staged_sentences", "temp.staged_sentence_terms")
+
+def create_staged_tables(cursor):
+    """Empty staging copies of analysis_sentences and analysis_sentence_terms for this connection."""
+    for staged, table in zip(STAGED_TABLES, ("analysis_sentences", "analysis_sentence_terms")):
+        # DDL, which opens no transaction
+        cursor.execute(f"DROP TABLE IF EXISTS {staged}")
+        cursor.execute(f"CREATE TEMP TABLE {staged.split('.')[1]} AS SELECT * FROM {table} WHERE 0")
+
+def save_staged_sentences(cursor, app_id):
+    """Replace the stored sentences of app_id with the staged ones."""
+    clear_sentences(cursor, app_id)
+    cursor.execute(f"INSERT INTO analysis_sentences SELECT * FROM {STAGED_TABLES[0]}")
+    cursor.execute(f"INSERT INTO analysis_sentence_terms SELECT * FROM {STAGED_TABLES[1]}")
+
+def save_timings(cursor, app_id, analysis_time, timer):
+    """Store the stage timings and counts of one analysis run from a StageTimer."""
+    columns = ["app_id", "analyse_time", "total_ms"] + [f"{stage}_ms" for stage in STAGES] + \
+              ["sentence_count", "sentences_scored", "chunk_count", "sentences_reused"]
+    values = [app_id, analysis_time, round(timer.total_ms(), 2)] + [timer.stage_ms(stage) for stage in STAGES] + \
+             [timer.counts.get(name, 0) for name in ("sentences", "sentences_scored", "chunks", "sentences_reused")]
+    cursor.execute(
+        f"INSERT OR REPLACE INTO analysis_timings ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+        values
+    )
+
+def copy_sentences(cursor, source_app_id, app_id):
+    """Replace the stored sentences of app_id with a copy of source_app_id's (same policy text)."""
+    clear_sentences(cursor, app_id)
+    cursor.execute('''
+        INSERT INTO analysis_sentences (app_id, sentence_offset, sentence_text, score, category, matched_terms, adjusted_score)
+        SELECT ?, sentence_offset, sentence_text, score, category, matched_terms, adjusted_score
+        FROM analysis_sentences WHERE app_id = ?
+    ''', (app_id, source_app_id))
+    cursor.execute('''
+        INSERT INTO analysis_sentence_terms (term, app_id, sentence_offset, category)
+        SELECT term, ?, sentence_offset, category FROM analysis_sentence_terms WHERE app_id = ?
+    ''', (app_id, source_app_id))
+
+def shared_policy_analysis(cursor, app_id, policy_digest, terms_version, backend_name, since=None):
+    """
+    The policy-level results of another app analysed from the same policy text, terms and backend
+    (privacy_concern, sensitive_sentences, generic_sentences, privacy_sentiment, sentence_count and
+    the plain worst sentence), optionally only if analysed at or after since, or None.
+    """
+    cursor.execute('''
+        SELECT app_id, privacy_concern, sensitive_sentences, generic_sentences, privacy_sentiment, sentence_count
+        FROM analysis_log
+        WHERE policy_digest = ? AND terms_version = ? AND COALESCE(sentiment_backend, 'stanza') = ?
+          AND sentence_count IS NOT NULL AND app_id != ? AND analyse_time >= ?
+        ORDER BY analyse_time DESC LIMIT 1
+    ''', (policy_digest, terms_version, backend_name, app_id, since or ""))
+    row = cursor.fetchone()
+    if not row:
+        return None
+    shared = dict(zip([column[0] for column in cursor.description], row))
+
+    # Same ordering as bucket_sentences: lowest adjusted score, earliest first
+    cursor.execute('''
+        SELECT sentence_text FROM analysis_sentences
+        WHERE app_id = ? AND category IN ('sensitive', 'other')
+        ORDER BY adjusted_score, sentence_offset LIMIT 1
+    ''', (shared["app_id"],))
+    worst = cursor.fetchone()
+    shared["worst_sentence"] = normalize_text(worst[0]) if worst else None
+    return shared
+
+def sentence_terms(sentence):
+    """Matched terms of a ClassifiedSentence as a list (short generic sentences carry a reason string instead)."""
+    return sentence.matched_terms if isinstance(sentence.matched_terms, list) else []
+
+def load_sentence_scores(cursor, app_id):
+    """Stored (offset, sentence_text, score) rows of an app, in policy order."""
+    cursor.execute(
+        "SELECT sentence_offset, sentence_text, score FROM analysis_sentences WHERE app_id = ? ORDER BY sentence_offset",
+        (app_id,)
+    )
+    return cursor.fetchall()
+
+class StoredScores:
+    """
+    Sentiment scores of an app's previous analysis, looked up by sentence text.
+    An edited policy mostly keeps its sentences, so only added or changed sentences need
+    inference. The scores are copied to a temporary table when created, so the app's stored
+    sentences can then be replaced while they are still being looked up.
+    """
+
+    def __init__(self, conn, app_id):
+        self.conn = conn
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS previous_scores (sentence_text TEXT PRIMARY KEY, score REAL)")
+        conn.execute("DELETE FROM temp.previous_scores")
+        conn.execute('''
+            INSERT OR IGNORE INTO temp.previous_scores (sentence_text, score)
+            SELECT sentence_text, score FROM analysis_sentences WHERE app_id = ? AND score IS NOT NULL
+        ''', (app_id,))
+        # End the transaction the copy opened: its read snapshot would make the analysis's
+        # writes fail once another connection commits
+        conn.commit()
+        self.size = conn.execute("SELECT COUNT(*) FROM temp.previous_scores").fetchone()[0]
+
+    def get_many(self, texts):
+        """Return {sentence_text: score} for the texts the previous analysis scored."""
+        if not self.size:
+            return {}
+        texts = list(dict.fromkeys(texts))
+        found = {}
+        for i in range(0, len(texts), 500):
+            batch = texts[i:i + 500]
+            found.update(self.conn.execute(
+                f"SELECT sentence_text, score FROM temp.previous_scores WHERE sentence_text IN ({','.join('?' * len(batch))})",
+                batch
+            ))
+        return found
+
+# Convert lists of tuples into lists of strings
+def serialize_list(data):
+    return json.dumps([str(item) for item in data])  # Convert each tuple to a string
+
+def stored_analysis(cursor, app_id):
+    """Return the analysis_log row for app_id as a dict, or None."""
+    cursor.execute('''
+        SELECT app_id, privacy_concern, sensitive_sentences, generic_sentences, worst_permissions, rating,
+               privacy_sentiment, permission_sentiment, avg_sentiment, analyse_time
+        FROM analysis_log WHERE app_id = ?
+    ''', (app_id,))
+    row = cursor.fetchone()
+    if not row:
+        return None
+    return dict(zip([column[0] for column in cursor.description], row))
+
+# ============================
+# Streaming analysis
+# ============================
+# Very long policies (every region or language concatenated) are analysed without holding the
+# text or its sentences in memory: the text is read from SQLite in pieces, sentences are scored
+# and classified in batches and written out as they go, and only running totals and the worst
+# concerning sentences are kept.
+
+STREAMING_THRESHOLD_BYTES = 256 * 1024
+STREAM_READ_BYTES = 64 * 1024
+STREAM_BATCH_SENTENCES = 256
+DEFAULT_WORST_K = 50
+
+def read_policy_pieces(conn, rowid, chunk_bytes=STREAM_READ_BYTES):
+    """Yield the policy_text of a policies row in pieces, read with blob I/O and decoded incrementally."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    if hasattr(conn, "blobopen"):  # Python 3.11+
+        with conn.blobopen("policies", "policy_text", rowid, readonly=True) as blob:
+            while True:
+                data = blob.read(chunk_bytes)
+                if not data:
+                    break
+                yield decoder.decode(data)
+    else:
+        position = 1
+        while True:
+            data = conn.execute("SELECT substr(CAST(policy_text AS BLOB), ?, ?) FROM policies WHERE rowid = ?",
+                                (position, chunk_bytes, rowid)).fetchone()[0]
+            if not data:
+                break
+            position += len(data)
+            yield decoder.decode(data)
+    yield decoder.decode(b"", final=True)
+
+def stream_digest(pieces):
+    """content_digest of a text given in pieces."""
+    digest = hashlib.sha256()
+    for piece in pieces:
+        digest.update(piece.encode("utf-8"))
+    return digest.hexdigest()
+
+class StreamingSummary:
+    """
+    What summarize_classified computes, kept up to date one ClassifiedSentence at a time:
+    a running average of the raw scores, the worst_k concerning sentences (in a heap) and
+    the first worst_k generic and sensitive sentences.
+    """
+
+    def __init__(self, worst_k=DEFAULT_WORST_K):
+        self.worst_k = worst_k
+        self.sentence_count = 0  # every sentence scored, as stored in analysis_log.sentence_count
+        self.classified_count = 0
+        self.score_total = 0.0
+        self.generic_sentences = []
+        self.sensitive_sentences = []
+        self._worst = []  # (-adjusted_score, -offset, text): the root is the best of the worst_k kept
+
+    def add(self, sentence):
+        self.classified_count += 1
+        self.score_total += sentence.score
+        if sentence.category == "generic":
+            if len(self.generic_sentences) < self.worst_k:
+                self.generic_sentences.append((sentence.normalized, sentence.matched_terms, sentence.score))
+            return
+        if sentence.category == "sensitive" and len(self.sensitive_sentences) < self.worst_k:
+            self.sensitive_sentences.append((sentence.normalized, sentence.matched_terms, sentence.adjusted_score))
+
+        entry = (-sentence.adjusted_score, -sentence.offset, sentence.normalized)
+        if len(self._worst) < self.worst_k:
+            heapq.heappush(self._worst, entry)
+        elif entry > self._worst[0]:
+            heapq.heapreplace(self._worst, entry)
+
+    def summary(self):
+        """(generic_sentences, sensitive_sentences, concerning_sentences, policy_avg_sentiment), worst first."""
+        concerning_sentences = [(text, -negative_score) for negative_score, _, text in sorted(self._worst, reverse=True)]
+        policy_avg_sentiment = self.score_total / self.classified_count if self.classified_count else 0
+        return self.generic_sentences, self.sensitive_sentences, concerning_sentences, policy_avg_sentiment
+
+def analyse_policy_stream(conn, app_id, policy_rowid, sensitive_terms, generic_terms, backend, cache=None,
+                          timer=None, worst_k=DEFAULT_WORST_K, batch_size=STREAM_BATCH_SENTENCES,
+                          max_tokens=DEFAULT_CHUNK_TOKENS, previous=None):
+    """
+    Score, classify and stage the sentences of a policy read straight from the policies table,
+    batch_size sentences at a time, and return a StreamingSummary. Nothing is written to the
+    database: save_staged_sentences then replaces the app's stored sentences, in the
+    transaction that stores the analysis, so a failed run leaves the previous one intact.
+    """
+    timer = timer or StageTimer()
+    cursor = conn.cursor()
+    summary = StreamingSummary(worst_k)
+    create_staged_tables(cursor)
+
+    def flush(batch):
+        scores = score_sentence_batch([sentence for _, sentence in batch], backend, max_tokens, cache, timer, previous)
+        with timer.stage("classification"):
+            classified = list(iter_classified(
+                ((offset, sentence, score) for (offset, sentence), score in zip(batch, scores)),
+                sensitive_terms, generic_terms
+            ))
+            for sentence in classified:
+                summary.add(sentence)
+        with timer.stage("db_write"):
+            insert_sentences(cursor, app_id, classified, STAGED_TABLES)
+        summary.sentence_count += len(batch)
+
+    batch = []
+    for offset, sentence in stream_sentences(read_policy_pieces(conn, policy_rowid), max_tokens):
+        batch.append((offset, sentence))
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+    return summary
 
 #app_id_to_analyze = sys.argv[1]
 #print(f"Starting analysis for app_id: {app_id_to_analyze}")
-def NLPAnalysis_single(app_id_to_analyze, force_flag=False):
+def NLPAnalysis_single(app_id_to_analyze, force_flag=False, rerun_flag=False, db_path=None, backend=None, stream=None,
+                       shared_since=None):
+    """
+    Analyse one app's policy and permissions and store the result.
+    force_flag re-analyses an app that already has a result, unless its policy text,
+    permissions, term files and sentiment backend are unchanged since then; rerun_flag
+    re-analyses regardless. db_path defaults to the configured database (see analysis.database).
+    backend is a sentiment backend or its name (default: stanza).
+    stream analyses the policy in bounded memory (see analyse_policy_stream); by default
+    only policies over STREAMING_THRESHOLD_BYTES are streamed.
+    When a policy is edited, only its added or changed sentences are scored: the others keep
+    their score from the app's previous analysis (same backend, not with rerun_flag).
+    The policy analysis of another app with identical policy text is reused, except with
+    rerun_flag; shared_since (ISO time) allows reuse from analyses made at or after it even
+    with rerun_flag, as batch runs do for apps that follow the first one with a given text.
+    The time spent in each stage is stored in analysis_timings.
+    """
+    timer = StageTimer()
+    backend = get_backend(backend) if backend is None or isinstance(backend, str) else backend
+
     # ============================
     # 1. Database Setup
     # ============================
-    db_path = "./scrapers/privacy_policies.db"
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    print("Connected to database at", db_path)
-
-    # Create the analysis_log table if it doesn't exist.
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS analysis_log (
-        app_id TEXT PRIMARY KEY,
-        privacy_concern TEXT,
-        sensitive_sentences TEXT,
-        generic_sentences TEXT,
-        worst_permissions TEXT,
-        rating TEXT,  
-        privacy_sentiment REAL,
-        permission_sentiment REAL,
-        avg_sentiment REAL,
-        analyse_time TEXT
-    )
-    ''')
-    conn.commit()
-    print("Table 'analysis_log' is ready.")
-
-    # Check if the app has already been analyzed in analysis_log table.
-    cursor.execute("SELECT COUNT(*) FROM analysis_log WHERE app_id = ?", (app_id_to_analyze,))
-    if cursor.fetchone()[0] > 0:
-        if not force_flag:
+    with timer.stage("db_read"):
+        # Pooled WAL connection: waits for other writers (e.g. batch workers) instead of failing straight away
+        conn = connect(db_path)
+        cursor = conn.cursor()
+        print("Connected to database at", database_path(db_path))
+
+        # Apply any pending schema migrations (once per process)
+        ensure_schema(conn)
+        print("Table 'analysis_log' is ready.")
+
+        # Check if the app has already been analyzed in analysis_log table.
+        cursor.execute("SELECT COUNT(*) FROM analysis_log WHERE app_id = ?", (app_id_to_analyze,))
+        already_analysed = cursor.fetchone()[0] > 0
+    if already_analysed:
+        if not force_flag and not rerun_flag:
             print("Analysis already exists. Use --force to re-analyze.")
             conn.close()
             return {"message": "Analysis already exists. Use --force to re-analyze."}
 
     # ============================
-    # 2. Initialize Stanza Pipeline
-    # ============================
-    print("Initializing Stanza pipeline...")
-    # Load stanza once for reuse
-    nlp = stanza.Pipeline(lang='en', processors='tokenize, sentiment', batch_size=32, verbose=False, logging_level='ERROR')
-    print("Stanza pipeline loaded.")
-
-    # ============================
-    # 3. Helper Functions
+    # 2. Retrieve the App from Database
     # ============================
-    def normalize_text(text):
-        """Normalize text by stripping spaces and converting to lowercase."""
-        return unicodedata.normalize("NFKC", text).strip().lower()
+    with timer.stage("db_read"):
+        cursor.execute('''
+            SELECT app_id, rowid, length(CAST(policy_text AS BLOB)), permissions FROM policies WHERE app_id = ?
+        ''', (app_id_to_analyze,))
+        app = cursor.fetchone()
 
-    def load_terms(file_path):
-        """Load sensitive / generic keywords from a file (one per line)."""
-        try:
-            with open(file_path, "r") as f:
-                keywords = [line.strip() for line in f if line.strip()]
-            return keywords
-        except Exception as e:
-            print(f"Error loading terms from {file_path}: {e}")
-            return []
-
-    def is_generic_sentence(text, generic_terms):
-        """
-        Detects if a sentence is generic or header-like.
-        A sentence is considered generic if it is very short or if it contains any generic term 
-        (unless that term is negated).
-        Differentiates between "privacy" and "privacy policy" by requiring that "privacy" appears 
-        as a standalone word (i.e. not immediately followed by "policy").
-        """
-        text = normalize_text(text).strip().lower()
-        detected_terms = []
-        
-        # Flag very short sentences (fewer than 4 words) as generic
-        if len(text.split()) < 4:
-            return True, "sentence fewer than 4 words"
-
-        for term in generic_terms:
-            if not term:
-                continue
-            term_lower = term.lower().strip()
-            # If the term is "privacy", ensure it is not immediately followed by "policy"
-            if term_lower == "privacy":
-                pattern = r'\bprivacy(?!\s+policy)\b'
-            else:
-                pattern = rf'\b{re.escape(term_lower)}\b'
-            match = re.search(pattern, text)
-            if match:
-                negation_pattern = r'\b(not|never|no)\s+' + re.escape(term_lower)
-                if re.search(negation_pattern, text):
-                    continue
-                detected_terms.append(term_lower)
-
-        return (bool(detected_terms), detected_terms)
-
-
-    def find_most_concerning_sentence(doc, sensitive_terms, generic_terms):
-        """
-        Identifies and ranks all concerning sentences based on sentiment scores.
-        Returns a sorted list of sentences (worst first).
-        """
-        concerning_sentences = []
-        sensitive_sentences = []
-        generic_sentences = []
-
-        # Ensure we have a list of sentences
-        sentences = [doc] if isinstance(doc, stanza.models.common.doc.Sentence) else doc.sentences
-
-        for sentence in sentences:
-            sentiment_score = sentence.sentiment
-            sentence_text = normalize_text(sentence.text)
-
-            # Skip generic sentences
-            is_generic, matched_generic_terms = is_generic_sentence(sentence_text, generic_terms)
-            if is_generic:
-                generic_sentences.append((sentence_text, matched_generic_terms, sentiment_score))
-                continue
-
-            # Adjust sentiment if the sentence contains any sensitive term
-            matched_sensitive_terms = [term for term in sensitive_terms if term in sentence_text]
-            if matched_sensitive_terms:  # Check if there are any matches
-                sentiment_score -= 0.5  # Reduce score for sensitive terms
-                sensitive_sentences.append((sentence_text, matched_sensitive_terms, sentiment_score))
-                concerning_sentences.append((sentence_text, sentiment_score))
-                continue
-
-            # Only consider non-empty sentences
-            if sentence_text.split():
-                concerning_sentences.append((sentence_text, sentiment_score))
-
-        # Sort sentences by sentiment score (ascending order: worst first)
-        concerning_sentences.sort(key=lambda x: x[1])
-
-        return generic_sentences, sensitive_sentences, concerning_sentences
-
-    def process_policy(policy_text, sensitive_terms, generic_terms):
-        # Split policy text into chunks for processing
-        chunks = [policy_text[i:i+500] for i in range(0, len(policy_text), 500)]
-        
-        all_sentiment_scores = []
-        overall_worst_sentence = None
-        overall_worst_sentiment = 2.0  # 2 is best, 0 is worst
-        
-        # Lists to store categorized sentences
-        all_generic_sentences = []
-        all_sensitive_sentences = []
-        all_privacy_concern_sentences = []
-
-        # Process each chunk
-        for chunk in chunks:
-            doc = nlp(chunk)
-            
-            # Get categorized sentences and policy sentiment scores
-            generic_sentences, sensitive_sentences, concerning_sentences = find_most_concerning_sentence(doc, sensitive_terms, generic_terms)
-            
-            all_generic_sentences.extend(generic_sentences)
-            all_sensitive_sentences.extend(sensitive_sentences)
-            all_privacy_concern_sentences.extend(concerning_sentences)
-
-            # Collect sentiment scores from each sentence in this chunk
-            chunk_sentiments = [sentence.sentiment for sentence in doc.sentences]
-            all_sentiment_scores.extend(chunk_sentiments)
-            
-            # Get the most concerning sentence from this chunk
-            if concerning_sentences:
-                current_worst_sentence, current_worst_sentiment = min(concerning_sentences, key=lambda x: x[1])
-
-                # If this chunk has a worse (lower) sentiment, update overall worst
-                if current_worst_sentiment < overall_worst_sentiment:
-                    overall_worst_sentiment = current_worst_sentiment
-                    overall_worst_sentence = current_worst_sentence
-
-        # Calculate average sentiment across the entire policy
-        policy_avg_sentiment = sum(all_sentiment_scores) / len(all_sentiment_scores) if all_sentiment_scores else 0
-
-        return all_generic_sentences, all_sensitive_sentences, all_privacy_concern_sentences, policy_avg_sentiment
-
-    def extract_permission_category(permission):
-        match = re.search(r'\((.*?)\)', permission)
-        return match.group(1).strip() if match else "Unknown"
-
-    def process_permissions(permissions_str):
-        # Define dangerous permissions with custom ranking (lower means more concerning)
-        dangerous_ranking = {
-            'contacts': 0.8,       
-            'location': 0.1,
-            'camera': 0.3,
-            'microphone': 0.3,
-            'photos/media/files': 0.5,
-            'storage': 1.0
-        }
-        
-        # Split the permissions string into individual permissions (assuming semicolon-separated)
-        permissions = [p.strip() for p in re.split(r';\s*', permissions_str) if p.strip()]
-
-        extracted_permissions = []
-        
-        for perm in permissions:
-            match = re.match(r'(.+?)\s*\((.+?)\)', perm)  # Extract "take pictures and videos" & "Camera"
-            if match:
-                perm_name, category = match.groups()
-                category = category.lower()  # Normalize category for lookup
-            else:
-                perm_name, category = perm, "unknown"
-
-            extracted_permissions.append((perm_name, category))
-
-        # Assign scores and sort
-        permission_scores = [
-            (category, perm, dangerous_ranking.get(category, 1.0)) 
-            for perm, category in extracted_permissions
-        ]
-        
-        sorted_permissions = sorted(permission_scores, key=lambda x: x[2])  # Sort by score (ascending)
-
-        # Calculate average score
-        avg_weight = sum(score for _, _, score in sorted_permissions) / len(sorted_permissions) if sorted_permissions else 2.0
+    if not app:
+        print(f"No app found with app_id {app_id_to_analyze}")
+        conn.close()
+        raise LookupError(f"No app found with app_id {app_id_to_analyze}")
 
-        return sorted_permissions, avg_weight
+    app_id, policy_rowid, policy_bytes, permissions_str = app
 
-    def compute_overall_rating(privacy_rating, permission_rating):
-        avg_sentiment = (privacy_rating + permission_rating) /2
-        if avg_sentiment >= 0.9:
-            return "good", avg_sentiment
-        elif avg_sentiment >= 0.8:
-            return "okay", avg_sentiment
+    # Long policies are never loaded as a whole
+    streaming = bool(policy_bytes) and (stream if stream is not None else policy_bytes > STREAMING_THRESHOLD_BYTES)
+    with timer.stage("db_read"):
+        if streaming:
+            policy_text = None
+            policy_digest = stream_digest(read_policy_pieces(conn, policy_rowid))
         else:
-            return "bad", avg_sentiment
-
-    # ============================
-    # 4. Retrieve the App from Database
-    # ============================
-    cursor.execute("SELECT app_id, policy_text, permissions FROM policies WHERE app_id = ?", (app_id_to_analyze,))
-    app = cursor.fetchone()
+            policy_text = cursor.execute("SELECT policy_text FROM policies WHERE rowid = ?", (policy_rowid,)).fetchone()[0]
+            policy_digest = content_digest(policy_text)
 
-    if not app:
-        print(f"No app found with app_id {app_id_to_analyze}")
-        conn.close()
-        sys.exit(1)
+    # Load terms
+    with timer.stage("load_terms"):
+        generic_terms = load_terms(GENERIC_TERMS_FILE)
+        sensitive_terms = load_terms(SENSITIVE_TERMS_FILE)
+
+    # Skip the NLP pass when nothing it depends on has changed since the last analysis
+    permissions_digest = content_digest(permissions_str)
+    current_terms_version = analysis_terms_version(generic_terms, sensitive_terms)
+
+    previous_analysis = None
+    if already_analysed and not rerun_flag:
+        cursor.execute('''
+            SELECT policy_digest, permissions_digest, terms_version, COALESCE(sentiment_backend, 'stanza')
+            FROM analysis_log WHERE app_id = ?
+        ''', (app_id,))
+        previous_analysis = cursor.fetchone()
+        if previous_analysis == (policy_digest, permissions_digest, current_terms_version, backend.name):
+            print("Policy, permissions and terms unchanged. Returning stored analysis.")
+            result = stored_analysis(cursor, app_id)
+            conn.close()
+            return {"message": "Analysis unchanged since last run. Use --rerun to re-analyze anyway.", "analysis": result}
 
-    app_id, policy_text, permissions_str = app
     print(f"Processing app_id: {app_id}")
 
     # ============================
-    # 5. Process the App
+    # 3. Process the App
     # ============================
-    start_time = time.time()
-
-    # Load terms
-    generic_terms = load_terms("./analysis/genericTerms.txt")
-    sensitive_terms = load_terms("./analysis/sensitiveTerms.txt")
 
-    # Get list of generic and sensitive sentences with their term and sentiment score, 
+    # Get list of generic and sensitive sentences with their term and sentiment score,
     # privacy concerning sentences with their sentiment score,
     # average privacy sentiment score
-    generic_sentences, sensitive_sentences, privacy_concern, policy_avg_sentiment = process_policy(policy_text, sensitive_terms, generic_terms)
+    # Apps from the same publisher often share one policy text: if another app's policy analysis
+    # was made from identical text, terms and backend, reuse it and only score this app's permissions
+    with timer.stage("db_read"):
+        shared = None
+        if not rerun_flag or shared_since:
+            shared = shared_policy_analysis(cursor, app_id, policy_digest, current_terms_version, backend.name, shared_since)
+
+    sentiment_cache = SentimentCache(conn)
+    if shared:
+        print(f"Policy text identical to {shared['app_id']}'s. Reusing its policy analysis.")
+        privacy_concern_str = shared["privacy_concern"]
+        sensitive_sentences_str = shared["sensitive_sentences"]
+        generic_sentences_str = shared["generic_sentences"]
+        policy_avg_sentiment = shared["privacy_sentiment"]
+        sentence_count = shared["sentence_count"]
+        worst_concerning_sentence = shared["worst_sentence"] or "No concerning sentence found"
+    else:
+        # Sentences the previous analysis already scored with this backend keep
+        # their score (classification and averages are redone, as the terms may have changed too)
+        previous_scores = None
+        if previous_analysis and previous_analysis[3] == backend.name:
+            with timer.stage("db_read"):
+                previous_scores = StoredScores(conn, app_id)
+
+        if streaming:
+            # Sentences are staged as they are classified; only the worst ones are kept for analysis_log
+            print(f"Streaming {policy_bytes} bytes of policy text")
+            try:
+                summary = analyse_policy_stream(conn, app_id, policy_rowid, sensitive_terms, generic_terms, backend,
+                                                sentiment_cache, timer, previous=previous_scores)
+            except Exception:
+                conn.close()
+                raise
+            generic_sentences, sensitive_sentences, privacy_concern, policy_avg_sentiment = summary.summary()
+            sentence_count = summary.sentence_count
+        else:
+            scored_sentences = score_policy_sentences(policy_text, cache=sentiment_cache, timer=timer, backend=backend,
+                                                      previous=previous_scores)
+            with timer.stage("classification"):
+                classified = classify_sentences(scored_sentences, sensitive_terms, generic_terms)
+                generic_sentences, sensitive_sentences, privacy_concern, policy_avg_sentiment = summarize_classified(classified)
+            sentence_count = len(scored_sentences)
+        if previous_scores:
+            print(f"Reused the stored scores of {timer.counts.get('sentences_reused', 0)} of {sentence_count} sentences")
+        print(f"Sentiment cache: {sentiment_cache.hits} hits, {sentiment_cache.misses} misses")
+
+        # Convert lists to JSON strings
+        privacy_concern_str = serialize_list(privacy_concern)
+        sensitive_sentences_str = serialize_list(sensitive_sentences)
+        generic_sentences_str = serialize_list(generic_sentences)
+
+        # Get the worst concerning sentence (plain text)
+        worst_concerning_sentence = privacy_concern[0][0] if privacy_concern else "No concerning sentence found"
 
     # Process Permissions
-    permission_list, permission_avg_sentiment = process_permissions(permissions_str)
+    with timer.stage("permissions"):
+        permission_list, permission_avg_sentiment = process_permissions(permissions_str)
 
     # Compute Overall Rating
     overall_rating, avg_rating = compute_overall_rating(policy_avg_sentiment, permission_avg_sentiment)
     analysis_time = datetime.datetime.now().isoformat()
 
-    print(f"Most Concerning Sentence: {privacy_concern[0][0]}" if privacy_concern else "No concerning sentences found.")
+    print(f"Most Concerning Sentence: {worst_concerning_sentence}")
     print(f"App Rating: {overall_rating}")
-    print(f"Worst Permission: {permission_list[0][0] + ", " + permission_list[0][1]}")
+    print(f"Worst Permission: {permission_list[0][0] + ', ' + permission_list[0][1]}")
 
     # ============================
-    # 6. Store Results in Database
+    # 4. Store Results in Database
     # ============================
 
-    # Convert lists of tuples into lists of strings
-    def serialize_list(data):
-        return json.dumps([str(item) for item in data])  # Convert each tuple to a string
-
-    # Convert lists to JSON strings
-    privacy_concern_str = serialize_list(privacy_concern)
-    sensitive_sentences_str = serialize_list(sensitive_sentences)
-    generic_sentences_str = serialize_list(generic_sentences)
-
     permission_list_str = serialize_list(permission_list)
-
-    # Get the worst concerning sentence (plain text)
-    worst_concerning_sentence = privacy_concern[0][0] if privacy_concern else "No concerning sentence found"
     worst_permission = permission_list[0][0] + ", " + permission_list[0][1]
 
-    cursor.execute('''
-        INSERT OR REPLACE INTO analysis_log 
-        (app_id, privacy_concern, sensitive_sentences, generic_sentences, worst_permissions, rating, privacy_sentiment, permission_sentiment, avg_sentiment, analyse_time)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (
-        app_id, 
-        privacy_concern_str, 
-        sensitive_sentences_str,
-        generic_sentences_str,
-        permission_list_str, 
-        overall_rating,
-        policy_avg_sentiment, 
-        permission_avg_sentiment,
-        avg_rating,
-        analysis_time
-    ))
-    conn.commit()
-    print("Results stored in analysis_log.")
-
-    cursor.execute('''
-        UPDATE policies
-        SET privacy_concern = ?,
-            worst_permissions = ?,
-            rating = ?
-        WHERE app_id = ?
-    ''', (
-        worst_concerning_sentence,
-        worst_permission,
-        overall_rating,
-        app_id
-    ))
+    # One transaction for the results, the stored sentences and the cache's new scores. Until
+    # now the connection has only read and staged rows in temporary tables: start afresh, so
+    # the transaction waits for other writers instead of failing on an outdated snapshot.
     conn.commit()
-    print("Results stored in policy table.")
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        with timer.stage("db_write"):
+            sentiment_cache.flush()
+            # Sentences first: the analysis_log triggers index the app's flagged sentences from them
+            if shared:
+                copy_sentences(cursor, shared["app_id"], app_id)
+            elif streaming:
+                save_staged_sentences(cursor, app_id)
+            else:
+                save_sentences(cursor, app_id, classified)
+            cursor.execute('''
+                INSERT OR REPLACE INTO analysis_log
+                (app_id, privacy_concern, sensitive_sentences, generic_sentences, worst_permissions, rating, privacy_sentiment, permission_sentiment, avg_sentiment, analyse_time,
+                 policy_digest, permissions_digest, terms_version, sentence_count, sentiment_backend)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                app_id,
+                privacy_concern_str,
+                sensitive_sentences_str,
+                generic_sentences_str,
+                permission_list_str,
+                overall_rating,
+                policy_avg_sentiment,
+                permission_avg_sentiment,
+                avg_rating,
+                analysis_time,
+                policy_digest,
+                permissions_digest,
+                current_terms_version,
+                sentence_count,
+                backend.name
+            ))
+
+            cursor.execute('''
+                UPDATE policies
+                SET privacy_concern = ?,
+                    worst_permissions = ?,
+                    rating = ?
+                WHERE app_id = ?
+            ''', (
+                worst_concerning_sentence,
+                worst_permission,
+                overall_rating,
+                app_id
+            ))
+
+        save_timings(cursor, app_id, analysis_time, timer)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        conn.close()
+        raise
+    print("Results stored in analysis_log and policy table.")
+    print(timer.summary())
 
     conn.close()
     print("Analysis complete for app_id", app_id)
+
+# ============================
+# Provisional rating
+# ============================
+def provisional_analysis(app_id, db_path=None, backend=None):
+    """
+    Rate an app with the fast lexicon backend without storing anything.
+    Takes milliseconds, so /nlp can answer straight away while the accurate analysis runs.
+    """
+    backend = backend or LexiconBackend()
+    conn = connect(db_path)
+    try:
+        app = conn.execute("SELECT policy_text, permissions FROM policies WHERE app_id = ?", (app_id,)).fetchone()
+    finally:
+        conn.close()
+    if not app:
+        raise LookupError(f"No app found with app_id {app_id}")
+    policy_text, permissions_str = app
+
+    generic_terms = load_terms(GENERIC_TERMS_FILE)
+    sensitive_terms = load_terms(SENSITIVE_TERMS_FILE)
+    scored_sentences = score_policy_sentences(policy_text or "", backend=backend)
+    _, _, privacy_concern, policy_avg_sentiment = summarize_policy(scored_sentences, sensitive_terms, generic_terms)
+    permission_list, permission_avg_sentiment = process_permissions(permissions_str or "")
+    overall_rating, avg_rating = compute_overall_rating(policy_avg_sentiment, permission_avg_sentiment)
+
+    return {
+        "app_id": app_id,
+        "provisional": True,
+        "sentiment_backend": backend.name,
+        "rating": overall_rating,
+        "avg_sentiment": avg_rating,
+        "privacy_sentiment": policy_avg_sentiment,
+        "permission_sentiment": permission_avg_sentiment,
+        "privacy_concern": privacy_concern[0][0] if privacy_concern else "No concerning sentence found",
+        "worst_permissions": permission_list[0][0] + ", " + permission_list[0][1] if permission_list else None,
+    }
+
+# ============================
+# Profiling a single app
+# ============================
+def profile_analysis(app_id, output_path=None, profiler="cProfile", force_flag=True, rerun_flag=True, db_path=None):
+    """
+    Run one analysis under cProfile (or pyinstrument, if installed) and print the hottest calls.
+    The cProfile stats are written to output_path (default ./profiles/<app_id>.prof) for snakeviz / pstats;
+    pyinstrument writes an HTML report instead. Re-analyses by default so the profile covers the full pipeline.
+    """
+    output_dir = os.path.join(".", "profiles")
+    if profiler == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise RuntimeError("pyinstrument is not installed (pip install pyinstrument)")
+        output_path = output_path or os.path.join(output_dir, f"{app_id}.html")
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        profile = Profiler()
+        profile.start()
+        try:
+            result = NLPAnalysis_single(app_id, force_flag, rerun_flag, db_path)
+        finally:
+            profile.stop()
+        with open(output_path, "w") as f:
+            f.write(profile.output_html())
+        print(profile.output_text())
+    else:
+        output_path = output_path or os.path.join(output_dir, f"{app_id}.prof")
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        profile = cProfile.Profile()
+        try:
+            result = profile.runcall(NLPAnalysis_single, app_id, force_flag, rerun_flag, db_path)
+        finally:
+            profile.dump_stats(output_path)
+        pstats.Stats(output_path).sort_stats("cumulative").print_stats(25)
+
+    print(f"Profile written to {output_path}")
+    return result
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Analyse one app's privacy policy and permissions.")
+    parser.add_argument("app_id")
+    parser.add_argument("--force", action="store_true", help="re-analyse if the policy, permissions or terms changed")
+    parser.add_argument("--rerun", action="store_true", help="re-analyse regardless")
+    parser.add_argument("--profile", nargs="?", const="", default=None, metavar="OUTPUT",
+                        help="profile the analysis (always re-analyses) and write the stats to OUTPUT")
+    parser.add_argument("--profiler", choices=["cProfile", "pyinstrument"], default="cProfile")
+    parser.add_argument("--db", help="database path (default: $PRIVACY_DB_PATH or scrapers/privacy_policies.db)")
+    parser.add_argument("--backend", choices=["stanza", "lexicon"], help="sentiment backend (default: $SENTIMENT_BACKEND or stanza)")
+    parser.add_argument("--provisional", action="store_true", help="print a provisional lexicon rating without storing it")
+    parser.add_argument("--stream", action="store_true", default=None, help="analyse the policy in bounded memory")
+    args = parser.parse_args()
+
+    if args.provisional:
+        print(provisional_analysis(args.app_id, args.db))
+    elif args.profile is not None:
+        profile_analysis(args.app_id, args.profile or None, args.profiler, db_path=args.db)
+    else:
+        print(NLPAnalysis_single(args.app_id, args.force, args.rerun, args.db, args.backend, args.stream))
@@ -0,0 +1,105 @@
+import argparse
+import json
+import time
+from collections import defaultdict
+from analysis.NLPAnalysis_single import (
+    GENERIC_TERMS_FILE, SENSITIVE_TERMS_FILE, load_terms, summarize_policy, compute_overall_rating
+)
+from analysis.sentimentBackends import get_backend
+from analysis.database import connect
+
+# ============================
+# Calibration of the fast sentiment tier
+# ============================
+# Re-scores every sentence stored by Stanza analyses with the lexicon backend and
+# reports how often the two agree, per sentence and on the final app rating, so we
+# know how far a provisional rating can be trusted.
+#
+#   python -m analysis.backendCalibration --output calibration.json
+
+RATINGS = ["good", "okay", "bad"]
+
+
+def _confusion(labels):
+    return {expected: {actual: 0 for actual in labels} for expected in labels}
+
+
+def calibrate(db_path=None, backend_name="lexicon"):
+    """Compare backend_name with the stored Stanza scores; returns the report as a dict."""
+    backend = get_backend(backend_name)
+    generic_terms = load_terms(GENERIC_TERMS_FILE)
+    sensitive_terms = load_terms(SENSITIVE_TERMS_FILE)
+
+    conn = connect(db_path)
+    try:
+        apps = conn.execute('''
+            SELECT app_id, rating, privacy_sentiment, permission_sentiment FROM analysis_log
+            WHERE COALESCE(sentiment_backend, 'stanza') = 'stanza' AND sentence_count IS NOT NULL
+        ''').fetchall()
+        sentences = defaultdict(list)
+        for app_id, offset, text, score in conn.execute('''
+            SELECT s.app_id, s.sentence_offset, s.sentence_text, s.score FROM analysis_sentences s
+            JOIN analysis_log l ON l.app_id = s.app_id
+            WHERE COALESCE(l.sentiment_backend, 'stanza') = 'stanza'
+            ORDER BY s.app_id, s.sentence_offset
+        '''):
+            sentences[app_id].append((offset, text, score))
+    finally:
+        conn.close()
+
+    sentence_confusion = _confusion(["0", "1", "2"])
+    rating_confusion = _confusion(RATINGS)
+    sentence_total = sentence_agree = 0
+    sentence_error = privacy_error = 0.0
+    rating_agree = 0
+    scoring_seconds = 0.0
+
+    for app_id, stored_rating, stored_privacy, permission_sentiment in apps:
+        stored = sentences.get(app_id, [])
+        start = time.perf_counter()
+        fast_scores = backend.score([text for _, text, _ in stored])
+        scoring_seconds += time.perf_counter() - start
+
+        for (_, _, accurate), fast in zip(stored, fast_scores):
+            expected = str(min(2, max(0, round(accurate))))
+            sentence_confusion[expected][str(fast)] += 1
+            sentence_agree += expected == str(fast)
+            sentence_error += abs(accurate - fast)
+            sentence_total += 1
+
+        # Rating the app would have got from the fast tier (same terms and permissions)
+        rescored = [(offset, text, fast) for (offset, text, _), fast in zip(stored, fast_scores)]
+        _, _, _, privacy_sentiment = summarize_policy(rescored, sensitive_terms, generic_terms)
+        fast_rating, _ = compute_overall_rating(privacy_sentiment, permission_sentiment)
+        privacy_error += abs(privacy_sentiment - (stored_privacy or 0))
+        if stored_rating in rating_confusion:
+            rating_confusion[stored_rating][fast_rating] += 1
+        rating_agree += stored_rating == fast_rating
+
+    return {
+        "backend": backend.name,
+        "reference": "stanza",
+        "apps": len(apps),
+        "sentences": sentence_total,
+        "sentence_agreement": round(sentence_agree / sentence_total, 4) if sentence_total else None,
+        "sentence_mean_abs_error": round(sentence_error / sentence_total, 4) if sentence_total else None,
+        "sentence_confusion": sentence_confusion,  # stanza score (rounded) -> fast score -> count
+        "rating_agreement": round(rating_agree / len(apps), 4) if apps else None,
+        "privacy_sentiment_mean_abs_error": round(privacy_error / len(apps), 4) if apps else None,
+        "rating_confusion": rating_confusion,  # stanza rating -> fast rating -> count
+        "sentences_per_second": round(sentence_total / scoring_seconds) if scoring_seconds else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the fast sentiment backend with stored Stanza analyses.")
+    parser.add_argument("--db", help="database path (default: $PRIVACY_DB_PATH or scrapers/privacy_policies.db)")
+    parser.add_argument("--backend", default="lexicon")
+    parser.add_argument("--output", help="also write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = calibrate(args.db, args.backend)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
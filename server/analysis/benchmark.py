@@ -0,0 +1,331 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager, redirect_stdout
+from analysis import pipelineRegistry, inferenceScheduler
+from analysis.NLPAnalysis_single import (
+    NLPAnalysis_single, is_generic_sentence, find_most_concerning_sentence, process_policy,
+    process_permissions, score_policy_sentences, normalize_text, load_terms
+)
+from analysis.sentimentBackends import LexiconBackend
+from analysis.database import close_all
+from analysis.migrations import migrate
+from analysis.termMatcher import get_generic_matcher
+
+# ============================
+# Benchmark suite for the analysis and API hot paths
+# ============================
+# Runs without network access or a real model: policies and permissions come from a
+# seeded synthetic corpus, and Stanza is replaced by the lexicon sentiment backend. Results are written as JSON so that a run can be compared with a baseline:
+#
+#   python -m analysis.benchmark --apps 200 --sentences 60 --output bench.json
+#   python -m analysis.benchmark --baseline bench.json
+
+ANALYSIS_DIR = os.path.dirname(os.path.abspath(__file__))
+GENERIC_TERMS_PATH = os.path.join(ANALYSIS_DIR, "genericTerms.txt")
+SENSITIVE_TERMS_PATH = os.path.join(ANALYSIS_DIR, "sensitiveTerms.txt")
+
+DEFAULT_APPS = 50
+DEFAULT_SENTENCES = 40
+DEFAULT_REPEAT = 5
+DEFAULT_SEED = 0
+
+CATEGORIES = ["Health & Fitness", "Finance", "Social", "Tools", "Education", "Shopping"]
+PERMISSIONS = [
+    "read your contacts (Contacts)",
+    "precise location (Location)",
+    "approximate location (Location)",
+    "take pictures and videos (Camera)",
+    "record audio (Microphone)",
+    "read the contents of your USB storage (Photos/Media/Files)",
+    "modify or delete the contents of your USB storage (Storage)",
+    "full network access (Other)",
+    "view network connections (Other)",
+]
+FILLER_SENTENCES = [
+    "This app lets you keep track of your daily activities.",
+    "Your settings are stored on the device.",
+    "We update our services regularly to improve reliability.",
+    "You can change your preferences at any time in the app.",
+    "Some features may not be available in every region.",
+]
+SENSITIVE_TEMPLATES = [
+    "We collect your {term} when you use certain features.",
+    "Your {term} is stored securely on our servers.",
+    "We may share your {term} with service providers who help us run the app.",
+]
+NEGATIVE_TEMPLATES = [
+    "We may sell your {term} to advertising partners.",
+    "We share your usage data with third parties for marketing purposes.",
+]
+
+
+# ============================
+# Synthetic corpus
+# ============================
+def generate_policy(rng, sentence_count, generic_terms, sensitive_terms):
+    """A policy of sentence_count sentences mixing filler, generic, sensitive and negative ones."""
+    sentences = []
+    for _ in range(sentence_count):
+        kind = rng.random()
+        if kind < 0.2:
+            sentences.append(f"Please read the {rng.choice(generic_terms)} section carefully.")
+        elif kind < 0.45:
+            sentences.append(rng.choice(SENSITIVE_TEMPLATES).format(term=rng.choice(sensitive_terms)))
+        elif kind < 0.55:
+            sentences.append(rng.choice(NEGATIVE_TEMPLATES).format(term=rng.choice(sensitive_terms)))
+        else:
+            sentences.append(rng.choice(FILLER_SENTENCES))
+    return " ".join(sentences)
+
+def generate_permissions(rng):
+    return "; ".join(rng.sample(PERMISSIONS, rng.randint(1, len(PERMISSIONS))))
+
+def generate_corpus(app_count=DEFAULT_APPS, sentences_per_policy=DEFAULT_SENTENCES, seed=DEFAULT_SEED):
+    """Return app_count synthetic apps (dicts with the policies columns the analysis reads)."""
+    rng = random.Random(seed)
+    generic_terms = load_terms(GENERIC_TERMS_PATH)
+    sensitive_terms = load_terms(SENSITIVE_TERMS_PATH)
+    return [{
+        "app_id": f"com.benchmark.app{i:05d}",
+        "app_name": f"Benchmark App {i}",
+        "category": rng.choice(CATEGORIES),
+        "policy_text": generate_policy(rng, sentences_per_policy, generic_terms, sensitive_terms),
+        "permissions": generate_permissions(rng),
+    } for i in range(app_count)]
+
+
+# ============================
+# Stub sentiment backend
+# ============================
+@contextmanager
+def stub_pipeline():
+    """Make the pipeline registry hand out the lexicon backend (a stanza.Pipeline look-alike) instead of loading Stanza."""
+    build_pipeline = pipelineRegistry._build_pipeline
+    pipelineRegistry.shutdown()
+    pipelineRegistry._build_pipeline = lambda processors, batch_size: LexiconBackend()
+    try:
+        yield
+    finally:
+        inferenceScheduler.shutdown()
+        pipelineRegistry.shutdown()
+        pipelineRegistry._build_pipeline = build_pipeline
+
+
+# ============================
+# Benchmark database
+# ============================
+
+def create_benchmark_db(directory, corpus, feedback_per_app=3):
+    """
+    Lay out a server working directory (scrapers/privacy_policies.db and the analysis term files)
+    in directory, filled with the corpus, one icon per app and some user feedback.
+    """
+    os.makedirs(os.path.join(directory, "scrapers"), exist_ok=True)
+    os.makedirs(os.path.join(directory, "analysis"), exist_ok=True)
+    shutil.copy(GENERIC_TERMS_PATH, os.path.join(directory, "analysis"))
+    shutil.copy(SENSITIVE_TERMS_PATH, os.path.join(directory, "analysis"))
+
+    db_path = os.path.join(directory, "scrapers", "privacy_policies.db")
+    conn = sqlite3.connect(db_path)
+    migrate(conn)
+    conn.executemany(
+        "INSERT INTO users (email, password, is_admin) VALUES (?, ?, 0)",
+        [(f"user{i}@example.com", "x") for i in range(10)]
+    )
+    for i, app in enumerate(corpus):
+        conn.executemany(
+            "INSERT INTO feedback (user_id, app_id, reason, status, date, type) VALUES (?, ?, ?, ?, ?, ?)",
+            [((i + j) % 10 + 1, app["app_id"], "Policy mentions data selling", "Pending", "2025-01-01", "Privacy")
+             for j in range(feedback_per_app)]
+        )
+        conn.execute('''
+            INSERT INTO policies (app_id, app_name, policy_text, permissions, category)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (app["app_id"], app["app_name"], app["policy_text"], app["permissions"], app["category"]))
+        conn.execute("INSERT INTO app_icons (app_id, icon_url) VALUES (?, ?)",
+                     (app["app_id"], f"https://example.com/icons/{i}.png"))
+    conn.commit()
+    conn.close()
+    return db_path
+
+@contextmanager
+def working_directory(path):
+    """Run in path, with scrapers/privacy_policies.db there as the configured database."""
+    previous = os.getcwd()
+    previous_db = os.environ.get("PRIVACY_DB_PATH")
+    os.chdir(path)
+    os.environ["PRIVACY_DB_PATH"] = os.path.join(path, "scrapers", "privacy_policies.db")
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+        if previous_db is None:
+            os.environ.pop("PRIVACY_DB_PATH")
+        else:
+            os.environ["PRIVACY_DB_PATH"] = previous_db
+        close_all()
+
+
+# ============================
+# Timing
+# ============================
+def measure(name, fn, repeat=DEFAULT_REPEAT, items=1):
+    """
+    Call fn repeat times and return the timing summary of one benchmark (items = work units per call).
+    Whatever fn prints (the analysis is chatty) is discarded.
+    """
+    timings = []
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - start) * 1000)
+    median = statistics.median(timings)
+    result = {
+        "name": name,
+        "repeat": repeat,
+        "items": items,
+        "min_ms": round(min(timings), 3),
+        "median_ms": round(median, 3),
+        "mean_ms": round(statistics.mean(timings), 3),
+        "max_ms": round(max(timings), 3),
+        "items_per_second": round(items / (median / 1000), 1) if median else None,
+    }
+    print(f"{name:<40} median {result['median_ms']:>10.3f} ms  ({items} items)")
+    return result
+
+
+# ============================
+# Benchmarks
+# ============================
+def benchmark_functions(corpus, repeat=DEFAULT_REPEAT):
+    """The analysis functions, called directly with the lexicon stand-in pipeline (no database, no sentiment cache)."""
+    generic_terms = load_terms(GENERIC_TERMS_PATH)
+    sensitive_terms = load_terms(SENSITIVE_TERMS_PATH)
+    nlp = LexiconBackend()
+
+    scored = [score_policy_sentences(app["policy_text"], nlp) for app in corpus]
+    sentences = [normalize_text(text) for policy in scored for _, text, _ in policy]
+    generic_matcher = get_generic_matcher(generic_terms)
+
+    return [
+        measure("is_generic_sentence", lambda: [is_generic_sentence(s, generic_matcher) for s in sentences],
+                repeat, len(sentences)),
+        measure("find_most_concerning_sentence",
+                lambda: [find_most_concerning_sentence(policy, sensitive_terms, generic_terms) for policy in scored],
+                repeat, len(scored)),
+        measure("process_policy",
+                lambda: [process_policy(app["policy_text"], sensitive_terms, generic_terms, nlp) for app in corpus],
+                repeat, len(corpus)),
+        measure("process_policy (lexicon backend)",
+                lambda: [process_policy(app["policy_text"], sensitive_terms, generic_terms, backend=nlp) for app in corpus],
+                repeat, len(corpus)),
+        measure("process_permissions", lambda: [process_permissions(app["permissions"]) for app in corpus],
+                repeat, len(corpus)),
+    ]
+
+def benchmark_endpoints(corpus, repeat=DEFAULT_REPEAT):
+    """Full analyses and the main Flask endpoints through the test client, against a temporary database."""
+    results = []
+    with tempfile.TemporaryDirectory() as directory, working_directory(directory), stub_pipeline():
+        db_path = create_benchmark_db(directory, corpus)
+
+        def analyse_all():
+            for app in corpus:
+                NLPAnalysis_single(app["app_id"], rerun_flag=True, db_path=db_path)
+
+        # The first pass fills the sentiment cache; later passes measure cached re-analysis
+        results.append(measure("NLPAnalysis_single (cold cache)", analyse_all, 1, len(corpus)))
+        results.append(measure("NLPAnalysis_single (warm cache)", analyse_all, repeat, len(corpus)))
+
+        import server
+        client = server.app.test_client()
+        app_id = corpus[0]["app_id"]
+        endpoints = [
+            ("GET /apps", "/apps"),
+            ("GET /app/<id>", f"/app/{app_id}"),
+            ("GET /app/<id>?format=compact", f"/app/{app_id}?format=compact"),
+            ("GET /app/<id>/sentences", f"/app/{app_id}/sentences?category=concerning"),
+            ("GET /apps/byTerm", "/apps/byTerm?term=location"),
+            ("GET /getFeedback", f"/getFeedback?app_id={app_id}"),
+            ("GET /nlp (unchanged)", f"/nlp?app_id={app_id}&flag=--force"),
+        ]
+        for name, url in endpoints:
+            with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+                response = client.get(url)
+            if response.status_code != 200:
+                raise RuntimeError(f"{url} returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+            result = measure(name, lambda: client.get(url), repeat)
+            result["response_bytes"] = len(response.get_data())
+            results.append(result)
+    return results
+
+def run_benchmarks(app_count=DEFAULT_APPS, sentences_per_policy=DEFAULT_SENTENCES, repeat=DEFAULT_REPEAT,
+                   seed=DEFAULT_SEED, suites=("functions", "endpoints")):
+    """Run the benchmark suites and return the report as a dict."""
+    corpus = generate_corpus(app_count, sentences_per_policy, seed)
+    results = []
+    if "functions" in suites:
+        results += benchmark_functions(corpus, repeat)
+    if "endpoints" in suites:
+        results += benchmark_endpoints(corpus, repeat)
+    return {
+        "meta": {
+            "created": datetime.datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "apps": app_count,
+            "sentences_per_policy": sentences_per_policy,
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+def compare_reports(report, baseline):
+    """Median of each benchmark against the baseline report: [(name, baseline_ms, current_ms, ratio)]."""
+    baseline_medians = {result["name"]: result["median_ms"] for result in baseline["results"]}
+    comparison = []
+    for result in report["results"]:
+        before = baseline_medians.get(result["name"])
+        ratio = round(result["median_ms"] / before, 3) if before else None
+        comparison.append((result["name"], before, result["median_ms"], ratio))
+    return comparison
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the policy analysis and API hot paths.")
+    parser.add_argument("--apps", type=int, default=DEFAULT_APPS, help="number of synthetic apps")
+    parser.add_argument("--sentences", type=int, default=DEFAULT_SENTENCES, help="sentences per synthetic policy")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timed runs per benchmark")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--suite", action="append", choices=["functions", "endpoints"],
+                        help="only run this suite (repeatable)")
+    parser.add_argument("--output", default="benchmark_report.json", help="where to write the JSON report")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.apps, args.sentences, args.repeat, args.seed,
+                            tuple(args.suite or ("functions", "endpoints")))
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["comparison"] = [
+                {"name": name, "baseline_ms": before, "median_ms": after, "ratio": ratio}
+                for name, before, after, ratio in compare_reports(report, json.load(f))
+            ]
+        print("\nCompared with", args.baseline)
+        for row in report["comparison"]:
+            print(f"{row['name']:<40} {row['baseline_ms']} -> {row['median_ms']} ms  (x{row['ratio']})")
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
@@ -0,0 +1,104 @@
+import collections
+import gzip
+import hashlib
+import threading
+from flask import Response
+from analysis.database import connect, database_path
+from analysis.migrations import ensure_schema
+
+# ============================
+# In-memory cache of catalogue responses
+# ============================
+# /apps and /app/<app_id> are read far more often than the catalogue changes. Their JSON
+# bodies are kept encoded (and gzip-compressed when large) under a catalogue version, and
+# served from memory while the version is unchanged.
+#
+# The version is a counter in the database, bumped by triggers (migration 10) on every table
+# the responses are built from. Every writer therefore invalidates the cache: /update, /addApp and
+# /feedback, NLPAnalysis_single in this process or in a batch worker, and the Node scrapers.
+# Checking it is one primary-key read per request.
+
+MAX_ENTRIES = 512
+GZIP_MIN_BYTES = 1024
+
+
+CachedBody = collections.namedtuple("CachedBody", "version etag body gzipped")
+
+
+class CatalogueCache:
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._tracked_path = None
+
+    def current_version(self):
+        """The catalogue version of the configured database."""
+        path = database_path()
+        conn = connect()
+        try:
+            if path != self._tracked_path:
+                ensure_schema(conn)
+                with self._lock:
+                    self._entries.clear()
+                    self._tracked_path = path
+            return conn.execute("SELECT version FROM catalogue_version WHERE id = 1").fetchone()[0]
+        finally:
+            conn.close()
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def respond(self, request, build):
+        """
+        The response to request from memory if the catalogue is unchanged since it was cached,
+        else from build() (a view function returning a JSON response), which is then cached if 200.
+        """
+        key = request.full_path
+        version = self.current_version()
+        entry = self._get(key, version)
+        if entry is None:
+            self.misses += 1
+            response = build()
+            if isinstance(response, tuple) or response.status_code != 200:
+                return response
+            body = response.get_data()
+            entry = CachedBody(
+                version,
+                hashlib.sha1(body).hexdigest(),
+                body,
+                gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_BYTES else None,
+            )
+            self._put(key, entry)
+            cache_status = "miss"
+        else:
+            self.hits += 1
+            cache_status = "hit"
+
+        use_gzip = entry.gzipped is not None and "gzip" in request.accept_encodings
+        response = Response(entry.gzipped if use_gzip else entry.body, mimetype="application/json")
+        if use_gzip:
+            response.headers["Content-Encoding"] = "gzip"
+        response.headers["Vary"] = "Accept-Encoding"
+        response.headers["X-Cache"] = cache_status
+        response.set_etag(entry.etag + ("-gzip" if use_gzip else ""))
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
@@ -0,0 +1,143 @@
+import os
+import sqlite3
+import threading
+
+# ============================
+# Shared SQLite connection layer
+# ============================
+# The Flask server, the analysis and the background workers all open the database through
+# connect(). It resolves one configured path, and hands out connections from a pool per
+# database file instead of opening a new one per request or analysis. Every connection runs
+# in WAL mode, so long analysis writes no longer block readers, with a busy timeout instead
+# of immediate "database is locked" errors. A connection keeps its prepared statements
+# (sqlite3's statement cache) between uses.
+#
+# The database is $PRIVACY_DB_PATH if set, else server/scrapers/privacy_policies.db,
+# wherever the process was started from.
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DB_PATH = os.path.join(SERVER_DIR, "scrapers", "privacy_policies.db")
+
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 8))  # idle connections kept per database
+BUSY_TIMEOUT_MS = 30000
+STATEMENT_CACHE_SIZE = 256
+
+
+def database_path(db_path=None):
+    """db_path if given, else the configured database path."""
+    return db_path or os.environ.get("PRIVACY_DB_PATH") or DEFAULT_DB_PATH
+
+
+class PooledConnection(sqlite3.Connection):
+    """A sqlite3 connection whose close() hands it back to its pool."""
+    pool = None
+    checked_out = False
+
+    def close(self):
+        if self.pool is None:
+            super().close()
+        elif self.checked_out:
+            self.pool.release(self)
+
+    def discard(self):
+        super().close()
+
+
+class ConnectionPool:
+    """Connections to one database file. A connection is used by one thread at a time."""
+
+    def __init__(self, db_path, size=POOL_SIZE):
+        self.db_path = db_path
+        self.size = size
+        self.opened = 0
+        self.reused = 0
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _open(self):
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False,
+                               cached_statements=STATEMENT_CACHE_SIZE, factory=PooledConnection)
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        conn.execute("PRAGMA journal_mode = WAL")
+        # In WAL mode NORMAL only risks the last commits on power loss, never corruption
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.pool = self
+        self.opened += 1
+        return conn
+
+    def acquire(self, row_factory=None, foreign_keys=False):
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+            if conn is not None:
+                self.reused += 1
+        if conn is None:
+            conn = self._open()
+        conn.checked_out = True
+        # A previous user may have changed the connection's settings
+        conn.row_factory = row_factory
+        conn.isolation_level = ""  # sqlite3's default: DML opens a transaction, rollback() undoes it
+        conn.execute(f"PRAGMA foreign_keys = {'ON' if foreign_keys else 'OFF'}")
+        return conn
+
+    def release(self, conn):
+        """Take a connection back: roll back whatever its user left uncommitted and keep it if there is room."""
+        conn.checked_out = False
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.discard()
+            return
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+        conn.discard()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.discard()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path=None):
+    path = os.path.abspath(database_path(db_path))
+    with _pools_lock:
+        if path not in _pools:
+            _pools[path] = ConnectionPool(path)
+        return _pools[path]
+
+
+def connect(db_path=None, row_factory=None, foreign_keys=False):
+    """
+    A pooled connection to db_path (default: the configured database).
+    Close it as usual when done; it goes back to the pool.
+    """
+    return get_pool(db_path).acquire(row_factory, foreign_keys)
+
+
+def close_all():
+    """Close every idle pooled connection (at exit, or in tests between databases)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+# A forked child (passAllApps workers) must not use its parent's connections. They are left
+# open, as closing them in the child could release locks the parent still holds.
+_inherited = []
+
+def _forget_pools():
+    global _pools_lock
+    _pools_lock = threading.Lock()
+    _inherited.extend(_pools.values())
+    _pools.clear()
+
+os.register_at_fork(after_in_child=_forget_pools)
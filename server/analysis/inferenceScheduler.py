@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+from concurrent.futures import Future
+from analysis.pipelineRegistry import get_pipeline, get_pipeline_lock
+from analysis.policyChunker import chunk_sentences, DEFAULT_CHUNK_TOKENS
+
+# ============================
+# Micro-batching inference scheduler
+# ============================
+# Every analysis running in this process hands its sentences to one scheduler
+# thread, which owns the shared pipeline. The thread waits until it has
+# max_batch_sentences sentences or max_wait_ms has passed since the oldest pending
+# request, scores them all in a single bulk call and hands each caller its scores.
+# Concurrent requests therefore fill Stanza's batches instead of running tiny
+# batches one after another, and the pipeline is never called from two threads.
+
+DEFAULT_MAX_BATCH_SENTENCES = 64
+DEFAULT_MAX_WAIT_MS = 20
+
+
+def score_sentences_with(nlp, sentences, max_tokens=DEFAULT_CHUNK_TOKENS):
+    """
+    Score a list of sentence texts with a pipeline in one bulk call and return one score per sentence.
+    Stanza may split or join sentences differently from us, so each of our sentences gets the
+    mean sentiment of the Stanza sentences that overlap it.
+    """
+    return score_chunks_with(nlp, sentences, max_tokens)[0]
+
+
+def score_chunks_with(nlp, sentences, max_tokens=DEFAULT_CHUNK_TOKENS):
+    """score_sentences_with, also returning the index of the chunk each sentence was scored in."""
+    chunks = chunk_sentences(sentences, max_tokens)
+    if not chunks:
+        return [], []
+    chunk_of = [chunk_index for chunk_index, (_, members) in enumerate(chunks) for _ in members]
+
+    docs = nlp.bulk_process([chunk for chunk, _ in chunks])
+
+    totals = [0.0] * len(sentences)
+    counts = [0] * len(sentences)
+    for (_, members), doc in zip(chunks, docs):
+        for sentence in doc.sentences:
+            if not sentence.tokens:
+                continue
+            start, end = sentence.tokens[0].start_char, sentence.tokens[-1].end_char
+            for index, member_start, member_end in members:
+                if start < member_end and member_start < end:
+                    totals[index] += sentence.sentiment
+                    counts[index] += 1
+
+    # 1 is Stanza's neutral score, used if a sentence was somehow not covered
+    return [total / count if count else 1.0 for total, count in zip(totals, counts)], chunk_of
+
+
+class InferenceScheduler:
+    def __init__(self, max_batch_sentences=DEFAULT_MAX_BATCH_SENTENCES, max_wait_ms=DEFAULT_MAX_WAIT_MS,
+                 max_tokens=DEFAULT_CHUNK_TOKENS):
+        self.max_batch_sentences = max_batch_sentences
+        self.max_wait = max_wait_ms / 1000
+        self.max_tokens = max_tokens
+        self.batches_run = 0
+        self.sentences_scored = 0
+        self._pending = []  # (sentences, future, enqueued_at)
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="inference-scheduler", daemon=True)
+        self._thread.start()
+
+    def score(self, sentences):
+        """Score sentences together with whatever else is in flight; blocks until done."""
+        return self.score_counted(sentences)[0]
+
+    def score_counted(self, sentences):
+        """score, also returning how many pipeline chunks held these sentences."""
+        if not sentences:
+            return [], 0
+        future = Future()
+        with self._condition:
+            if self._stopping:
+                raise RuntimeError("Inference scheduler has been shut down")
+            self._pending.append((list(sentences), future, time.monotonic()))
+            self._condition.notify()
+        return future.result()
+
+    def stop(self, timeout=None):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        self._thread.join(timeout)
+
+    def _next_batch(self):
+        """Wait until a batch is full, the oldest request has waited max_wait, or we are stopping."""
+        with self._condition:
+            while True:
+                if self._pending:
+                    queued = sum(len(sentences) for sentences, _, _ in self._pending)
+                    remaining = self._pending[0][2] + self.max_wait - time.monotonic()
+                    if queued >= self.max_batch_sentences or remaining <= 0 or self._stopping:
+                        batch, self._pending = self._pending, []
+                        return batch
+                    self._condition.wait(remaining)
+                elif self._stopping:
+                    return None
+                else:
+                    self._condition.wait()
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            # Identical sentences from different callers are scored once
+            unique = list(dict.fromkeys(sentence for sentences, _, _ in batch for sentence in sentences))
+            try:
+                with get_pipeline_lock():
+                    unique_scores, chunk_of = score_chunks_with(get_pipeline(), unique, self.max_tokens)
+                scores = dict(zip(unique, unique_scores))
+                chunks = dict(zip(unique, chunk_of))
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches_run += 1
+            self.sentences_scored += len(unique)
+            for sentences, future, _ in batch:
+                future.set_result(([scores[sentence] for sentence in sentences],
+                                   len({chunks[sentence] for sentence in sentences})))
+
+
+_scheduler = None
+_scheduler_pid = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """The process-wide scheduler, started on first use (and again in a forked child)."""
+    global _scheduler, _scheduler_pid
+    with _scheduler_lock:
+        if _scheduler is None or _scheduler_pid != os.getpid():
+            _scheduler = InferenceScheduler()
+            _scheduler_pid = os.getpid()
+        return _scheduler
+
+
+def shutdown():
+    """Stop the scheduler thread after it has finished the requests already queued."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is not None and _scheduler_pid == os.getpid():
+            _scheduler.stop()
+        _scheduler = None
@@ -0,0 +1,139 @@
+import datetime
+import json
+import sqlite3
+import threading
+from analysis.NLPAnalysis_single import NLPAnalysis_single, stored_analysis
+from analysis.migrations import ensure_schema
+from analysis.database import connect
+
+# ============================
+# Persistent analysis job queue
+# ============================
+# /nlp/jobs submits an analysis and returns straight away; a small pool of worker
+# threads runs the queued jobs. Jobs live in the analysis_jobs table (migration 7), so queued work
+# survives a restart, and an app can only have one queued or running job at a time.
+
+DEFAULT_WORKERS = 2
+POLL_SECONDS = 1.0
+
+
+def _now():
+    return datetime.datetime.now().isoformat()
+
+
+class AnalysisJobQueue:
+    def __init__(self, db_path=None, workers=DEFAULT_WORKERS, analyze=NLPAnalysis_single):
+        self.db_path = db_path
+        self.workers = workers
+        self.analyze = analyze
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+        self._start_lock = threading.Lock()
+
+    def _connect(self):
+        conn = connect(self.db_path, row_factory=sqlite3.Row)
+        ensure_schema(conn)
+        return conn
+
+    def start(self):
+        """Start the worker threads (once) and requeue jobs interrupted by a previous shutdown."""
+        with self._start_lock:
+            if self._threads:
+                return
+            conn = self._connect()
+            try:
+                conn.execute("UPDATE analysis_jobs SET status = 'queued', started_at = NULL WHERE status = 'running'")
+                conn.commit()
+            finally:
+                conn.close()
+
+            self._stopping.clear()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"analysis-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def submit(self, app_id, force_flag=False, rerun_flag=False):
+        """Queue an analysis and return its job, or the app's job that is already queued or running."""
+        self.start()
+        conn = self._connect()
+        try:
+            try:
+                cursor = conn.execute('''
+                    INSERT INTO analysis_jobs (app_id, force_flag, rerun_flag, status, created_at)
+                    VALUES (?, ?, ?, 'queued', ?)
+                ''', (app_id, int(force_flag), int(rerun_flag), _now()))
+                conn.commit()
+                job_id = cursor.lastrowid
+                self._wakeup.set()
+            except sqlite3.IntegrityError:
+                # Another submission for this app is still active
+                conn.rollback()
+                job_id = conn.execute(
+                    "SELECT job_id FROM analysis_jobs WHERE app_id = ? AND status IN ('queued', 'running')", (app_id,)
+                ).fetchone()["job_id"]
+            return self._job(conn, job_id)
+        finally:
+            conn.close()
+
+    def get(self, job_id):
+        """Return the job as a dict (result included once it has finished), or None."""
+        conn = self._connect()
+        try:
+            return self._job(conn, job_id)
+        finally:
+            conn.close()
+
+    def _job(self, conn, job_id):
+        row = conn.execute('SELECT * FROM analysis_jobs WHERE job_id = ?', (job_id,)).fetchone()
+        if not row:
+            return None
+        job = dict(row)
+        job["force_flag"] = bool(job["force_flag"])
+        job["rerun_flag"] = bool(job["rerun_flag"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def _claim(self, conn):
+        """Atomically move the oldest queued job to running."""
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT * FROM analysis_jobs WHERE status = 'queued' ORDER BY job_id LIMIT 1").fetchone()
+        if row:
+            conn.execute("UPDATE analysis_jobs SET status = 'running', started_at = ? WHERE job_id = ?",
+                         (_now(), row["job_id"]))
+        conn.commit()
+        return row
+
+    def _work(self):
+        conn = self._connect()
+        try:
+            while not self._stopping.is_set():
+                job = self._claim(conn)
+                if job is None:
+                    # Also poll, for jobs submitted by other processes
+                    self._wakeup.wait(POLL_SECONDS)
+                    self._wakeup.clear()
+                    continue
+                self._run(conn, job)
+        finally:
+            conn.close()
+
+    def _run(self, conn, job):
+        try:
+            result = self.analyze(job["app_id"], bool(job["force_flag"]), bool(job["rerun_flag"]), self.db_path)
+            if result is None:
+                result = {"message": "Analysis complete", "analysis": stored_analysis(conn.cursor(), job["app_id"])}
+            conn.execute("UPDATE analysis_jobs SET status = 'done', result = ?, finished_at = ? WHERE job_id = ?",
+                         (json.dumps(result), _now(), job["job_id"]))
+        except Exception as e:
+            conn.execute("UPDATE analysis_jobs SET status = 'failed', error = ?, finished_at = ? WHERE job_id = ?",
+                         (str(e), _now(), job["job_id"]))
+        conn.commit()
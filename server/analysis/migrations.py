@@ -0,0 +1,398 @@
+import datetime
+import hashlib
+import threading
+from analysis.database import connect
+
+# ============================
+# Schema migrations
+# ============================
+# The server database schema is created and changed only here, as numbered steps applied
+# in order and recorded in schema_migrations. A step runs once per database, inside one
+# transaction: concurrent processes (server, batch workers) wait for whichever applies it.
+# A schema change is a new step appended to MIGRATIONS; applied steps are never edited.
+#
+#   python -m analysis.migrations [--db PATH]
+
+# /otherFeedback's original filter, indexed by migration 3 and superseded by review_state
+# (migration 5)
+OTHER_FEEDBACK_FILTER = ("(type = 'Other - other Update' AND status NOT IN ('Approved', 'Rejected')) "
+                         "OR (LOWER(status) LIKE '%pending review%')")
+
+REVIEW_STATES = ("pending", "approved", "rejected")
+
+
+def review_state_sql(row=""):
+    """
+    feedback.review_state computed from a row's free-text status and type: 'approved' or
+    'rejected' once an admin has decided ("Approved. Changes done.", "Rejected. <reason>"),
+    'pending' while it awaits review, NULL for feedback that never needs one.
+    """
+    status, type_ = f"{row}status", f"{row}type"
+    return f'''CASE
+            WHEN LOWER(TRIM({status})) LIKE 'approved%' THEN 'approved'
+            WHEN LOWER(TRIM({status})) LIKE 'rejected%' THEN 'rejected'
+            WHEN {type_} = 'Other - other Update' OR LOWER({status}) LIKE '%pending review%' THEN 'pending'
+        END'''
+
+
+def _run(conn, statements):
+    # Not executescript(), which would commit the migration's transaction first
+    for statement in statements:
+        conn.execute(statement)
+
+
+def _core_tables(conn):
+    """Tables shared with the scrapers; existing databases already have them."""
+    _run(conn, [
+        '''CREATE TABLE IF NOT EXISTS policies (
+            app_id TEXT PRIMARY KEY, app_name TEXT, policy_url TEXT, policy_text TEXT, permissions TEXT,
+            rating TEXT, privacy_concern TEXT, worst_permissions TEXT, category TEXT, user_feedback TEXT,
+            date_updated TEXT
+        )''',
+        "CREATE TABLE IF NOT EXISTS app_icons (app_id TEXT PRIMARY KEY, icon_url TEXT)",
+        '''CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, email TEXT UNIQUE, password TEXT, is_admin INTEGER DEFAULT 0
+        )''',
+        '''CREATE TABLE IF NOT EXISTS feedback (
+            feedback_id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, app_id TEXT, reason TEXT,
+            status TEXT, date TEXT, type TEXT
+        )''',
+        '''CREATE TABLE IF NOT EXISTS manual_review (
+            app_id TEXT PRIMARY KEY, app_name TEXT, policy_url TEXT, permissions TEXT, category TEXT,
+            reason TEXT, status TEXT, date_added TEXT
+        )''',
+    ])
+
+
+def _add_missing_columns(conn, table, columns):
+    """Add any of columns ({name: type}) missing from a table created by an older version."""
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    for name, column_type in columns.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+
+
+# analysis_timings has one column per StageTimer stage, as of this migration
+_TIMED_STAGES = ("db_read", "load_terms", "cache_lookup", "pipeline", "inference", "classification",
+                 "permissions", "db_write")
+
+
+def _analysis_tables(conn):
+    # Databases analysed before the migrations existed have these tables, possibly without
+    # the columns added later
+    _run(conn, [
+        '''CREATE TABLE IF NOT EXISTS analysis_log (
+            app_id TEXT PRIMARY KEY, privacy_concern TEXT, sensitive_sentences TEXT, generic_sentences TEXT,
+            worst_permissions TEXT, rating TEXT, privacy_sentiment REAL, permission_sentiment REAL,
+            avg_sentiment REAL, analyse_time TEXT, policy_digest TEXT, permissions_digest TEXT,
+            terms_version TEXT, sentence_count INTEGER, sentiment_backend TEXT
+        )''',
+        '''CREATE TABLE IF NOT EXISTS analysis_sentences (
+            app_id TEXT NOT NULL, sentence_offset INTEGER NOT NULL, sentence_text TEXT, score REAL,
+            category TEXT, matched_terms TEXT, adjusted_score REAL,
+            PRIMARY KEY (app_id, sentence_offset)
+        )''',
+        '''CREATE TABLE IF NOT EXISTS analysis_sentence_terms (
+            term TEXT NOT NULL, app_id TEXT NOT NULL, sentence_offset INTEGER NOT NULL, category TEXT,
+            PRIMARY KEY (term, app_id, sentence_offset)
+        )''',
+        f'''CREATE TABLE IF NOT EXISTS analysis_timings (
+            app_id TEXT NOT NULL, analyse_time TEXT NOT NULL, total_ms REAL,
+            {", ".join(f"{stage}_ms REAL" for stage in _TIMED_STAGES)},
+            sentence_count INTEGER, sentences_scored INTEGER, chunk_count INTEGER, sentences_reused INTEGER,
+            PRIMARY KEY (app_id, analyse_time)
+        )''',
+    ])
+    _add_missing_columns(conn, "analysis_log", {"policy_digest": "TEXT", "permissions_digest": "TEXT",
+                                                "terms_version": "TEXT", "sentence_count": "INTEGER",
+                                                "sentiment_backend": "TEXT"})
+    _add_missing_columns(conn, "analysis_sentences", {"category": "TEXT", "matched_terms": "TEXT",
+                                                      "adjusted_score": "REAL"})
+    _add_missing_columns(conn, "analysis_timings", {**{f"{stage}_ms": "REAL" for stage in _TIMED_STAGES},
+                                                    "sentences_reused": "INTEGER"})
+    _run(conn, [
+        # Worst sentences of an app per category
+        "CREATE INDEX IF NOT EXISTS idx_analysis_sentences_worst ON analysis_sentences (app_id, category, adjusted_score)",
+        "CREATE INDEX IF NOT EXISTS idx_analysis_sentence_terms_app ON analysis_sentence_terms (app_id)",
+        # Apps sharing a policy text share its analysis
+        "CREATE INDEX IF NOT EXISTS idx_analysis_log_policy_digest ON analysis_log (policy_digest, terms_version)",
+    ])
+
+
+def _hot_query_indexes(conn):
+    _run(conn, [
+        # login, forgot/change password (users WHERE email = ?) use the UNIQUE autoindex on email
+        # /userFeedback: feedback WHERE user_id = ?
+        "CREATE INDEX IF NOT EXISTS idx_feedback_user ON feedback (user_id)",
+        # /appInManualPending: answered from the index alone
+        "CREATE INDEX IF NOT EXISTS idx_manual_review_app_status ON manual_review (app_id, status)",
+        # /otherFeedback: the few matching rows, covered, instead of a scan of all feedback
+        f'''CREATE INDEX IF NOT EXISTS idx_feedback_other_queue
+        ON feedback (feedback_id, user_id, app_id, reason, status, date, type)
+        WHERE {OTHER_FEEDBACK_FILTER}''',
+    ])
+
+
+def _feedback_by_app(conn):
+    # /getFeedback: an app's feedback through feedback.app_id, newest first (the index
+    # also holds the rowid, feedback_id), replacing the id list in policies.user_feedback
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_feedback_app ON feedback (app_id)")
+
+
+def _review_queue(conn):
+    # The admin review queue by a normalised state instead of substring matches on status.
+    # Triggers keep it current whichever client writes status; the backfill covers old rows.
+    _run(conn, [
+        "ALTER TABLE feedback ADD COLUMN review_state TEXT",
+        f"UPDATE feedback SET review_state = {review_state_sql()}",
+        f'''CREATE TRIGGER IF NOT EXISTS feedback_review_state_on_insert AFTER INSERT ON feedback
+        BEGIN
+            UPDATE feedback SET review_state = {review_state_sql("NEW.")} WHERE feedback_id = NEW.feedback_id;
+        END''',
+        f'''CREATE TRIGGER IF NOT EXISTS feedback_review_state_on_update AFTER UPDATE OF status, type ON feedback
+        BEGIN
+            UPDATE feedback SET review_state = {review_state_sql("NEW.")} WHERE feedback_id = NEW.feedback_id;
+        END''',
+        # /otherFeedback: one state's page, newest first
+        "CREATE INDEX IF NOT EXISTS idx_feedback_review_state ON feedback (review_state, feedback_id)",
+        "DROP INDEX IF EXISTS idx_feedback_other_queue",
+    ])
+
+
+# At most this many concerning sentences of an app are indexed
+_FLAGGED_SENTENCES = 10
+
+
+def _flagged_sentences_sql(app_id):
+    """
+    The worst concerning (sensitive or other) sentences of an app's analysis as one text, in
+    policy order, from analysis_sentences. The analysis stores its sentences before its
+    analysis_log row, whose triggers use this. Plain SQL, because the triggers also run in
+    the scrapers' connections.
+    """
+    return f'''(
+            SELECT group_concat(sentence_text, ' ... ') FROM analysis_sentences
+            WHERE app_id = {app_id} AND sentence_offset IN (
+                SELECT sentence_offset FROM analysis_sentences
+                WHERE app_id = {app_id} AND category IN ('sensitive', 'other')
+                ORDER BY adjusted_score, sentence_offset LIMIT {_FLAGGED_SENTENCES}
+            )
+        )'''
+
+
+def _app_search(conn):
+    # Full-text search over the catalogue: one app_search document per app, kept in step with
+    # policies and analysis_log by triggers. app_search_ids gives each app a stable document id,
+    # which the scrapers' INSERT OR REPLACE into policies (a new policies rowid) does not change.
+    search_row = "(SELECT id FROM app_search_ids WHERE app_id = {})"
+    # Not INSERT OR IGNORE: in a trigger, the OR REPLACE of the scrapers' statement would override it
+    add_id = '''INSERT INTO app_search_ids (app_id) SELECT NEW.app_id
+            WHERE NOT EXISTS (SELECT 1 FROM app_search_ids WHERE app_id = NEW.app_id);'''
+    insert_document = '''INSERT INTO app_search (rowid, app_id, app_name, category, policy_text, flagged_sentences)
+            SELECT id, NEW.app_id, NEW.app_name, NEW.category, NEW.policy_text, {flagged}
+            FROM app_search_ids WHERE app_id = NEW.app_id;'''.format(flagged=_flagged_sentences_sql("NEW.app_id"))
+    _run(conn, [
+        "CREATE TABLE IF NOT EXISTS app_search_ids (id INTEGER PRIMARY KEY, app_id TEXT NOT NULL UNIQUE)",
+        '''CREATE VIRTUAL TABLE IF NOT EXISTS app_search USING fts5(
+            app_id, app_name, category, policy_text, flagged_sentences,
+            tokenize = 'porter unicode61', prefix = '2 3'
+        )''',
+        f'''CREATE TRIGGER IF NOT EXISTS policies_search_on_insert AFTER INSERT ON policies
+        BEGIN
+            {add_id}
+            DELETE FROM app_search WHERE rowid = {search_row.format("NEW.app_id")};
+            {insert_document}
+        END''',
+        f'''CREATE TRIGGER IF NOT EXISTS policies_search_on_update
+        AFTER UPDATE OF app_id, app_name, category, policy_text ON policies
+        BEGIN
+            DELETE FROM app_search WHERE rowid = {search_row.format("OLD.app_id")};
+            UPDATE app_search_ids SET app_id = NEW.app_id WHERE app_id = OLD.app_id;
+            {add_id}
+            {insert_document}
+        END''',
+        f'''CREATE TRIGGER IF NOT EXISTS policies_search_on_delete AFTER DELETE ON policies
+        BEGIN
+            DELETE FROM app_search WHERE rowid = {search_row.format("OLD.app_id")};
+            DELETE FROM app_search_ids WHERE app_id = OLD.app_id;
+        END''',
+        f'''CREATE TRIGGER IF NOT EXISTS analysis_log_search_on_insert AFTER INSERT ON analysis_log
+        BEGIN
+            UPDATE app_search SET flagged_sentences = {_flagged_sentences_sql("NEW.app_id")}
+            WHERE rowid = {search_row.format("NEW.app_id")};
+        END''',
+        f'''CREATE TRIGGER IF NOT EXISTS analysis_log_search_on_update AFTER UPDATE OF privacy_concern ON analysis_log
+        BEGIN
+            UPDATE app_search SET flagged_sentences = {_flagged_sentences_sql("NEW.app_id")}
+            WHERE rowid = {search_row.format("NEW.app_id")};
+        END''',
+        f'''CREATE TRIGGER IF NOT EXISTS analysis_log_search_on_delete AFTER DELETE ON analysis_log
+        BEGIN
+            UPDATE app_search SET flagged_sentences = NULL WHERE rowid = {search_row.format("OLD.app_id")};
+        END''',
+        # The existing catalogue
+        "INSERT OR IGNORE INTO app_search_ids (app_id) SELECT app_id FROM policies",
+        f'''INSERT INTO app_search (rowid, app_id, app_name, category, policy_text, flagged_sentences)
+        SELECT s.id, p.app_id, p.app_name, p.category, p.policy_text, {_flagged_sentences_sql("p.app_id")}
+        FROM policies p JOIN app_search_ids s ON s.app_id = p.app_id''',
+    ])
+
+
+def _analysis_jobs(conn):
+    _run(conn, [
+        '''CREATE TABLE IF NOT EXISTS analysis_jobs (
+            job_id INTEGER PRIMARY KEY AUTOINCREMENT, app_id TEXT NOT NULL,
+            force_flag INTEGER NOT NULL DEFAULT 0, rerun_flag INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL, result TEXT, error TEXT,
+            created_at TEXT, started_at TEXT, finished_at TEXT
+        )''',
+        # At most one active job per app; concurrent submissions share it
+        '''CREATE UNIQUE INDEX IF NOT EXISTS idx_analysis_jobs_active_app
+        ON analysis_jobs (app_id) WHERE status IN ('queued', 'running')''',
+        "CREATE INDEX IF NOT EXISTS idx_analysis_jobs_status ON analysis_jobs (status, job_id)",
+    ])
+
+
+def _sentence_sentiment(conn):
+    _run(conn, [
+        "CREATE TABLE IF NOT EXISTS sentence_sentiment (sentence_key TEXT PRIMARY KEY, score REAL, last_used REAL)",
+        "CREATE INDEX IF NOT EXISTS idx_sentence_sentiment_last_used ON sentence_sentiment (last_used)",
+    ])
+
+
+def _text_digest(text):
+    # analysis_log.policy_digest / permissions_digest, as NLPAnalysis_single.content_digest
+    # computed them at migration 9
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def _change_tracking(conn):
+    # Apps whose policy text or permissions changed since their analysis, for the refresh
+    # scheduler, and how often each app is viewed. INSERT OR REPLACE (the scrapers' save)
+    # fires the insert trigger; a new change resets the attempts. The triggers see every
+    # later change; the apps changed before them (never analysed, or whose text no longer
+    # matches the digests of their analysis) are marked here, once.
+    now = "strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')"
+    conn.create_function("text_digest", 1, _text_digest, deterministic=True)
+    _run(conn, [
+        '''CREATE TABLE IF NOT EXISTS analysis_stale (
+            app_id TEXT PRIMARY KEY, changed_at TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0, last_error TEXT
+        )''',
+        "CREATE TABLE IF NOT EXISTS app_demand (app_id TEXT PRIMARY KEY, views INTEGER NOT NULL DEFAULT 0, last_viewed TEXT)",
+        f'''CREATE TRIGGER IF NOT EXISTS policies_stale_on_insert AFTER INSERT ON policies
+        WHEN NEW.policy_text IS NOT NULL
+        BEGIN
+            INSERT OR REPLACE INTO analysis_stale (app_id, changed_at) VALUES (NEW.app_id, {now});
+        END''',
+        f'''CREATE TRIGGER IF NOT EXISTS policies_stale_on_update AFTER UPDATE OF policy_text, permissions ON policies
+        WHEN OLD.policy_text IS NOT NEW.policy_text OR OLD.permissions IS NOT NEW.permissions
+        BEGIN
+            INSERT OR REPLACE INTO analysis_stale (app_id, changed_at) VALUES (NEW.app_id, {now});
+        END''',
+        f'''INSERT OR IGNORE INTO analysis_stale (app_id, changed_at)
+        SELECT p.app_id, {now} FROM policies p LEFT JOIN analysis_log a ON a.app_id = p.app_id
+        WHERE p.policy_text IS NOT NULL AND (
+            a.app_id IS NULL
+            OR (a.policy_digest IS NOT NULL AND (a.policy_digest IS NOT text_digest(p.policy_text)
+                                                 OR a.permissions_digest IS NOT text_digest(p.permissions)))
+        )''',
+    ])
+
+
+def _catalogue_version(conn):
+    # A counter bumped on every write to a table the cached /apps and /app/<id> responses are
+    # built from, whichever process makes it (see catalogueCache)
+    _run(conn, [
+        "CREATE TABLE IF NOT EXISTS catalogue_version (id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)",
+        "INSERT OR IGNORE INTO catalogue_version (id, version) VALUES (1, 0)",
+    ])
+    for table in ("policies", "app_icons", "analysis_log"):
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(f'''CREATE TRIGGER IF NOT EXISTS {table}_catalogue_{event.lower()} AFTER {event} ON {table}
+            BEGIN
+                UPDATE catalogue_version SET version = version + 1 WHERE id = 1;
+            END''')
+
+
+MIGRATIONS = [
+    (1, "core tables", _core_tables),
+    (2, "analysis tables", _analysis_tables),
+    (3, "hot query indexes", _hot_query_indexes),
+    (4, "feedback by app", _feedback_by_app),
+    (5, "review queue state", _review_queue),
+    (6, "app search", _app_search),
+    (7, "analysis jobs", _analysis_jobs),
+    (8, "sentence sentiment cache", _sentence_sentiment),
+    (9, "change tracking", _change_tracking),
+    (10, "catalogue version", _catalogue_version),
+]
+
+
+def applied_migrations(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    ''')
+    return {row[0] for row in conn.execute("SELECT version FROM schema_migrations")}
+
+
+def migrate(conn, migrations=MIGRATIONS):
+    """Apply the pending migrations in order. Returns the versions applied."""
+    conn.commit()
+    applied = []
+    for version, name, step in migrations:
+        if version in applied_migrations(conn):
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have applied it while this one waited for the lock
+            if conn.execute("SELECT 1 FROM schema_migrations WHERE version = ?", (version,)).fetchone():
+                conn.rollback()
+                continue
+            step(conn)
+            conn.execute("INSERT INTO schema_migrations (version, name, applied_at) VALUES (?, ?, ?)",
+                         (version, name, datetime.datetime.now().isoformat()))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        print(f"Applied migration {version}: {name}")
+        applied.append(version)
+    return applied
+
+
+# Databases migrated by this process, so callers can ensure the schema on every connection cheaply
+_migrated = set()
+_migrated_lock = threading.Lock()
+
+def ensure_schema(conn):
+    """Migrate the database of conn, once per process."""
+    path = conn.execute("PRAGMA database_list").fetchone()[2]
+    if not path:
+        migrate(conn)  # an in-memory database: every one is new
+        return
+    if path in _migrated:
+        return
+    with _migrated_lock:
+        if path not in _migrated:
+            migrate(conn)
+            _migrated.add(path)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Apply the pending schema migrations.")
+    parser.add_argument("--db", help="database path (default: $PRIVACY_DB_PATH or scrapers/privacy_policies.db)")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    try:
+        applied = migrate(conn)
+    finally:
+        conn.close()
+    print(f"{len(applied)} migrations applied." if applied else "Schema up to date.")
@@ -1,23 +1,145 @@
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
 import sqlite3
-import subprocess
 import time
+from analysis.NLPAnalysis_single import NLPAnalysis_single, content_digest
+from analysis.database import connect
+from analysis.migrations import ensure_schema
+from analysis.pipelineRegistry import warm_up
 
-# Set the database path
-db_path = "../../server/database/privacy_policies.db"
+# ============================
+# Batch analysis of every app in the database
+# ============================
+# Run from the server directory:
+#   python -m analysis.passAllApps --workers 4 --force --since 2025-03-01T00:00:00
+# Each worker process loads the Stanza pipeline once and analyses many apps with it.
+# Apps analysed at or after --since are skipped, so an interrupted run can be resumed
+# by passing the time it was started.
+# Apps that share a policy text (same publisher) are grouped: the first app of each group
+# is analysed first, then the rest reuse its policy analysis and only score their own
+# permissions, so the NLP runs once per distinct policy text.
 
-# Connect to the database and retrieve all app_ids from the "policies" table.
-conn = sqlite3.connect(db_path)
-cursor = conn.cursor()
-cursor.execute("SELECT app_id FROM policies")
-app_ids = [str(row[0]) for row in cursor.fetchall()]
-conn.close()
+def select_app_ids(db_path=None, since=None):
+    """App ids to analyse, leaving out apps already analysed at or after `since` (ISO time)."""
+    conn = connect(db_path)
+    try:
+        if since:
+            rows = conn.execute('''
+                SELECT p.app_id FROM policies p
+                LEFT JOIN analysis_log a ON a.app_id = p.app_id
+                WHERE a.analyse_time IS NULL OR a.analyse_time < ?
+            ''', (since,)).fetchall()
+        else:
+            rows = conn.execute("SELECT app_id FROM policies").fetchall()
+    except sqlite3.OperationalError:
+        # analysis_log does not exist yet, so nothing has been analysed
+        rows = conn.execute("SELECT app_id FROM policies").fetchall()
+    finally:
+        conn.close()
+    return [str(row[0]) for row in rows]
 
-print(f"Found {len(app_ids)} apps to process.")
 
-# Loop through each app id and call the single app analysis script.
-for app_id in app_ids:
-    print(f"\nProcessing app_id: {app_id}")
-    # Call the single script. Adjust the path to NLPAnalysis_single.py if needed.
-    subprocess.run(["python", "NLPAnalysis_single.py", app_id])
-    time.sleep(2)  # Add a 1-second delay between subprocess calls
+def group_by_policy(db_path, app_ids):
+    """
+    Group app_ids by the digest of their policy text, keeping the order of first appearance.
+    The digest stored with an app's analysis is used unless the app changed after it; only the
+    policy texts of the other apps are read and hashed. (A wrong group costs only the reuse:
+    NLPAnalysis_single checks the digest before reusing another app's analysis.)
+    """
+    conn = connect(db_path)
+    try:
+        ensure_schema(conn)
+        conn.create_function("content_digest", 1, content_digest, deterministic=True)
+        rows = conn.execute('''
+            SELECT json_group_array(app_id) FROM (
+                SELECT ids.key AS position, p.app_id,
+                       CASE WHEN a.policy_digest IS NOT NULL AND (s.changed_at IS NULL OR s.changed_at < a.analyse_time)
+                            THEN a.policy_digest
+                            ELSE content_digest(p.policy_text) END AS digest
+                FROM json_each(?) ids
+                JOIN policies p ON p.app_id = ids.value
+                LEFT JOIN analysis_log a ON a.app_id = p.app_id
+                LEFT JOIN analysis_stale s ON s.app_id = p.app_id
+                ORDER BY ids.key
+            )
+            GROUP BY digest
+            ORDER BY MIN(position)
+        ''', (json.dumps(app_ids),)).fetchall()
+    finally:
+        conn.close()
+    return [[str(app_id) for app_id in json.loads(row[0])] for row in rows]
 
+
+def _init_worker():
+    # Load the pipeline once per worker, before it picks up its first app
+    warm_up()
+
+
+def _analyze_one(task):
+    """Analyse one app; any failure is reported instead of stopping the batch."""
+    app_id, force_flag, rerun_flag, db_path, shared_since = task
+    start_time = time.time()
+    try:
+        result = NLPAnalysis_single(app_id, force_flag, rerun_flag, db_path, shared_since=shared_since)
+        status = "skipped" if isinstance(result, dict) and "message" in result else "analysed"
+        return app_id, status, time.time() - start_time, None
+    except Exception as e:
+        return app_id, "failed", time.time() - start_time, f"{type(e).__name__}: {e}"
+
+
+def run_batch(workers=None, force_flag=False, rerun_flag=False, since=None, db_path=None):
+    """Analyse every selected app across a pool of worker processes and return a summary."""
+    app_ids = select_app_ids(db_path, since)
+    groups = group_by_policy(db_path, app_ids)
+    workers = workers or os.cpu_count() or 1
+    print(f"Found {len(app_ids)} apps ({len(groups)} distinct policies) to process with {workers} workers.")
+
+    start_time = time.time()
+    batch_start = datetime.datetime.now().isoformat()
+    counts = {"analysed": 0, "skipped": 0, "failed": 0}
+    failures = {}
+    # The first app of each policy group runs the NLP; the others then reuse what it stored
+    # during this batch (even with --rerun)
+    first = [(group[0], force_flag, rerun_flag, db_path, None) for group in groups]
+    rest = [(app_id, force_flag, rerun_flag, db_path, batch_start) for group in groups for app_id in group[1:]]
+    total = len(first) + len(rest)
+
+    done = 0
+    with multiprocessing.Pool(processes=workers, initializer=_init_worker) as pool:
+        for tasks in (first, rest):
+            for app_id, status, seconds, error in pool.imap_unordered(_analyze_one, tasks):
+                done += 1
+                counts[status] += 1
+                if error:
+                    failures[app_id] = error
+                    print(f"[{done}/{total}] {app_id} failed after {seconds:.1f}s: {error}")
+                else:
+                    print(f"[{done}/{total}] {app_id} {status} in {seconds:.1f}s")
+
+    elapsed = time.time() - start_time
+    summary = {
+        **counts,
+        "total": total,
+        "distinct_policies": len(groups),
+        "failures": failures,
+        "seconds": round(elapsed, 1),
+        "apps_per_minute": round(total / elapsed * 60, 1) if elapsed else 0.0,
+    }
+    print(f"\nDone: {counts['analysed']} analysed, {counts['skipped']} skipped, {counts['failed']} failed "
+          f"in {summary['seconds']}s ({summary['apps_per_minute']} apps/min).")
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Analyse every app in the policies table.")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="re-analyse apps whose policy, permissions or terms changed")
+    parser.add_argument("--rerun", action="store_true", help="re-analyse every app even if nothing changed")
+    parser.add_argument("--since", default=None, help="skip apps analysed at or after this ISO time (resume a run)")
+    parser.add_argument("--db", help="database path (default: $PRIVACY_DB_PATH or scrapers/privacy_policies.db)")
+    args = parser.parse_args()
+
+    run_batch(args.workers, args.force, args.rerun, args.since, args.db)
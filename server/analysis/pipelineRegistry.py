@@ -0,0 +1,75 @@
+import gc
+import threading
+
+# ============================
+# Process-wide Stanza pipeline registry
+# ============================
+# Loading a Stanza pipeline takes several seconds and a few hundred MB, so every
+# caller in this process (Flask request threads, batch jobs) shares one loaded
+# pipeline per (processors, batch_size) combination instead of building its own.
+
+DEFAULT_PROCESSORS = 'tokenize,sentiment'
+DEFAULT_BATCH_SIZE = 32
+
+_registry_lock = threading.Lock()
+_pipelines = {}        # key -> stanza.Pipeline
+_pipeline_locks = {}   # key -> threading.Lock guarding inference on that pipeline
+
+
+def _registry_key(processors, batch_size):
+    """Normalize processor lists so 'tokenize, sentiment' and 'sentiment,tokenize' share an entry."""
+    names = sorted(p.strip() for p in processors.split(',') if p.strip())
+    return ','.join(names), int(batch_size)
+
+
+def _build_pipeline(processors, batch_size):
+    # Stanza (and torch) are imported here so importing the server does not load them.
+    import stanza
+    return stanza.Pipeline(lang='en', processors=processors, batch_size=batch_size,
+                           verbose=False, logging_level='ERROR')
+
+
+def get_pipeline(processors=DEFAULT_PROCESSORS, batch_size=DEFAULT_BATCH_SIZE):
+    """Return the shared pipeline for this configuration, loading it on first use."""
+    key = _registry_key(processors, batch_size)
+    nlp = _pipelines.get(key)
+    if nlp is not None:
+        return nlp
+
+    with _registry_lock:
+        # Another thread may have finished loading while we waited for the lock.
+        nlp = _pipelines.get(key)
+        if nlp is None:
+            print(f"Loading Stanza pipeline ({key[0]}, batch_size={key[1]})...")
+            nlp = _build_pipeline(key[0], key[1])
+            _pipelines[key] = nlp
+            print("Stanza pipeline loaded.")
+    return nlp
+
+
+def get_pipeline_lock(processors=DEFAULT_PROCESSORS, batch_size=DEFAULT_BATCH_SIZE):
+    """Return the lock callers must hold while running the shared pipeline."""
+    key = _registry_key(processors, batch_size)
+    with _registry_lock:
+        return _pipeline_locks.setdefault(key, threading.Lock())
+
+
+def warm_up(processors=DEFAULT_PROCESSORS, batch_size=DEFAULT_BATCH_SIZE):
+    """Load the pipeline and run one tiny document through it so the first real request is fast."""
+    nlp = get_pipeline(processors, batch_size)
+    with get_pipeline_lock(processors, batch_size):
+        nlp("Warm up the pipeline.")
+    return nlp
+
+
+def shutdown():
+    """Drop every loaded pipeline and release its memory."""
+    with _registry_lock:
+        _pipelines.clear()
+        _pipeline_locks.clear()
+    gc.collect()
+
+
+def loaded_pipelines():
+    """List the configurations currently held in memory."""
+    return list(_pipelines.keys())
@@ -0,0 +1,100 @@
+import re
+
+# ============================
+# Sentence-aware chunking of policy text
+# ============================
+# Policies are split into sentences before inference so Stanza never sees half a
+# sentence, and sentences are then packed into chunks of a bounded size. Each
+# chunk remembers where its sentences sit so scores can be mapped back to them.
+
+DEFAULT_CHUNK_TOKENS = 400
+
+# A sentence ends after ., ! or ? (optionally followed by closing quotes/brackets)
+# and whitespace, or at a line break.
+_SENTENCE_BOUNDARY = re.compile(r'(?:(?<=[.!?])|(?<=[.!?]["\')\]]))\s+|\s*\n\s*')
+_WORD = re.compile(r'\S+')
+
+
+def split_sentence_spans(text):
+    """Return (start, end) spans of the sentences in text, without surrounding whitespace."""
+    spans = []
+    start = 0
+    for boundary in _SENTENCE_BOUNDARY.finditer(text):
+        end = boundary.start()
+        if text[start:end].strip():
+            spans.append((start, end))
+        start = boundary.end()
+    if text[start:].strip():
+        spans.append((start, len(text.rstrip())))
+    return spans
+
+
+def _split_long_span(text, start, end, max_tokens):
+    """Cut a sentence longer than the budget into pieces of at most max_tokens words."""
+    words = [m.span() for m in _WORD.finditer(text, start, end)]
+    pieces = []
+    for i in range(0, len(words), max_tokens):
+        group = words[i:i + max_tokens]
+        pieces.append((group[0][0], group[-1][1]))
+    return pieces
+
+
+def sentence_spans(text, max_tokens=DEFAULT_CHUNK_TOKENS):
+    """Sentence spans of text, with any sentence longer than max_tokens words cut on word boundaries."""
+    if not text:
+        return []
+    spans = []
+    for start, end in split_sentence_spans(text):
+        if len(text[start:end].split()) <= max_tokens:
+            spans.append((start, end))
+        else:
+            spans.extend(_split_long_span(text, start, end, max_tokens))
+    return spans
+
+
+def stream_sentences(pieces, max_tokens=DEFAULT_CHUNK_TOKENS):
+    """
+    Sentences of a text that arrives in pieces (e.g. read from a blob), as (offset, sentence_text).
+    Gives the same sentences as sentence_spans on the whole text, but only the unfinished
+    last sentence is held back between pieces, so memory does not grow with the text.
+    """
+    buffer, base = "", 0
+    for piece in pieces:
+        buffer += piece
+        spans = sentence_spans(buffer, max_tokens)
+        if not spans:
+            # Whitespace only so far
+            buffer, base = "", base + len(buffer)
+            continue
+        # The last sentence may continue in the next piece
+        for start, end in spans[:-1]:
+            yield base + start, buffer[start:end]
+        keep = spans[-1][0]
+        buffer, base = buffer[keep:], base + keep
+    for start, end in sentence_spans(buffer, max_tokens):
+        yield base + start, buffer[start:end]
+
+
+def chunk_sentences(sentences, max_tokens=DEFAULT_CHUNK_TOKENS):
+    """
+    Pack sentences (in order) into chunks of roughly max_tokens words, one sentence per line.
+    Returns a list of (chunk_text, members) where members holds (sentence_index, start, end)
+    giving each sentence's position inside chunk_text.
+    """
+    chunks = []
+    parts, members, chunk_len, chunk_tokens = [], [], 0, 0
+
+    for index, sentence in enumerate(sentences):
+        n_tokens = len(sentence.split())
+        if parts and chunk_tokens + n_tokens > max_tokens:
+            chunks.append(("\n".join(parts), members))
+            parts, members, chunk_len, chunk_tokens = [], [], 0, 0
+        start = chunk_len + (1 if parts else 0)
+        parts.append(sentence)
+        members.append((index, start, start + len(sentence)))
+        chunk_len = start + len(sentence)
+        chunk_tokens += n_tokens
+
+    if parts:
+        chunks.append(("\n".join(parts), members))
+    return chunks
@@ -0,0 +1,104 @@
+import sqlite3
+import time
+from analysis.NLPAnalysis_single import (
+    GENERIC_TERMS_FILE, SENSITIVE_TERMS_FILE, DEFAULT_WORST_K, StreamingSummary, load_terms, load_sentence_scores,
+    classify_sentences, save_sentences, compute_overall_rating, serialize_list, analysis_terms_version,
+)
+from analysis.database import connect
+from analysis.migrations import ensure_schema
+
+# ============================
+# Re-classification after a term-list change
+# ============================
+# Adding a generic or sensitive term changes which sentences are generic, sensitive
+# or concerning, but not their sentiment. Every analysis stores its raw sentence
+# scores, so stale analyses are rebuilt here from those scores without Stanza, one app
+# per transaction. The rebuilt lists keep the worst DEFAULT_WORST_K sentences, as the
+# streaming analysis does, however long the policy.
+
+def reclassify_app(cursor, app_id, generic_terms, sensitive_terms, current_terms_version):
+    """Recompute the sentence buckets and rating of one app from its stored sentence scores."""
+    scored_sentences = load_sentence_scores(cursor, app_id)
+    cursor.execute("SELECT permission_sentiment FROM analysis_log WHERE app_id = ?", (app_id,))
+    permission_avg_sentiment = cursor.fetchone()[0]
+
+    classified = classify_sentences(scored_sentences, sensitive_terms, generic_terms)
+    summary = StreamingSummary(DEFAULT_WORST_K)
+    for sentence in classified:
+        summary.add(sentence)
+    generic_sentences, sensitive_sentences, privacy_concern, policy_avg_sentiment = summary.summary()
+    overall_rating, avg_rating = compute_overall_rating(policy_avg_sentiment, permission_avg_sentiment)
+    worst_concerning_sentence = privacy_concern[0][0] if privacy_concern else "No concerning sentence found"
+
+    # Sentences first: the analysis_log triggers index the app's flagged sentences from them
+    save_sentences(cursor, app_id, classified)
+    cursor.execute('''
+        UPDATE analysis_log
+        SET privacy_concern = ?, sensitive_sentences = ?, generic_sentences = ?, rating = ?,
+            privacy_sentiment = ?, avg_sentiment = ?, terms_version = ?
+        WHERE app_id = ?
+    ''', (
+        serialize_list(privacy_concern),
+        serialize_list(sensitive_sentences),
+        serialize_list(generic_sentences),
+        overall_rating,
+        policy_avg_sentiment,
+        avg_rating,
+        current_terms_version,
+        app_id
+    ))
+    cursor.execute('UPDATE policies SET privacy_concern = ?, rating = ? WHERE app_id = ?',
+                   (worst_concerning_sentence, overall_rating, app_id))
+
+
+def reclassify_stale(db_path=None):
+    """
+    Re-classify every analysis made with an older version of the term files.
+    Analyses stored before sentence scores were kept cannot be re-classified and are
+    reported as needing a full re-analysis.
+    """
+    start_time = time.time()
+    generic_terms = load_terms(GENERIC_TERMS_FILE)
+    sensitive_terms = load_terms(SENSITIVE_TERMS_FILE)
+    current_terms_version = analysis_terms_version(generic_terms, sensitive_terms)
+
+    conn = connect(db_path)
+    cursor = conn.cursor()
+    ensure_schema(conn)
+
+    cursor.execute('''
+        SELECT app_id, sentence_count FROM analysis_log
+        WHERE terms_version IS NULL OR terms_version != ?
+    ''', (current_terms_version,))
+    stale = cursor.fetchall()
+
+    reclassified, needs_reanalysis = [], []
+    try:
+        for app_id, sentence_count in stale:
+            if sentence_count is None:
+                needs_reanalysis.append(app_id)
+                continue
+            # One app at a time, so other writers are not kept waiting for the whole catalogue
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                reclassify_app(cursor, app_id, generic_terms, sensitive_terms, current_terms_version)
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+            reclassified.append(app_id)
+    finally:
+        conn.close()
+
+    summary = {
+        "reclassified": len(reclassified),
+        "needs_reanalysis": needs_reanalysis,
+        "seconds": round(time.time() - start_time, 3),
+    }
+    print(f"Re-classified {summary['reclassified']} analyses in {summary['seconds']}s; "
+          f"{len(needs_reanalysis)} need a full re-analysis.")
+    return summary
+
+
+if __name__ == '__main__':
+    reclassify_stale()
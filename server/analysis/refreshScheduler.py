@@ -0,0 +1,159 @@
+import collections
+import datetime
+import os
+import threading
+import time
+from analysis.NLPAnalysis_single import NLPAnalysis_single
+from analysis.migrations import ensure_schema
+from analysis.database import connect
+
+# ============================
+# Change-driven background re-analysis
+# ============================
+# Triggers on the policies table (migration 9) mark an app stale whenever its policy text or permissions
+# change, whoever makes the change (the scrapers' savePolicy, /update, ...); the migration marks
+# the apps that changed before it, by the digests of their last analysis. A background
+# thread re-analyses stale apps one at a time, most requested first (detail views and
+# feedback volume), and sleeps between analyses so it stays within a CPU budget. The
+# catalogue therefore stays fresh without nightly full passes.
+
+DEFAULT_CPU_BUDGET = float(os.environ.get("ANALYSIS_CPU_BUDGET", 0.25))  # share of one core
+POLL_SECONDS = 30
+MAX_ATTEMPTS = 3
+VIEW_WEIGHT = 1
+FEEDBACK_WEIGHT = 5
+
+def _now():
+    return datetime.datetime.now().isoformat()
+
+
+class RefreshScheduler:
+    def __init__(self, db_path=None, cpu_budget=DEFAULT_CPU_BUDGET, poll_seconds=POLL_SECONDS,
+                 analyze=NLPAnalysis_single):
+        self.db_path = db_path
+        self.cpu_budget = cpu_budget
+        self.poll_seconds = poll_seconds
+        self.analyze = analyze
+        self.analysed = 0
+        self.failed = 0
+        self._views = collections.Counter()
+        self._views_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def _connect(self):
+        conn = connect(self.db_path)
+        ensure_schema(conn)
+        return conn
+
+    def record_view(self, app_id):
+        """Count a detail view; counts are written to app_demand by the scheduler thread."""
+        with self._views_lock:
+            self._views[app_id] += 1
+
+    def start(self):
+        """Bring the schema up to date and start the thread (once)."""
+        with self._start_lock:
+            if self._thread:
+                return
+            conn = self._connect()
+            try:
+                marked = conn.execute("SELECT COUNT(*) FROM analysis_stale WHERE attempts < ?", (MAX_ATTEMPTS,)).fetchone()[0]
+            finally:
+                conn.close()
+            print(f"Refresh scheduler: {marked} apps changed since their last analysis.")
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="refresh-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def flush_views(self, conn):
+        with self._views_lock:
+            views, self._views = self._views, collections.Counter()
+        if views:
+            now = _now()
+            conn.executemany('''
+                INSERT INTO app_demand (app_id, views, last_viewed) VALUES (?, ?, ?)
+                ON CONFLICT(app_id) DO UPDATE SET views = views + excluded.views, last_viewed = excluded.last_viewed
+            ''', [(app_id, count, now) for app_id, count in views.items()])
+            conn.commit()
+
+    def pending(self, conn, limit=None):
+        """Stale apps in the order they will be re-analysed: [(app_id, priority, changed_at)]."""
+        has_feedback = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'feedback'"
+        ).fetchone()
+        feedback_count = "(SELECT COUNT(*) FROM feedback f WHERE f.app_id = s.app_id)" if has_feedback else "0"
+        return conn.execute(f'''
+            SELECT s.app_id, COALESCE(d.views, 0) * ? + {feedback_count} * ? AS priority, s.changed_at
+            FROM analysis_stale s LEFT JOIN app_demand d ON d.app_id = s.app_id
+            WHERE s.attempts < ?
+            ORDER BY priority DESC, s.changed_at
+            LIMIT ?
+        ''', (VIEW_WEIGHT, FEEDBACK_WEIGHT, MAX_ATTEMPTS, -1 if limit is None else limit)).fetchall()
+
+    def run_once(self):
+        """Re-analyse the most requested stale app. Returns its app_id, or None if nothing is stale."""
+        conn = self._connect()
+        try:
+            self.flush_views(conn)
+            candidates = self.pending(conn, 1)
+            if not candidates:
+                return None
+            app_id, _, changed_at = candidates[0]
+
+            start = time.time()
+            try:
+                # force_flag: re-analyses only if the digests really changed
+                self.analyze(app_id, True, False, self.db_path)
+                # A change made while the analysis ran keeps the app stale
+                conn.execute("DELETE FROM analysis_stale WHERE app_id = ? AND changed_at = ?", (app_id, changed_at))
+                self.analysed += 1
+            except Exception as e:
+                conn.rollback()
+                conn.execute("UPDATE analysis_stale SET attempts = attempts + 1, last_error = ? WHERE app_id = ?",
+                             (f"{type(e).__name__}: {e}", app_id))
+                self.failed += 1
+            conn.commit()
+            busy = time.time() - start
+        finally:
+            conn.close()
+
+        # Stay within the CPU budget: a busy period of t is followed by t * (1 / budget - 1) of rest
+        if self.cpu_budget < 1:
+            self._stopping.wait(busy * (1 / self.cpu_budget - 1))
+        return app_id
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                app_id = self.run_once()
+            except Exception as e:
+                # e.g. the database is locked or could not record a failed app: back off until the next poll
+                print(f"Refresh scheduler error: {type(e).__name__}: {e}")
+                app_id = None
+            if app_id is None:
+                self._stopping.wait(self.poll_seconds)
+
+    def status(self):
+        conn = self._connect()
+        try:
+            pending = self.pending(conn)
+            failed = conn.execute("SELECT COUNT(*) FROM analysis_stale WHERE attempts >= ?", (MAX_ATTEMPTS,)).fetchone()[0]
+        finally:
+            conn.close()
+        return {
+            "running": bool(self._thread),
+            "cpu_budget": self.cpu_budget,
+            "pending": len(pending),
+            "next": [app_id for app_id, _, _ in pending[:10]],
+            "given_up": failed,
+            "analysed": self.analysed,
+            "failed": self.failed,
+        }
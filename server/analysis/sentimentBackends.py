@@ -0,0 +1,124 @@
+import os
+import re
+from types import SimpleNamespace
+from analysis.inferenceScheduler import get_scheduler, score_chunks_with
+from analysis.pipelineRegistry import get_pipeline
+from analysis.policyChunker import split_sentence_spans, DEFAULT_CHUNK_TOKENS
+
+# ============================
+# Sentiment backends
+# ============================
+# A backend turns a list of sentence texts into one score per sentence on Stanza's
+# scale (0 negative, 1 neutral, 2 positive). "stanza" is the accurate neural tier;
+# "lexicon" is a pure-Python word-list scorer that answers in milliseconds, used for
+# provisional ratings and as the offline stand-in for Stanza in tests and benchmarks.
+#
+# A backend has:
+#   name       stored with each analysis
+#   cacheable  whether its scores go into the shared sentiment cache
+#   prepare()  acquire whatever the backend needs before scoring (timed separately)
+#   score(sentences) -> [score, ...]
+#   score_counted(sentences) -> ([score, ...], chunks): also the number of pipeline chunks
+#              that scored them, as stored in analysis_timings.chunk_count
+
+DEFAULT_BACKEND = os.environ.get("SENTIMENT_BACKEND", "stanza")
+
+
+class StanzaBackend:
+    name = "stanza"
+    cacheable = True
+
+    def __init__(self, nlp=None, max_tokens=DEFAULT_CHUNK_TOKENS):
+        """With no nlp, sentences go through the shared pipeline via the inference scheduler."""
+        self.nlp = nlp
+        self.max_tokens = max_tokens
+
+    def prepare(self):
+        if self.nlp is None:
+            get_pipeline()
+
+    def score(self, sentences):
+        return self.score_counted(sentences)[0]
+
+    def score_counted(self, sentences):
+        if self.nlp is None:
+            return get_scheduler().score_counted(sentences)
+        scores, chunk_of = score_chunks_with(self.nlp, sentences, self.max_tokens)
+        return scores, len(set(chunk_of))
+
+
+# Privacy-policy flavoured word lists. Stems are matched as word prefixes.
+NEGATIVE_WORDS = [
+    "sell", "sold", "sale", "rent", "share", "sharing", "disclose", "third part", "advertis", "market",
+    "track", "monitor", "profil", "combine", "transfer", "retain", "indefinite", "breach", "unauthori",
+    "harvest", "broker",
+    "not responsible", "no responsibility", "at your own risk", "without notice",
+]
+POSITIVE_WORDS = [
+    "protect", "secur", "encrypt", "safeguard", "anonymi", "pseudonymi", "aggregate", "delete", "erase",
+    "opt out", "opt-out", "consent", "control", "choice", "choose", "right to", "access your", "minimi",
+    "only use", "only process", "never sell", "do not sell", "will not sell", "confidential",
+]
+NEGATIONS = r"not|never|no|don't|doesn't|won't|cannot|can't"
+
+
+class LexiconBackend:
+    name = "lexicon"
+    cacheable = False  # cheaper to recompute than to look up
+
+    def __init__(self, negative_words=NEGATIVE_WORDS, positive_words=POSITIVE_WORDS):
+        def pattern(words):
+            alternatives = "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+            # An optional preceding negation (within two words) flips the polarity
+            return re.compile(rf"\b(?:((?:{NEGATIONS})\s+(?:\w+\s+)?))?(?:{alternatives})", re.IGNORECASE)
+        self._negative = pattern(negative_words)
+        self._positive = pattern(positive_words)
+
+    def prepare(self):
+        pass
+
+    def sentence_score(self, sentence):
+        """Net polarity of one sentence mapped to 0 / 1 / 2."""
+        polarity = 0
+        taken = []
+        # Positive phrases first, so "do not sell" is not also counted as "sell"
+        for regex, sign in ((self._positive, 1), (self._negative, -1)):
+            for match in regex.finditer(sentence):
+                if any(start < match.end() and match.start() < end for start, end in taken):
+                    continue
+                taken.append(match.span())
+                polarity += -sign if match.group(1) else sign
+        if polarity > 0:
+            return 2
+        if polarity < 0:
+            return 0
+        return 1
+
+    def score(self, sentences):
+        return [self.sentence_score(sentence) for sentence in sentences]
+
+    def score_counted(self, sentences):
+        return self.score(sentences), 0  # no pipeline
+
+    # stanza.Pipeline look-alike, so the lexicon can stand in for the model (e.g. registered
+    # in pipelineRegistry) where no model is available
+    def __call__(self, text):
+        sentences = []
+        for start, end in split_sentence_spans(text):
+            sentences.append(SimpleNamespace(text=text[start:end], sentiment=self.sentence_score(text[start:end]),
+                                             tokens=[SimpleNamespace(start_char=start, end_char=end)]))
+        return SimpleNamespace(sentences=sentences)
+
+    def bulk_process(self, texts):
+        return [self(text) for text in texts]
+
+
+BACKENDS = {"stanza": StanzaBackend, "lexicon": LexiconBackend}
+
+
+def get_backend(name=None):
+    """A backend instance by name (default: $SENTIMENT_BACKEND, else stanza)."""
+    name = name or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown sentiment backend '{name}' (expected one of {', '.join(BACKENDS)})")
+    return BACKENDS[name]()
@@ -0,0 +1,106 @@
+import time
+
+# ============================
+# Cross-app sentence sentiment cache
+# ============================
+# Policies share a lot of boilerplate, so sentiment scores are cached in SQLite by
+# a hash of the normalised sentence and reused for every app that contains the
+# same sentence. The table (sentence_sentiment, migration 8) is bounded; least recently used
+# entries are evicted. Nothing is written to it until flush(), which runs in the caller's
+# transaction: new scores wait in a temporary table of the connection, and the last_used
+# times of hits in memory.
+
+DEFAULT_MAX_ENTRIES = 500000
+
+# SQLite limits the number of bound parameters per statement
+_BATCH = 500
+
+
+class SentimentCache:
+    def __init__(self, conn, max_entries=DEFAULT_MAX_ENTRIES):
+        self.conn = conn
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._touched = {}  # {key: last_used} of hits not written yet
+        # Entries in the table, counted once and then kept up to date by flush. Keys replaced
+        # rather than added are counted too, so this only overestimates; _evict recounts.
+        self._size = None
+        # Scores not written yet. Pooled connections are reused, so leftovers of an earlier
+        # cache on this connection are dropped (DDL, which opens no transaction).
+        conn.execute("DROP TABLE IF EXISTS temp.pending_sentiment")
+        conn.execute("CREATE TEMP TABLE pending_sentiment (sentence_key TEXT PRIMARY KEY, score REAL)")
+
+    def _select(self, table, keys):
+        found = {}
+        for i in range(0, len(keys), _BATCH):
+            batch = keys[i:i + _BATCH]
+            placeholders = ','.join(['?'] * len(batch))
+            found.update(self.conn.execute(
+                f'SELECT sentence_key, score FROM {table} WHERE sentence_key IN ({placeholders})', batch
+            ).fetchall())
+        return found
+
+    def get_many(self, keys):
+        """Return {key: score} for the keys that are cached, and mark them as recently used (see flush)."""
+        keys = list(dict.fromkeys(keys))
+        found = self._select('sentence_sentiment', keys)
+        now = time.time()
+        for key in found:
+            self._touched[key] = now
+        found.update(self._select('temp.pending_sentiment', [key for key in keys if key not in found]))
+
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, scores):
+        """Add {key: score} to the cache; written by the next flush."""
+        self.conn.executemany('INSERT OR REPLACE INTO temp.pending_sentiment (sentence_key, score) VALUES (?, ?)',
+                              list(scores.items()))
+
+    def flush(self):
+        """
+        Write the new scores and the last_used times of the hits so far, and evict the least
+        recently used entries beyond max_entries. Does not commit.
+        """
+        if self._touched:
+            self.conn.executemany('UPDATE sentence_sentiment SET last_used = ? WHERE sentence_key = ?',
+                                  [(last_used, key) for key, last_used in self._touched.items()])
+            self._touched.clear()
+        if self._size is None:
+            self._size = self.size()
+        added = self.conn.execute('''
+            INSERT OR REPLACE INTO sentence_sentiment (sentence_key, score, last_used)
+            SELECT sentence_key, score, ? FROM temp.pending_sentiment
+        ''', (time.time(),)).rowcount
+        if added:
+            self.conn.execute("DELETE FROM temp.pending_sentiment")
+            self._size += added
+            if self._size > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        self._size = self.size()
+        overflow = self._size - self.max_entries
+        if overflow > 0:
+            self.conn.execute('''
+                DELETE FROM sentence_sentiment WHERE rowid IN (
+                    SELECT rowid FROM sentence_sentiment ORDER BY last_used LIMIT ?
+                )
+            ''', (overflow,))
+            self.evictions += overflow
+            self._size -= overflow
+
+    def size(self):
+        return self.conn.execute('SELECT COUNT(*) FROM sentence_sentiment').fetchone()[0]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
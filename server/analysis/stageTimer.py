@@ -0,0 +1,39 @@
+import time
+from contextlib import contextmanager
+
+# ============================
+# Per-stage timing of an analysis run
+# ============================
+
+# Each stage has a <stage>_ms column in analysis_timings: a new stage needs a migration adding it
+STAGES = ("db_read", "load_terms", "cache_lookup", "pipeline", "inference", "classification", "permissions", "db_write")
+
+
+class StageTimer:
+    """Accumulates wall-clock time per named stage, plus a few counters (sentences, chunks, ...)."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.counts = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, name, n):
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def total_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def stage_ms(self, name):
+        return round(self.stages.get(name, 0.0) * 1000, 2)
+
+    def summary(self):
+        stages = ", ".join(f"{name}={self.stage_ms(name)}" for name in STAGES if name in self.stages)
+        return f"Timings (ms): total={round(self.total_ms(), 2)}, {stages}"
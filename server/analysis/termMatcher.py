@@ -0,0 +1,122 @@
+import hashlib
+import re
+from functools import lru_cache
+
+# ============================
+# Precompiled multi-term matching
+# ============================
+# The whole term list is compiled into one trie-shaped regex, so a sentence is
+# scanned once no matter how many terms there are. The regex reports the longest
+# term starting at each position; shorter terms that are prefixes of it are then
+# checked individually, which keeps the result identical to testing every term
+# on its own.
+
+NEGATION_WORDS = r'(?:not|never|no)'
+
+# "privacy" only counts as a generic term when it is not the start of "privacy policy".
+_TERM_CONDITIONS = {"privacy": r'(?!\s+policy)'}
+
+
+def terms_version(terms):
+    """Digest identifying a term list; changes whenever a term is added, removed or reordered."""
+    return hashlib.sha1("\n".join(terms).encode("utf-8")).hexdigest()
+
+
+def _trie_pattern(terms, conditions):
+    """Build a regex matching any of terms, preferring the longest at a given position."""
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = term  # end-of-term marker
+
+    def to_pattern(node):
+        branches = [re.escape(char) + to_pattern(child) for char, child in sorted(node.items()) if char]
+        if "" in node:
+            # Longer terms are tried first; the empty branch ends the match here
+            branches.append(conditions.get(node[""], ""))
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    return to_pattern(trie)
+
+
+class TermMatcher:
+    """
+    Finds which terms of a list occur in a sentence.
+
+    whole_words=True  - generic-term rules: each term must stand on word boundaries,
+                        "privacy" must not be followed by "policy", and a term preceded
+                        by not/never/no anywhere in the sentence is ignored.
+    whole_words=False - sensitive-term rules: plain substring match.
+    """
+
+    def __init__(self, terms, whole_words=True):
+        self.whole_words = whole_words
+        # Keep the original order (and duplicates) so results match a linear scan
+        self.ordered_terms = list(terms)
+        self.positions = {}
+        for index, term in enumerate(self.ordered_terms):
+            self.positions.setdefault(term, []).append(index)
+        unique_terms = list(self.positions)
+
+        conditions = _TERM_CONDITIONS if whole_words else {}
+        if not unique_terms:
+            # An empty term list (missing or empty term file) matches nothing; its pattern
+            # would match the empty string
+            self.pattern = self.negation_pattern = None
+        elif whole_words:
+            self.pattern = re.compile(r'(?=\b(' + _trie_pattern(unique_terms, conditions) + r')\b)')
+            self.negation_pattern = re.compile(r'\b' + NEGATION_WORDS + r'\s+(?=(' + _trie_pattern(unique_terms, {}) + '))')
+        else:
+            self.pattern = re.compile(r'(?=(' + _trie_pattern(unique_terms, {}) + '))')
+            self.negation_pattern = None
+
+        # Individual patterns, only used to confirm terms that are prefixes of a longer match
+        self.term_patterns = {
+            term: re.compile((r'\b' + re.escape(term) + conditions.get(term, "") + r'\b') if whole_words else re.escape(term))
+            for term in unique_terms
+        }
+        self.prefixes = {
+            term: [other for other in unique_terms if other != term and term.startswith(other)]
+            for term in unique_terms
+        }
+
+    def _scan(self, pattern, text, check_prefixes):
+        found = set()
+        for match in pattern.finditer(text):
+            longest = match.group(1)
+            found.add(longest)
+            for prefix in self.prefixes[longest]:
+                if prefix not in found and (not check_prefixes or self.term_patterns[prefix].match(text, match.start(1))):
+                    found.add(prefix)
+        return found
+
+    def find(self, text):
+        """Return the terms present in text, in term-list order."""
+        if self.pattern is None:
+            return []
+        found = self._scan(self.pattern, text, check_prefixes=True)
+        if found and self.negation_pattern is not None:
+            found -= self._scan(self.negation_pattern, text, check_prefixes=False)
+        if not found:
+            return []
+        return [self.ordered_terms[i] for i in sorted(i for term in found for i in self.positions[term])]
+
+
+@lru_cache(maxsize=16)
+def _cached_matcher(terms, whole_words):
+    return TermMatcher(terms, whole_words)
+
+
+def get_generic_matcher(generic_terms):
+    """Matcher for generic terms, compiled once per term-list version."""
+    terms = tuple(t.lower().strip() for t in generic_terms if t and t.strip())
+    return _cached_matcher(terms, True)
+
+
+def get_sensitive_matcher(sensitive_terms):
+    """Matcher for sensitive terms, compiled once per term-list version."""
+    return _cached_matcher(tuple(t for t in sensitive_terms if t), False)
@@ -0,0 +1,78 @@
+import os
+import shutil
+import sqlite3
+from types import SimpleNamespace
+import pytest
+from analysis import pipelineRegistry, inferenceScheduler, database
+from analysis.policyChunker import split_sentence_spans
+
+ANALYSIS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FakePipeline:
+    """Stands in for stanza.Pipeline: splits sentences itself and scores 0 if a sentence mentions 'sell', else 1."""
+
+    def __init__(self):
+        self.calls = 0
+        self.sentences_scored = 0
+
+    def _doc(self, text):
+        sentences = []
+        for start, end in split_sentence_spans(text):
+            sentence_text = text[start:end]
+            sentences.append(SimpleNamespace(
+                text=sentence_text,
+                sentiment=0 if "sell" in sentence_text.lower() else 1,
+                tokens=[SimpleNamespace(start_char=start, end_char=end)],
+            ))
+        self.sentences_scored += len(sentences)
+        return SimpleNamespace(sentences=sentences)
+
+    def bulk_process(self, texts):
+        self.calls += 1
+        return [self._doc(text) for text in texts]
+
+    def __call__(self, text):
+        return self.bulk_process([text])[0]
+
+
+@pytest.fixture
+def fake_pipeline(monkeypatch):
+    pipeline = FakePipeline()
+    monkeypatch.setattr(pipelineRegistry, "_build_pipeline", lambda processors, batch_size: pipeline)
+    pipelineRegistry.shutdown()
+    yield pipeline
+    inferenceScheduler.shutdown()
+    pipelineRegistry.shutdown()
+
+
+@pytest.fixture
+def analysis_db(tmp_path, monkeypatch):
+    """A throwaway server directory (scrapers/privacy_policies.db + term files) used as the working directory."""
+    os.makedirs(tmp_path / "scrapers")
+    shutil.copytree(ANALYSIS_DIR, tmp_path / "analysis", ignore=shutil.ignore_patterns("tests", "__pycache__"))
+    db_path = tmp_path / "scrapers" / "privacy_policies.db"
+
+    conn = sqlite3.connect(db_path)
+    conn.execute('''
+        CREATE TABLE policies (
+            app_id TEXT PRIMARY KEY, app_name TEXT, policy_url TEXT, policy_text TEXT, permissions TEXT,
+            rating TEXT, privacy_concern TEXT, worst_permissions TEXT, category TEXT, user_feedback TEXT,
+            date_updated TEXT
+        )
+    ''')
+    conn.commit()
+    conn.close()
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("PRIVACY_DB_PATH", str(db_path))
+    yield db_path
+    database.close_all()
+
+
+def add_app(db_path, app_id, policy_text, permissions="precise location (Location); take pictures (Camera)"):
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT OR REPLACE INTO policies (app_id, app_name, policy_text, permissions) VALUES (?, ?, ?, ?)",
+                 (app_id, app_id, policy_text, permissions))
+    conn.commit()
+    conn.close()
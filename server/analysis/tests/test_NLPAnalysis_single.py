@@ -1,28 +1,68 @@
 import pytest
 import sqlite3
-from unittest.mock import patch, MagicMock
-import json
-import datetime
-import time
-from analysis.NLPAnalysis_single import analyze_privacy_policy
+from analysis.NLPAnalysis_single import (
+    NLPAnalysis_single, is_generic_sentence, find_most_concerning_sentence, process_policy,
+    process_permissions, compute_overall_rating, score_policy_sentences, load_terms,
+    GENERIC_TERMS_FILE, SENSITIVE_TERMS_FILE
+)
+from conftest import FakePipeline, add_app
 
-# Path to the database
-db_path = ".././scrapers/privacy_policies.db"
+POLICY = ("We collect your fingerprint for biometric login. We may sell your usage data to advertisers. "
+          "Contact us for more information. Your settings are stored on the device.")
 
 @pytest.fixture
-def db_connection():
-    conn = sqlite3.connect(db_path)
-    yield conn
+def terms(analysis_db):
+    return load_terms(GENERIC_TERMS_FILE), load_terms(SENSITIVE_TERMS_FILE)
+
+def test_is_generic_sentence(terms):
+    generic_terms, _ = terms
+    assert is_generic_sentence("short sentence", generic_terms) == (True, "sentence fewer than 4 words")
+    assert is_generic_sentence("please contact us with any questions", generic_terms) == (True, ["contact us"])
+    assert is_generic_sentence("read our privacy policy before signing up", generic_terms) == (True, ["privacy policy"])
+    assert is_generic_sentence("we do not contact us through this form", generic_terms) == (False, [])
+    assert is_generic_sentence("we may sell your usage data", generic_terms) == (False, [])
+
+def test_find_most_concerning_sentence(terms):
+    generic_terms, sensitive_terms = terms
+    scored = score_policy_sentences(POLICY, FakePipeline())
+    generic, sensitive, concerning = find_most_concerning_sentence(scored, sensitive_terms, generic_terms)
+
+    assert generic == [("contact us for more information.", ["contact us", "for more information"], 1)]
+    assert sensitive == [("we collect your fingerprint for biometric login.", ["biometric", "fingerprint"], 0.5)]
+    assert concerning == [
+        ("we may sell your usage data to advertisers.", 0),
+        ("we collect your fingerprint for biometric login.", 0.5),
+        ("your settings are stored on the device.", 1),
+    ]
+
+def test_process_policy_averages_raw_sentiment(terms):
+    generic_terms, sensitive_terms = terms
+    _, _, concerning, average = process_policy(POLICY, sensitive_terms, generic_terms, FakePipeline())
+    assert concerning[0][0] == "we may sell your usage data to advertisers."
+    assert average == 0.75
+
+def test_process_permissions_ranks_most_concerning_first():
+    permissions, average = process_permissions("read your contacts (Contacts); precise location (Location); full network access (Other)")
+    assert permissions == [("location", "precise location", 0.1), ("contacts", "read your contacts", 0.8),
+                           ("other", "full network access", 1.0)]
+    assert average == pytest.approx(0.6333, abs=1e-4)
+    assert process_permissions("") == ([], 2.0)
+
+def test_compute_overall_rating():
+    assert compute_overall_rating(1, 0.9) == ("good", 0.95)
+    assert compute_overall_rating(0.8, 0.8)[0] == "okay"
+    assert compute_overall_rating(0.5, 0.6)[0] == "bad"
+
+def test_analysis_updates_policy_and_log(analysis_db, fake_pipeline):
+    add_app(analysis_db, "com.example.app", POLICY)
+    assert NLPAnalysis_single("com.example.app") is None
+
+    conn = sqlite3.connect(analysis_db)
+    assert conn.execute("SELECT privacy_concern, worst_permissions, rating FROM policies").fetchone() == (
+        "we may sell your usage data to advertisers.", "location, precise location", "bad"
+    )
+    assert conn.execute("SELECT COUNT(*) FROM analysis_log").fetchone() == (1,)
     conn.close()
 
-def test_query_privacy_policies(db_connection):
-    cursor = db_connection.cursor()
-    cursor.execute("SELECT * FROM policies")
-    rows = cursor.fetchall()
-    
-    assert len(rows) > 0, "There should be at least one privacy policy in the database"
-
-def test_analyze_privacy_policy():
-    # Here you would add logic to test any function from privacy_policies.py
-    result = analyze_privacy_policy('Sample Privacy Policy Text')  # Example function
-    assert result == 'Expected result'
+    with pytest.raises(LookupError):
+        NLPAnalysis_single("com.missing.app")
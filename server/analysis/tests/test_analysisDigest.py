@@ -0,0 +1,34 @@
+import sqlite3
+from analysis.NLPAnalysis_single import NLPAnalysis_single
+from conftest import add_app
+
+POLICY = "We collect your email address to create your account. We may sell your location to partners. Contact us for more information."
+
+def test_forced_reanalysis_of_unchanged_app_returns_stored_result(analysis_db, fake_pipeline):
+    add_app(analysis_db, "com.example.app", POLICY)
+    NLPAnalysis_single("com.example.app")
+    assert fake_pipeline.calls == 1
+
+    result = NLPAnalysis_single("com.example.app", force_flag=True)
+    assert fake_pipeline.calls == 1
+    assert result["analysis"]["app_id"] == "com.example.app"
+    assert result["analysis"]["rating"] in ("good", "okay", "bad")
+
+def test_changed_policy_or_rerun_flag_reanalyses(analysis_db, fake_pipeline):
+    add_app(analysis_db, "com.example.app", POLICY)
+    NLPAnalysis_single("com.example.app")
+
+    # A rerun is a full analysis, even though every sentence now comes from the sentiment cache
+    assert NLPAnalysis_single("com.example.app", force_flag=True, rerun_flag=True) is None
+
+    add_app(analysis_db, "com.example.app", POLICY + " We never sell health data.")
+    assert NLPAnalysis_single("com.example.app", force_flag=True) is None
+
+def test_digests_are_recorded(analysis_db, fake_pipeline):
+    add_app(analysis_db, "com.example.app", POLICY)
+    NLPAnalysis_single("com.example.app")
+
+    conn = sqlite3.connect(analysis_db)
+    digests = conn.execute("SELECT policy_digest, permissions_digest, terms_version FROM analysis_log").fetchone()
+    conn.close()
+    assert all(digests)
@@ -0,0 +1,45 @@
+import json
+import sqlite3
+from analysis.NLPAnalysis_single import NLPAnalysis_single
+from conftest import add_app
+
+POLICY = ("We collect your fingerprint for biometric login. We may sell your usage data to advertisers. "
+          "Contact us for more information. Your settings are stored on the device.")
+
+def test_sentences_are_stored_with_category_terms_and_scores(analysis_db, fake_pipeline):
+    add_app(analysis_db, "com.example.app", POLICY)
+    NLPAnalysis_single("com.example.app")
+
+    conn = sqlite3.connect(analysis_db)
+    rows = conn.execute('''
+        SELECT sentence_offset, sentence_text, category, matched_terms, score, adjusted_score
+        FROM analysis_sentences WHERE app_id = ? ORDER BY sentence_offset
+    ''', ("com.example.app",)).fetchall()
+    for offset, text, *_ in rows:
+        assert POLICY[offset:offset + len(text)] == text
+    assert [(category, json.loads(terms), score, adjusted) for _, _, category, terms, score, adjusted in rows] == [
+        ("sensitive", ["biometric", "fingerprint"], 1, 0.5),
+        ("other", [], 0, 0),
+        ("generic", ["contact us", "for more information"], 1, 1),
+        ("other", [], 1, 1),
+    ]
+
+    # Indexed lookups: worst sentences of one app, apps mentioning a term
+    worst = conn.execute('''
+        SELECT sentence_text FROM analysis_sentences
+        WHERE app_id = ? AND category IN ('sensitive', 'other') ORDER BY adjusted_score LIMIT 1
+    ''', ("com.example.app",)).fetchone()
+    assert worst == ("We may sell your usage data to advertisers.",)
+    assert conn.execute("SELECT app_id FROM analysis_sentence_terms WHERE term = 'biometric'").fetchall() == [("com.example.app",)]
+    conn.close()
+
+def test_reanalysis_replaces_sentences(analysis_db, fake_pipeline):
+    add_app(analysis_db, "com.example.app", POLICY)
+    NLPAnalysis_single("com.example.app")
+    add_app(analysis_db, "com.example.app", "Your settings are stored on the device.")
+    NLPAnalysis_single("com.example.app", force_flag=True)
+
+    conn = sqlite3.connect(analysis_db)
+    assert conn.execute("SELECT COUNT(*) FROM analysis_sentences").fetchone() == (1,)
+    assert conn.execute("SELECT COUNT(*) FROM analysis_sentence_terms").fetchone() == (0,)
+    conn.close()
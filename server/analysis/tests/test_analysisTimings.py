@@ -0,0 +1,40 @@
+import os
+import sqlite3
+from analysis.NLPAnalysis_single import NLPAnalysis_single, profile_analysis
+from analysis.stageTimer import STAGES
+from conftest import add_app
+
+POLICY = ("We collect your fingerprint for biometric login. We may sell your usage data to advertisers. "
+          "Contact us for more information. Your settings are stored on the device.")
+
+def load_timings(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    rows = [dict(row) for row in conn.execute("SELECT * FROM analysis_timings ORDER BY analyse_time")]
+    conn.close()
+    return rows
+
+def test_each_run_records_stage_timings_and_counts(analysis_db, fake_pipeline):
+    add_app(analysis_db, "com.example.app", POLICY)
+    NLPAnalysis_single("com.example.app")
+
+    [run] = load_timings(analysis_db)
+    assert run["app_id"] == "com.example.app"
+    assert (run["sentence_count"], run["sentences_scored"], run["chunk_count"]) == (4, 4, 1)
+    for stage in STAGES:
+        assert run[f"{stage}_ms"] >= 0
+    assert run["total_ms"] >= sum(run[f"{stage}_ms"] for stage in STAGES)
+
+    # A rerun is served from the sentiment cache: no inference work is recorded
+    NLPAnalysis_single("com.example.app", rerun_flag=True)
+    first, second = load_timings(analysis_db)
+    assert (second["sentence_count"], second["sentences_scored"], second["chunk_count"]) == (4, 0, 0)
+    assert second["inference_ms"] == 0
+
+def test_profile_analysis_writes_cprofile_stats(analysis_db, fake_pipeline, tmp_path):
+    add_app(analysis_db, "com.example.app", POLICY)
+    output = tmp_path / "app.prof"
+    profile_analysis("com.example.app", str(output))
+
+    assert os.path.getsize(output) > 0
+    assert len(load_timings(analysis_db)) == 1
@@ -0,0 +1,62 @@
+import sqlite3
+import pytest
+from conftest import add_app
+
+APPS = [
+    ("com.a.camera", "Snap Camera", "good", "take pictures (Camera); precise location (Location)", "Photography"),
+    ("com.b.chat", "Chat Now", "bad", "read your contacts (Contacts)", "Social"),
+    ("com.c.maps", "City Maps", "okay", "precise location (Location)", "Travel"),
+    ("com.d.notes", "Notes", None, "", "Productivity"),
+]
+
+@pytest.fixture
+def client(analysis_db):
+    import server
+    for app_id, name, rating, permissions, category in APPS:
+        add_app(analysis_db, app_id, "Policy.", permissions=permissions)
+    conn = sqlite3.connect(analysis_db)
+    conn.executemany("UPDATE policies SET app_name = ?, rating = ?, category = ? WHERE app_id = ?",
+                     [(name, rating, category, app_id) for app_id, name, rating, _, category in APPS])
+    conn.execute("CREATE TABLE app_icons (app_id TEXT PRIMARY KEY, icon_url TEXT)")
+    conn.execute("INSERT INTO app_icons VALUES ('com.a.camera', 'https://example.com/a.png')")
+    conn.commit()
+    conn.close()
+    return server.app.test_client()
+
+def test_full_listing_keeps_its_shape(client):
+    apps = client.get("/apps").get_json()
+    assert [app["app_id"] for app in apps] == [app[0] for app in APPS]
+    assert apps[0]["icon_url"] == "https://example.com/a.png" and apps[1]["icon_url"] is None
+    assert sorted(apps[0]["permissions"]) == ["Camera", "Location"]
+    assert set(apps[0]) == {"app_id", "app_name", "icon_url", "rating", "permissions", "category"}
+
+def test_keyset_pages(client):
+    first = client.get("/apps?limit=3&fields=app_id").get_json()
+    assert first == {"apps": [{"app_id": "com.a.camera"}, {"app_id": "com.b.chat"}, {"app_id": "com.c.maps"}],
+                     "next": "com.c.maps", "total": 4}
+    second = client.get(f"/apps?limit=3&fields=app_id&after={first['next']}").get_json()
+    assert second == {"apps": [{"app_id": "com.d.notes"}], "next": None, "total": 4}
+
+def test_filters_and_projection(client):
+    assert client.get("/apps?fields=app_id&rating=Good,okay").get_json() == [
+        {"app_id": "com.a.camera"}, {"app_id": "com.c.maps"}]
+    assert client.get("/apps?fields=app_name&permission=Location,Camera").get_json() == [{"app_name": "Snap Camera"}]
+    assert client.get("/apps?fields=app_id&category=social").get_json() == [{"app_id": "com.b.chat"}]
+    assert client.get("/apps?fields=app_id&q=map").get_json() == [{"app_id": "com.c.maps"}]
+    page = client.get("/apps?fields=app_id&permission=Location&limit=1").get_json()
+    assert (page["next"], page["total"]) == ("com.a.camera", 2)
+
+def test_invalid_parameters(client):
+    assert client.get("/apps?fields=app_id,policy_text").status_code == 400
+    assert client.get("/apps?limit=0").status_code == 400
+
+def test_etag_revalidation(client, analysis_db):
+    response = client.get("/apps?limit=2")
+    etag = response.headers["ETag"]
+    assert client.get("/apps?limit=2", headers={"If-None-Match": etag}).status_code == 304
+
+    conn = sqlite3.connect(analysis_db)
+    conn.execute("UPDATE policies SET rating = 'bad' WHERE app_id = 'com.a.camera'")
+    conn.commit()
+    conn.close()
+    assert client.get("/apps?limit=2", headers={"If-None-Match": etag}).status_code == 200
@@ -0,0 +1,49 @@
+import pytest
+from conftest import add_app
+
+@pytest.fixture
+def client(analysis_db):
+    import server
+    add_app(analysis_db, "com.known.rated", "Policy.")
+    add_app(analysis_db, "com.known.pending", "Policy.")
+    conn = server.get_db_connection()
+    conn.execute("UPDATE policies SET app_name = 'Rated', rating = 'good',"
+                 " permissions = 'take pictures (Camera); read contacts (Contacts)' WHERE app_id = 'com.known.rated'")
+    conn.execute("INSERT INTO app_icons VALUES ('com.known.rated', 'https://example.com/r.png')")
+    conn.executemany("INSERT INTO manual_review (app_id, status) VALUES (?, ?)",
+                     [("com.known.pending", "pending"), ("com.new.pending", "pending"), ("com.new.done", "approved")])
+    # A database from before manual_review was keyed by app_id can hold several rows per app
+    conn.execute("ALTER TABLE manual_review RENAME TO manual_review_keyed")
+    conn.execute("CREATE TABLE manual_review AS SELECT * FROM manual_review_keyed")
+    conn.execute("INSERT INTO manual_review (app_id, status) VALUES ('com.known.pending', 'pending')")
+    conn.commit()
+    conn.close()
+    return server.app.test_client()
+
+def lookup(client, app_ids, **options):
+    response = client.post("/apps/lookup", json=dict(app_ids=app_ids, **options))
+    assert response.status_code == 200
+    return response.get_json()
+
+def test_known_unknown_and_pending_in_one_call(client):
+    result = lookup(client, ["com.new.pending", "com.known.rated", "com.new.done", "com.known.pending", "com.known.rated"])
+    assert [app["app_id"] for app in result["known"]] == ["com.known.rated", "com.known.pending"]
+    assert sorted(result["known"][0].pop("permissions")) == ["Camera", "Contacts"]
+    assert result["known"][0] == {"app_id": "com.known.rated", "app_name": "Rated", "icon_url": "https://example.com/r.png",
+                                  "rating": "good", "privacy_concern": None, "worst_permissions": None,
+                                  "category": None, "pending_review": False}
+    assert result["known"][1]["pending_review"] is True
+    assert result["unknown"] == ["com.new.pending", "com.new.done"]
+    assert result["pending_review"] == ["com.new.pending", "com.known.pending"]
+    assert result["added"] == []
+
+def test_unknown_apps_are_added_in_bulk(client):
+    assert lookup(client, ["com.known.rated", "com.a", "com.b"], add_unknown=True)["added"] == ["com.a", "com.b"]
+    again = lookup(client, ["com.known.rated", "com.a", "com.b"], add_unknown=True)
+    assert (again["unknown"], again["added"]) == ([], [])
+    assert [app["app_id"] for app in again["known"]] == ["com.known.rated", "com.a", "com.b"]
+
+def test_invalid_requests(client):
+    assert client.post("/apps/lookup", json={"app_ids": "com.a"}).status_code == 400
+    assert client.post("/apps/lookup", json={"app_ids": ["com.a", 3]}).status_code == 400
+    assert client.post("/apps/lookup", json={"app_ids": ["com.a"] * 2001}).status_code == 400
@@ -0,0 +1,24 @@
+import json
+from analysis.benchmark import generate_corpus, run_benchmarks, compare_reports
+
+def test_corpus_is_reproducible():
+    corpus = generate_corpus(app_count=3, sentences_per_policy=10, seed=7)
+    assert corpus == generate_corpus(app_count=3, sentences_per_policy=10, seed=7)
+    assert corpus != generate_corpus(app_count=3, sentences_per_policy=10, seed=8)
+    assert [app["app_id"] for app in corpus] == ["com.benchmark.app00000", "com.benchmark.app00001", "com.benchmark.app00002"]
+    assert all(app["permissions"] for app in corpus)
+
+def test_report_covers_functions_and_endpoints(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    report = run_benchmarks(app_count=3, sentences_per_policy=10, repeat=1)
+
+    names = [result["name"] for result in report["results"]]
+    for name in ["is_generic_sentence", "find_most_concerning_sentence", "process_policy", "process_permissions",
+                 "NLPAnalysis_single (cold cache)", "GET /apps", "GET /app/<id>", "GET /nlp (unchanged)"]:
+        assert name in names
+    assert report["meta"]["apps"] == 3
+    assert all(result["median_ms"] >= 0 for result in report["results"])
+    json.dumps(report)
+
+    comparison = compare_reports(report, report)
+    assert all(ratio in (1.0, None) for _, _, _, ratio in comparison)
@@ -0,0 +1,67 @@
+import gzip
+import json
+import sqlite3
+import pytest
+from analysis.NLPAnalysis_single import NLPAnalysis_single
+from analysis.database import connect
+from analysis.migrations import migrate
+from conftest import add_app
+
+POLICY = "We collect your fingerprint for biometric login. We may sell your usage data to advertisers."
+
+@pytest.fixture
+def client(analysis_db):
+    import server
+    conn = sqlite3.connect(analysis_db)
+    conn.execute("CREATE TABLE app_icons (app_id TEXT PRIMARY KEY, icon_url TEXT)")
+    conn.close()
+    for i in range(40):
+        add_app(analysis_db, f"com.example.app{i:02}", POLICY)
+    return server.app.test_client()
+
+def test_reads_are_served_from_memory_until_a_write(client, analysis_db):
+    assert client.get("/apps?limit=5").headers["X-Cache"] == "miss"
+    cached = client.get("/apps?limit=5")
+    assert cached.headers["X-Cache"] == "hit"
+
+    # A write from another process (scraper, batch worker) bumps the version through the triggers
+    conn = sqlite3.connect(analysis_db)
+    conn.execute("UPDATE policies SET app_name = 'Renamed' WHERE app_id = 'com.example.app00'")
+    conn.commit()
+    conn.close()
+    fresh = client.get("/apps?limit=5")
+    assert fresh.headers["X-Cache"] == "miss"
+    assert fresh.get_json()["apps"][0]["app_name"] == "Renamed"
+
+def test_analysis_invalidates_app_details(client, fake_pipeline):
+    assert client.get("/app/com.example.app01").get_json()["rating"] is None
+    assert client.get("/app/com.example.app01").headers["X-Cache"] == "hit"
+    NLPAnalysis_single("com.example.app01")
+    response = client.get("/app/com.example.app01")
+    assert response.headers["X-Cache"] == "miss"
+    assert response.get_json()["rating"] == "bad"
+
+def test_version_tracks_writes_made_before_any_cached_request(analysis_db):
+    # e.g. the scrapers writing after a migration run but before the server's first request
+    conn = connect()
+    migrate(conn)
+    before = conn.execute("SELECT version FROM catalogue_version").fetchone()[0]
+    conn.execute("INSERT INTO app_icons VALUES ('com.example.app', 'https://example.com/a.png')")
+    conn.commit()
+    assert conn.execute("SELECT version FROM catalogue_version").fetchone()[0] == before + 1
+    conn.close()
+
+def test_errors_are_not_cached(client):
+    assert client.get("/app/com.missing.app").status_code == 404
+    assert client.get("/app/com.missing.app").status_code == 404
+    assert client.get("/apps?limit=0").status_code == 400
+
+def test_gzip_and_conditional_requests(client):
+    plain = client.get("/apps")
+    zipped = client.get("/apps", headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(zipped.get_data())) == plain.get_json()
+    assert zipped.headers["ETag"] != plain.headers["ETag"]
+
+    not_modified = client.get("/apps", headers={"Accept-Encoding": "gzip", "If-None-Match": zipped.headers["ETag"]})
+    assert not_modified.status_code == 304 and not_modified.get_data() == b""
@@ -0,0 +1,56 @@
+import sqlite3
+import threading
+from analysis import database
+from analysis.database import connect, database_path, get_pool
+
+def test_configured_path(analysis_db, monkeypatch):
+    assert database_path() == str(analysis_db)
+    assert database_path("other.db") == "other.db"
+    monkeypatch.delenv("PRIVACY_DB_PATH")
+    assert database_path() == database.DEFAULT_DB_PATH
+
+def test_connections_are_pooled_and_in_wal_mode(analysis_db):
+    conn = connect()
+    assert conn.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    assert conn.execute("PRAGMA synchronous").fetchone() == (1,)  # NORMAL
+    conn.close()
+
+    again = connect(row_factory=sqlite3.Row, foreign_keys=True)
+    assert again is conn
+    assert again.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+    again.close()
+    assert connect().row_factory is None
+    assert (get_pool().opened, get_pool().reused) == (1, 2)
+
+def test_release_rolls_back_uncommitted_work(analysis_db):
+    conn = connect()
+    conn.execute("INSERT INTO policies (app_id) VALUES ('com.example.app')")
+    conn.close()
+    conn.close()  # a second close does not put it in the pool twice
+    assert connect().execute("SELECT COUNT(*) FROM policies").fetchone() == (0,)
+    assert len(get_pool()._idle) == 0
+
+def test_readers_are_not_blocked_by_a_writer(analysis_db):
+    writer = connect()
+    writer.execute("INSERT INTO policies (app_id) VALUES ('com.example.app')")  # transaction left open
+
+    counts = []
+    reader = threading.Thread(target=lambda: counts.append(
+        connect().execute("SELECT COUNT(*) FROM policies").fetchone()[0]))
+    reader.start()
+    reader.join(5)
+    assert counts == [0]
+    writer.commit()
+    writer.close()
+
+def test_reused_connection_gets_default_transaction_mode(analysis_db):
+    conn = connect()
+    conn.isolation_level = None
+    conn.close()
+
+    again = connect()
+    assert again.isolation_level == ""
+    again.execute("INSERT INTO policies (app_id) VALUES ('com.example.app')")
+    again.rollback()
+    assert again.execute("SELECT COUNT(*) FROM policies").fetchone() == (0,)
+    again.close()
@@ -0,0 +1,93 @@
+import pytest
+from analysis.database import connect
+
+@pytest.fixture
+def client(analysis_db):
+    import server
+    conn = server.get_db_connection()
+    conn.executemany("INSERT INTO users (email, password) VALUES (?, 'x')", [("a@example.com",), ("b@example.com",)])
+    conn.commit()
+    conn.close()
+    return server.app.test_client()
+
+def submit(client, app_id, user_id, reason):
+    response = client.post("/feedback", json={"app_id": app_id, "user_id": user_id, "reason": reason,
+                                              "status": "Pending", "type": "Privacy"})
+    assert response.status_code == 201
+    return response.get_json()["feedback_id"]
+
+def test_feedback_is_listed_newest_first_with_emails(client):
+    first = submit(client, "com.example.app", 1, "first")
+    second = submit(client, "com.example.app", 2, "second")
+    submit(client, "com.other.app", 1, "elsewhere")
+
+    feedback = client.get("/getFeedback?app_id=com.example.app").get_json()["feedback"]
+    assert [(item["feedback_id"], item["user_email"]) for item in feedback] == [
+        (second, "b@example.com"), (first, "a@example.com")]
+    assert client.get("/getFeedback?app_id=com.missing.app").get_json() == {"feedback": []}
+
+def test_unknown_app_gets_a_placeholder_policy_once(client):
+    submit(client, "com.new.app", 1, "one")
+    submit(client, "com.new.app", 2, "two")
+    conn = connect()
+    assert conn.execute("SELECT app_id, user_feedback FROM policies").fetchall() == [("com.new.app", None)]
+    conn.close()
+
+def test_keyset_pages(client):
+    ids = [submit(client, "com.example.app", 1, f"reason {i}") for i in range(5)]
+    first = client.get("/getFeedback?app_id=com.example.app&limit=2").get_json()
+    assert [item["feedback_id"] for item in first["feedback"]] == ids[:2:-1][:2]
+    assert first["next"] == ids[3]
+    last = client.get(f"/getFeedback?app_id=com.example.app&limit=3&before={ids[2]}").get_json()
+    assert [item["feedback_id"] for item in last["feedback"]] == [ids[1], ids[0]]
+    assert last["next"] is None
+    assert client.get("/getFeedback?app_id=com.example.app&limit=0").status_code == 400
+
+def test_listing_is_one_indexed_query(client):
+    for i in range(3):
+        submit(client, "com.example.app", 1, f"reason {i}")
+    conn = connect()
+    statements = []
+    conn.set_trace_callback(statements.append)
+    conn.close()  # back to the pool, where the request picks it up
+    client.get("/getFeedback?app_id=com.example.app")
+    conn = connect()
+    conn.set_trace_callback(None)
+    conn.close()
+    assert len([statement for statement in statements if statement.lstrip().startswith("SELECT")]) == 1
+
+def test_review_queue_by_normalised_state(client):
+    other = submit(client, "com.example.app", 1, "Other - other: icon - blurry")
+    conn = connect()
+    conn.execute("UPDATE feedback SET type = 'Other - other Update' WHERE feedback_id = ?", (other,))
+    conn.commit()
+    conn.close()
+    client.post("/feedback", json={"app_id": "General", "user_id": 2, "reason": "Love it",
+                                   "status": "Pending Review", "type": "General Feedback"})
+    submit(client, "com.example.app", 1, "Just a comment")
+
+    queue = client.get("/otherFeedback").get_json()
+    assert [item["reason"] for item in queue] == ["Love it", "Other - other: icon - blurry"]
+    assert (queue[1]["otherItemChange"], queue[1]["otherReason"], queue[1]["user_email"]) == (
+        "icon", "blurry", "a@example.com")
+
+    assert client.post("/updateStatus", json={"feedback_id": other, "user_id": 1,
+                                              "status": "Approved. Changes done."}).status_code == 200
+    page = client.get("/otherFeedback?limit=1").get_json()
+    assert ([item["reason"] for item in page["feedback"]], page["next"], page["total"]) == (["Love it"], None, 1)
+    approved = client.get("/otherFeedback?state=approved").get_json()
+    assert [item["feedback_id"] for item in approved] == [other]
+    assert client.get("/otherFeedback?state=lost").status_code == 400
+
+def test_bulk_status_updates_are_all_or_nothing(client):
+    ids = [submit(client, "com.example.app", 1, f"reason {i}") for i in range(3)]
+    updates = [{"feedback_id": feedback_id, "user_id": 1, "status": "Rejected. Duplicate"} for feedback_id in ids]
+
+    response = client.post("/updateStatus", json={"updates": updates + [{"feedback_id": 999, "user_id": 1, "status": "x"}]})
+    assert (response.status_code, response.get_json()["feedback_ids"]) == (404, [999])
+    assert client.get("/otherFeedback?state=rejected").get_json() == []
+
+    response = client.post("/updateStatus", json={"updates": updates})
+    assert (response.status_code, response.get_json()["feedback_ids"]) == (200, ids)
+    assert len(client.get("/otherFeedback?state=rejected").get_json()) == 3
+    assert client.post("/updateStatus", json={"updates": [{"feedback_id": ids[0]}]}).status_code == 400
@@ -0,0 +1,77 @@
+import sqlite3
+from analysis.NLPAnalysis_single import NLPAnalysis_single
+from conftest import add_app
+
+POLICY = ("We collect your fingerprint for biometric login. We may share your usage data with partners. "
+          "Contact us for more information. Your settings are stored on the device.")
+EDITED = POLICY.replace("share your usage data with partners", "sell your usage data to advertisers") + \
+         " We keep logs for a year."
+
+def stored(db_path):
+    conn = sqlite3.connect(db_path)
+    sentences = conn.execute('''
+        SELECT sentence_offset, sentence_text, score, category, adjusted_score
+        FROM analysis_sentences ORDER BY sentence_offset
+    ''').fetchall()
+    log = conn.execute("SELECT rating, privacy_sentiment, privacy_concern, sentence_count FROM analysis_log").fetchone()
+    reused = conn.execute("SELECT sentences_reused FROM analysis_timings ORDER BY analyse_time DESC").fetchone()[0]
+    conn.close()
+    return sentences, log, reused
+
+def clear_cache(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("DELETE FROM sentence_sentiment")
+    conn.commit()
+    conn.close()
+
+def test_edited_policy_scores_only_changed_sentences(analysis_db, fake_pipeline):
+    add_app(analysis_db, "com.example.app", POLICY)
+    NLPAnalysis_single("com.example.app")
+    add_app(analysis_db, "com.example.app", EDITED)
+
+    # Without the sentiment cache only the previous analysis can spare the unchanged sentences
+    clear_cache(analysis_db)
+    fake_pipeline.sentences_scored = 0
+    NLPAnalysis_single("com.example.app", force_flag=True)
+    assert fake_pipeline.sentences_scored == 2
+    incremental = stored(analysis_db)
+    assert incremental[2] == 3
+
+    clear_cache(analysis_db)
+    NLPAnalysis_single("com.example.app", rerun_flag=True)
+    full = stored(analysis_db)
+    assert incremental[:2] == full[:2]
+    assert full[2] == 0
+    assert incremental[1][2].startswith('["(\'we may sell your usage data to advertisers.\', 0.0)"')
+
+def test_other_backend_scores_are_not_reused(analysis_db, fake_pipeline):
+    add_app(analysis_db, "com.example.app", POLICY)
+    NLPAnalysis_single("com.example.app", backend="lexicon")
+    add_app(analysis_db, "com.example.app", EDITED)
+
+    fake_pipeline.sentences_scored = 0
+    clear_cache(analysis_db)
+    NLPAnalysis_single("com.example.app", force_flag=True)
+    assert fake_pipeline.sentences_scored == 5
+    assert stored(analysis_db)[2] == 0
+
+def test_other_writers_during_inference(analysis_db, fake_pipeline, monkeypatch):
+    add_app(analysis_db, "com.example.app", POLICY)
+    NLPAnalysis_single("com.example.app")
+    add_app(analysis_db, "com.example.app", POLICY.replace("Contact us for more information. ", "") + " We keep logs for a year.")
+    clear_cache(analysis_db)
+
+    # e.g. a /feedback insert committed while the edited policy is being scored
+    score = fake_pipeline.bulk_process
+    def score_and_write(texts):
+        conn = sqlite3.connect(analysis_db)
+        conn.execute("INSERT INTO feedback (app_id, reason) VALUES ('com.example.other', 'meanwhile')")
+        conn.commit()
+        conn.close()
+        return score(texts)
+    monkeypatch.setattr(fake_pipeline, "bulk_process", score_and_write)
+
+    fake_pipeline.sentences_scored = 0
+    NLPAnalysis_single("com.example.app", force_flag=True)
+    sentences, log, reused = stored(analysis_db)
+    assert (len(sentences), log[3], reused, fake_pipeline.sentences_scored) == (4, 4, 3, 1)
@@ -0,0 +1,49 @@
+import threading
+from analysis.inferenceScheduler import InferenceScheduler
+
+def test_concurrent_callers_are_coalesced_into_one_batch(fake_pipeline):
+    scheduler = InferenceScheduler(max_batch_sentences=100, max_wait_ms=300)
+    results = {}
+
+    def caller(i):
+        results[i] = scheduler.score([f"We may sell record {i}.", f"Your record {i} is safe.", "Contact us."])
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    scheduler.stop()
+
+    assert fake_pipeline.calls == 1
+    assert scheduler.batches_run == 1
+    # "Contact us." is shared by every caller but scored once
+    assert fake_pipeline.sentences_scored == 9
+    assert all(results[i] == [0, 1, 1] for i in range(4))
+
+def test_full_batch_is_flushed_without_waiting(fake_pipeline):
+    scheduler = InferenceScheduler(max_batch_sentences=2, max_wait_ms=60000)
+    assert scheduler.score(["We sell data.", "We keep data."]) == [0, 1]
+    scheduler.stop()
+
+def test_pipeline_errors_reach_the_caller(fake_pipeline, monkeypatch):
+    def broken(texts):
+        raise RuntimeError("model crashed")
+    monkeypatch.setattr(fake_pipeline, "bulk_process", broken)
+    scheduler = InferenceScheduler(max_wait_ms=1)
+    try:
+        scheduler.score(["Anything."])
+        assert False, "expected the pipeline error"
+    except RuntimeError as e:
+        assert "model crashed" in str(e)
+    finally:
+        scheduler.stop()
+
+def test_callers_get_the_chunk_count_of_their_sentences(fake_pipeline):
+    scheduler = InferenceScheduler(max_batch_sentences=100, max_wait_ms=1, max_tokens=4)
+    try:
+        # Four words per chunk: one sentence per chunk
+        assert scheduler.score_counted(["We sell data.", "We keep data.", "We sell data."]) == ([0, 1, 0], 2)
+        assert scheduler.score_counted([]) == ([], 0)
+    finally:
+        scheduler.stop()
@@ -0,0 +1,54 @@
+import threading
+import time
+from analysis.jobQueue import AnalysisJobQueue
+from conftest import add_app
+
+def wait_for(queue, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError("job did not finish")
+
+def test_job_runs_in_background_and_stores_result(analysis_db, fake_pipeline):
+    add_app(analysis_db, "com.example.app", "We may sell your data to partners. Contact us for more information.")
+    queue = AnalysisJobQueue(str(analysis_db), workers=1)
+    try:
+        job = queue.submit("com.example.app")
+        assert job["status"] in ("queued", "running")
+
+        job = wait_for(queue, job["job_id"])
+        assert job["status"] == "done"
+        assert job["result"]["analysis"]["app_id"] == "com.example.app"
+    finally:
+        queue.stop()
+
+def test_concurrent_submissions_share_one_job(analysis_db):
+    release = threading.Event()
+    runs = []
+
+    def slow_analyze(app_id, force_flag, rerun_flag, db_path):
+        runs.append(app_id)
+        release.wait(5)
+        return {"message": "done"}
+
+    queue = AnalysisJobQueue(str(analysis_db), workers=2, analyze=slow_analyze)
+    try:
+        job_ids = {queue.submit("com.example.app")["job_id"] for _ in range(5)}
+        assert len(job_ids) == 1
+        release.set()
+        assert wait_for(queue, job_ids.pop())["result"] == {"message": "done"}
+        assert runs == ["com.example.app"]
+    finally:
+        queue.stop()
+
+def test_failures_are_recorded(analysis_db, fake_pipeline):
+    queue = AnalysisJobQueue(str(analysis_db), workers=1)
+    try:
+        job = wait_for(queue, queue.submit("missing")["job_id"])
+        assert job["status"] == "failed"
+        assert "No app found" in job["error"]
+    finally:
+        queue.stop()
@@ -0,0 +1,65 @@
+import sqlite3
+import pytest
+from analysis.database import connect
+from analysis.migrations import MIGRATIONS, applied_migrations, migrate
+
+# The hot read paths of the server and the analysis, each of which must be an index lookup
+HOT_QUERIES = [
+    ("SELECT id, password, is_admin FROM users WHERE email = ?", ("a@example.com",)),
+    ("SELECT * FROM feedback WHERE user_id = ?", (1,)),
+    ("SELECT f.*, u.email FROM feedback f LEFT JOIN users u ON u.id = f.user_id "
+     "WHERE f.app_id = ? AND f.feedback_id < ? ORDER BY f.feedback_id DESC LIMIT 21", ("com.example.app", 100)),
+    ("SELECT 1 FROM manual_review WHERE app_id = ? AND status = 'pending'", ("com.example.app",)),
+    ("SELECT f.*, u.email, p.app_name FROM feedback f LEFT JOIN users u ON u.id = f.user_id "
+     "LEFT JOIN policies p ON p.app_id = f.app_id WHERE f.review_state = ? ORDER BY f.feedback_id DESC LIMIT 51",
+     ("pending",)),
+    ("SELECT app_id FROM analysis_log WHERE policy_digest = ? AND terms_version = ?", ("d", "v")),
+    ("SELECT sentence_text FROM analysis_sentences WHERE app_id = ? AND category = 'sensitive' "
+     "ORDER BY adjusted_score LIMIT 1", ("com.example.app",)),
+    ("SELECT app_id FROM analysis_sentence_terms WHERE term = ?", ("location",)),
+]
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = connect(str(tmp_path / "fresh.db"))
+    yield conn
+    conn.discard()
+
+def test_fresh_database_gets_every_step_once(conn):
+    assert migrate(conn) == [version for version, _, _ in MIGRATIONS]
+    assert applied_migrations(conn) == {version for version, _, _ in MIGRATIONS}
+    assert migrate(conn) == []
+
+def test_existing_database_is_upgraded_in_place(analysis_db):
+    conn = connect()
+    conn.execute("INSERT INTO policies (app_id, policy_text) VALUES ('com.example.app', 'Policy.')")
+    conn.commit()
+    migrate(conn)
+    assert conn.execute("SELECT policy_text FROM policies").fetchall() == [("Policy.",)]
+    conn.close()
+
+def test_failed_step_is_rolled_back_and_retried(conn):
+    def broken(conn):
+        conn.execute("CREATE TABLE half_done (id INTEGER)")
+        raise sqlite3.OperationalError("boom")
+
+    with pytest.raises(sqlite3.OperationalError):
+        migrate(conn, MIGRATIONS + [(99, "broken", broken)])
+    assert 99 not in applied_migrations(conn)
+    assert not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'half_done'").fetchone()
+    assert migrate(conn, MIGRATIONS + [(99, "fixed", lambda conn: None)]) == [99]
+
+@pytest.mark.parametrize("query,params", HOT_QUERIES)
+def test_hot_queries_use_an_index(conn, query, params):
+    migrate(conn)
+    plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + query, params)]
+    assert plan and all("USING" in step for step in plan if step.startswith("SCAN")), plan
+
+def test_review_state_is_backfilled(conn):
+    migrate(conn, [step for step in MIGRATIONS if step[0] < 5])
+    conn.executemany("INSERT INTO feedback (status, type) VALUES (?, ?)", [
+        ("Pending Review. App not found.", "New App Update"), ("Rejected. Spam", "Other - other Update"), ("NA", "comment")])
+    conn.commit()
+    migrate(conn)
+    assert conn.execute("SELECT review_state FROM feedback ORDER BY feedback_id").fetchall() == [
+        ("pending",), ("rejected",), (None,)]
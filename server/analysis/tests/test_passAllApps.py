@@ -0,0 +1,29 @@
+import sqlite3
+from analysis.passAllApps import select_app_ids, _analyze_one, run_batch
+from conftest import add_app
+
+def test_since_skips_apps_analysed_after_checkpoint(analysis_db, fake_pipeline):
+    for app_id in ("a", "b", "c"):
+        add_app(analysis_db, app_id, "We may sell your data. Contact us for more information.")
+    db = str(analysis_db)
+    assert select_app_ids(db, since="2025-01-01") == ["a", "b", "c"]
+
+    _analyze_one(("a", False, False, db, None))
+    conn = sqlite3.connect(db)
+    conn.execute("INSERT INTO analysis_log (app_id, analyse_time) VALUES ('b', '2024-06-01T00:00:00')")
+    conn.commit()
+    conn.close()
+
+    assert select_app_ids(db, since="2025-01-01") == ["b", "c"]
+
+def test_failures_are_isolated_per_app(analysis_db, fake_pipeline):
+    app_id, status, _, error = _analyze_one(("missing", False, False, str(analysis_db), None))
+    assert (app_id, status) == ("missing", "failed")
+    assert "No app found" in error
+
+def test_batch_summary(analysis_db, fake_pipeline):
+    for app_id in ("a", "b"):
+        add_app(analysis_db, app_id, "We may sell your data. Contact us for more information.")
+    summary = run_batch(workers=2, db_path=str(analysis_db))
+    assert (summary["total"], summary["analysed"], summary["failed"]) == (2, 2, 0)
+    assert run_batch(workers=1, db_path=str(analysis_db))["skipped"] == 2
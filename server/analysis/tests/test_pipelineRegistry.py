@@ -0,0 +1,42 @@
+import threading
+import pytest
+from analysis import pipelineRegistry
+
+
+@pytest.fixture
+def fake_build(monkeypatch):
+    builds = []
+
+    def build(processors, batch_size):
+        builds.append((processors, batch_size))
+        return lambda text: text
+
+    monkeypatch.setattr(pipelineRegistry, "_build_pipeline", build)
+    pipelineRegistry.shutdown()
+    yield builds
+    pipelineRegistry.shutdown()
+
+def test_pipeline_is_loaded_once_per_configuration(fake_build):
+    first = pipelineRegistry.get_pipeline('tokenize, sentiment', 32)
+    second = pipelineRegistry.get_pipeline('sentiment,tokenize', 32)
+    other = pipelineRegistry.get_pipeline('tokenize,sentiment', 8)
+
+    assert first is second
+    assert other is not first
+    assert fake_build == [('sentiment,tokenize', 32), ('sentiment,tokenize', 8)]
+
+def test_concurrent_callers_share_one_load(fake_build):
+    threads = [threading.Thread(target=pipelineRegistry.get_pipeline) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(fake_build) == 1
+
+def test_shutdown_releases_pipelines(fake_build):
+    pipelineRegistry.warm_up()
+    assert pipelineRegistry.loaded_pipelines()
+
+    pipelineRegistry.shutdown()
+    assert pipelineRegistry.loaded_pipelines() == []
@@ -0,0 +1,46 @@
+from analysis.policyChunker import chunk_sentences, sentence_spans, split_sentence_spans, stream_sentences
+
+POLICY = (
+    "We collect your email address. We never sell it!\n"
+    "Contact us at privacy@example.com for more information. "
+    "Data is kept (for up to 30 days.) Then it is deleted."
+)
+
+def test_sentences_are_never_split():
+    sentences = [POLICY[start:end] for start, end in split_sentence_spans(POLICY)]
+    assert sentences == [
+        "We collect your email address.",
+        "We never sell it!",
+        "Contact us at privacy@example.com for more information.",
+        "Data is kept (for up to 30 days.)",
+        "Then it is deleted.",
+    ]
+
+def test_chunks_respect_budget_and_record_positions():
+    sentences = [POLICY[start:end] for start, end in sentence_spans(POLICY)]
+    chunks = chunk_sentences(sentences, max_tokens=10)
+    seen = []
+    for chunk, members in chunks:
+        assert len(chunk.split()) <= 10
+        for index, start, end in members:
+            assert chunk[start:end] == sentences[index]
+            seen.append(index)
+    assert seen == list(range(len(sentences)))
+
+def test_oversized_sentence_is_cut_on_words():
+    text = " ".join(f"word{i}" for i in range(25))
+    pieces = [text[start:end] for start, end in sentence_spans(text, max_tokens=10)]
+    assert [len(piece.split()) for piece in pieces] == [10, 10, 5]
+    assert " ".join(pieces) == text
+
+def test_empty_policy():
+    assert sentence_spans("") == []
+    assert sentence_spans(None) == []
+    assert chunk_sentences([]) == []
+
+def test_stream_sentences_matches_whole_text_split():
+    text = ("We collect data (see below.) Then more!\n\nA heading\n" + "word " * 30 + "end. ") * 20
+    expected = [(start, text[start:end]) for start, end in sentence_spans(text, max_tokens=12)]
+    for size in (1, 7, 64, len(text)):
+        pieces = [text[i:i + size] for i in range(0, len(text), size)]
+        assert list(stream_sentences(pieces, max_tokens=12)) == expected
@@ -0,0 +1,91 @@
+import sqlite3
+import pytest
+import tracemalloc
+from analysis.NLPAnalysis_single import NLPAnalysis_single, StreamingSummary, ClassifiedSentence, read_policy_pieces
+from analysis.sentimentBackends import StanzaBackend
+from conftest import add_app
+
+BASE = ("We collect your fingerprint for biometric login. We may sell your usage data to advertisers. "
+        "Contact us for more information. Your settings are stored on the device. ")
+
+def stored(db_path):
+    conn = sqlite3.connect(db_path)
+    sentences = conn.execute('''
+        SELECT sentence_offset, sentence_text, score, category, matched_terms, adjusted_score
+        FROM analysis_sentences ORDER BY sentence_offset
+    ''').fetchall()
+    log = conn.execute('''
+        SELECT rating, privacy_sentiment, avg_sentiment, sentence_count, policy_digest, substr(privacy_concern, 1, 200)
+        FROM analysis_log
+    ''').fetchone()
+    conn.close()
+    return sentences, log
+
+def test_streaming_matches_whole_text_analysis(analysis_db, fake_pipeline):
+    add_app(analysis_db, "com.example.app", "Résumé of our policy.\n" + BASE * 300)
+    NLPAnalysis_single("com.example.app")
+    whole_sentences, whole_log = stored(analysis_db)
+
+    # Goes through the Stanza path, so new cache scores are staged while the blob is being read
+    NLPAnalysis_single("com.example.app", rerun_flag=True, stream=True)
+    streamed_sentences, streamed_log = stored(analysis_db)
+
+    assert streamed_sentences == whole_sentences
+    assert streamed_log == whole_log
+    assert streamed_log[3] == 1201
+
+def test_read_policy_pieces_reassembles_text(analysis_db):
+    text = "Données personnelles — 個人情報. " * 5000
+    add_app(analysis_db, "com.example.app", text)
+    conn = sqlite3.connect(analysis_db)
+    rowid = conn.execute("SELECT rowid FROM policies").fetchone()[0]
+    pieces = list(read_policy_pieces(conn, rowid, chunk_bytes=1000))
+    conn.close()
+    assert len(pieces) > 10
+    assert "".join(pieces) == text
+
+def test_summary_keeps_only_worst_k():
+    summary = StreamingSummary(worst_k=2)
+    for offset, score in enumerate([1, 0.5, 0, 2, 0, 1]):
+        summary.add(ClassifiedSentence(offset, f"s{offset}", f"s{offset}", "other", [], score, score))
+    summary.add(ClassifiedSentence(6, "g", "g", "generic", ["contact us"], 2, 2))
+
+    generic, sensitive, concerning, average = summary.summary()
+    assert concerning == [("s2", 0), ("s4", 0)]
+    assert generic == [("g", ["contact us"], 2)]
+    assert average == 6.5 / 7
+
+def test_streaming_memory_does_not_grow_with_policy_length(analysis_db):
+    peaks = []
+    for repeats in (300, 3000):
+        add_app(analysis_db, "com.example.app", BASE * repeats)
+        tracemalloc.start()
+        NLPAnalysis_single("com.example.app", rerun_flag=True, backend="lexicon", stream=True)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    # Ten times the text, roughly the same peak
+    assert peaks[1] < peaks[0] * 1.5
+
+def test_failed_stream_keeps_the_previous_analysis(analysis_db, fake_pipeline):
+    add_app(analysis_db, "com.example.app", "".join(f"We may sell record {i} to advertisers. " for i in range(600)))
+    NLPAnalysis_single("com.example.app", stream=True)
+    before = stored(analysis_db)
+    assert len(before[0]) == 600
+    conn = sqlite3.connect(analysis_db)
+    conn.execute("DELETE FROM sentence_sentiment")
+    conn.commit()
+    conn.close()
+
+    # Scores go into the sentiment cache batch by batch; inference fails on the second batch
+    class FailingBackend(StanzaBackend):
+        calls = 0
+
+        def score_counted(self, sentences):
+            self.calls += 1
+            if self.calls == 2:
+                raise RuntimeError("inference failed")
+            return super().score_counted(sentences)
+
+    with pytest.raises(RuntimeError):
+        NLPAnalysis_single("com.example.app", rerun_flag=True, backend=FailingBackend(), stream=True)
+    assert stored(analysis_db) == before
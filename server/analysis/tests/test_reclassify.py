@@ -0,0 +1,54 @@
+import json
+import sqlite3
+from analysis.NLPAnalysis_single import NLPAnalysis_single, SENSITIVE_TERMS_FILE
+from analysis.reclassify import reclassify_stale
+from conftest import add_app
+
+POLICY = "We store your shoe size for product recommendations. We may sell your browsing history to partners."
+
+def test_new_term_is_applied_without_running_the_pipeline(analysis_db, fake_pipeline):
+    add_app(analysis_db, "com.example.app", POLICY)
+    NLPAnalysis_single("com.example.app")
+    calls = fake_pipeline.calls
+
+    with open(SENSITIVE_TERMS_FILE, "a") as f:
+        f.write("\nshoe size")
+    summary = reclassify_stale(str(analysis_db))
+
+    assert summary["reclassified"] == 1
+    assert fake_pipeline.calls == calls
+
+    conn = sqlite3.connect(analysis_db)
+    sensitive, privacy_concern = conn.execute("SELECT sensitive_sentences, privacy_concern FROM analysis_log").fetchone()
+    conn.close()
+    assert "shoe size" in sensitive
+    # The shoe-size sentence now carries the -0.5 sensitive penalty
+    assert [eval(item)[1] for item in json.loads(privacy_concern)] == [0, 0.5]
+
+def test_up_to_date_and_legacy_analyses_are_not_reclassified(analysis_db, fake_pipeline):
+    add_app(analysis_db, "com.example.app", POLICY)
+    NLPAnalysis_single("com.example.app")
+    assert reclassify_stale(str(analysis_db))["reclassified"] == 0
+
+    conn = sqlite3.connect(analysis_db)
+    conn.execute("INSERT INTO analysis_log (app_id) VALUES ('com.example.legacy')")
+    conn.commit()
+    conn.close()
+    assert reclassify_stale(str(analysis_db))["needs_reanalysis"] == ["com.example.legacy"]
+
+def test_reclassified_lists_keep_only_the_worst_sentences(analysis_db, fake_pipeline, monkeypatch):
+    add_app(analysis_db, "com.example.app", " ".join(f"We may sell record {i} to partners." for i in range(5)))
+    NLPAnalysis_single("com.example.app")
+    monkeypatch.setattr("analysis.reclassify.DEFAULT_WORST_K", 2)
+
+    with open(SENSITIVE_TERMS_FILE, "a") as f:
+        f.write("\nrecord")
+    assert reclassify_stale(str(analysis_db))["reclassified"] == 1
+
+    conn = sqlite3.connect(analysis_db)
+    sensitive, privacy_concern, sentence_count = conn.execute(
+        "SELECT sensitive_sentences, privacy_concern, sentence_count FROM analysis_log").fetchone()
+    stored_sentences = conn.execute("SELECT COUNT(*) FROM analysis_sentences").fetchone()[0]
+    conn.close()
+    assert (len(json.loads(sensitive)), len(json.loads(privacy_concern))) == (2, 2)
+    assert (sentence_count, stored_sentences) == (5, 5)
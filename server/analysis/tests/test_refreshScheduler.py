@@ -0,0 +1,128 @@
+import sqlite3
+from analysis.NLPAnalysis_single import NLPAnalysis_single
+from analysis.migrations import migrate
+from analysis.refreshScheduler import RefreshScheduler, MAX_ATTEMPTS
+from conftest import add_app
+
+POLICY = "We collect your fingerprint for biometric login. Contact us for more information."
+
+def stale(db_path):
+    conn = sqlite3.connect(db_path)
+    rows = dict(conn.execute("SELECT app_id, attempts FROM analysis_stale"))
+    conn.close()
+    return rows
+
+def track(db_path):
+    conn = sqlite3.connect(db_path)
+    migrate(conn)
+    conn.close()
+
+def test_changes_mark_apps_stale(analysis_db):
+    add_app(analysis_db, "com.example.old", POLICY)
+    track(analysis_db)
+    assert stale(analysis_db) == {"com.example.old": 0}  # never analysed
+    conn = sqlite3.connect(analysis_db)
+    conn.execute("DELETE FROM analysis_stale")
+    conn.commit()
+
+    add_app(analysis_db, "com.example.new", POLICY)
+    conn.execute("UPDATE policies SET permissions = 'take pictures (Camera)' WHERE app_id = 'com.example.old'")
+    conn.execute("UPDATE policies SET rating = 'good' WHERE app_id = 'com.example.old'")
+    conn.commit()
+    conn.close()
+    assert set(stale(analysis_db)) == {"com.example.old", "com.example.new"}
+
+def test_migration_marks_apps_changed_since_analysis(analysis_db, fake_pipeline):
+    for app_id in ("analysed", "changed", "never"):
+        add_app(analysis_db, app_id, POLICY)
+    NLPAnalysis_single("analysed")
+    NLPAnalysis_single("changed")
+
+    # A database analysed before the change tracking, where the changes fired no trigger
+    conn = sqlite3.connect(analysis_db)
+    conn.execute("DROP TABLE analysis_stale")
+    conn.execute("DROP TABLE app_demand")
+    conn.execute("DROP TRIGGER policies_stale_on_insert")
+    conn.execute("DROP TRIGGER policies_stale_on_update")
+    conn.execute("DELETE FROM schema_migrations WHERE version = 9")
+    conn.commit()
+    conn.close()
+    add_app(analysis_db, "changed", POLICY + " We may sell your data.")
+    track(analysis_db)
+    assert set(stale(analysis_db)) == {"changed", "never"}
+
+def test_most_demanded_apps_first(analysis_db):
+    track(analysis_db)
+    for app_id in ("quiet", "viewed", "discussed"):
+        add_app(analysis_db, app_id, POLICY)
+    conn = sqlite3.connect(analysis_db)
+    conn.execute("INSERT INTO feedback (app_id) VALUES ('discussed')")
+    conn.commit()
+
+    scheduler = RefreshScheduler(str(analysis_db), cpu_budget=1, analyze=lambda *args: None)
+    for _ in range(3):
+        scheduler.record_view("viewed")
+    scheduler.flush_views(conn)
+    assert [row[0] for row in scheduler.pending(conn)] == ["discussed", "viewed", "quiet"]
+    conn.close()
+
+def test_run_once_reanalyses_and_clears(analysis_db, fake_pipeline):
+    track(analysis_db)
+    add_app(analysis_db, "com.example.app", POLICY)
+    scheduler = RefreshScheduler(str(analysis_db), cpu_budget=1)
+    assert scheduler.run_once() == "com.example.app"
+    assert scheduler.run_once() is None
+    assert stale(analysis_db) == {}
+
+    conn = sqlite3.connect(analysis_db)
+    assert conn.execute("SELECT COUNT(*) FROM analysis_log").fetchone()[0] == 1
+    conn.close()
+
+def test_change_during_analysis_keeps_app_stale(analysis_db):
+    track(analysis_db)
+    add_app(analysis_db, "com.example.app", POLICY)
+
+    def analyze(app_id, *args):
+        add_app(analysis_db, app_id, POLICY + " We may sell your data.")
+
+    RefreshScheduler(str(analysis_db), cpu_budget=1, analyze=analyze).run_once()
+    assert stale(analysis_db) == {"com.example.app": 0}
+
+def test_failures_are_retried_then_given_up(analysis_db):
+    track(analysis_db)
+    add_app(analysis_db, "com.example.app", POLICY)
+
+    def analyze(*args):
+        raise RuntimeError("boom")
+
+    scheduler = RefreshScheduler(str(analysis_db), cpu_budget=1, analyze=analyze)
+    for _ in range(MAX_ATTEMPTS):
+        assert scheduler.run_once() == "com.example.app"
+    assert scheduler.run_once() is None
+    assert scheduler.status()["given_up"] == 1
+
+def test_loop_survives_unexpected_errors(analysis_db, monkeypatch):
+    scheduler = RefreshScheduler(str(analysis_db), poll_seconds=0)
+    calls = []
+
+    def run_once():
+        calls.append(1)
+        if len(calls) == 1:
+            raise ValueError("unexpected")
+        scheduler._stopping.set()
+
+    monkeypatch.setattr(scheduler, "run_once", run_once)
+    scheduler._run()
+    assert len(calls) == 2
+
+def test_cpu_budget_rests_after_each_analysis(analysis_db, monkeypatch):
+    track(analysis_db)
+    add_app(analysis_db, "com.example.app", POLICY)
+    scheduler = RefreshScheduler(str(analysis_db), cpu_budget=0.25, analyze=lambda *args: None)
+    waits = []
+    monkeypatch.setattr(scheduler._stopping, "wait", waits.append)
+    times = iter([10.0, 12.0])
+    monkeypatch.setattr("analysis.refreshScheduler.time.time", lambda: next(times))
+
+    scheduler.run_once()
+    assert waits == [6.0]
@@ -0,0 +1,72 @@
+import sqlite3
+import pytest
+from analysis.NLPAnalysis_single import NLPAnalysis_single
+from analysis.database import connect
+from conftest import add_app
+
+@pytest.fixture
+def client(analysis_db):
+    import server
+    add_app(analysis_db, "com.example.chat", "We collect your contacts to find friends.")
+    add_app(analysis_db, "com.example.maps",
+            "We collect your fingerprint for biometric login. We may sell your location history to partners.")
+    conn = server.get_db_connection()  # the first connection indexes the apps already in the catalogue
+    conn.executemany("UPDATE policies SET app_name = ?, category = ?, rating = ? WHERE app_id = ?", [
+        ("Friendly Chat", "Social", "good", "com.example.chat"),
+        ("City Maps", "Travel", "bad", "com.example.maps"),
+    ])
+    conn.commit()
+    conn.close()
+    return server.app.test_client()
+
+def search(client, query, **params):
+    response = client.get("/search", query_string=dict(q=query, **params))
+    assert response.status_code == 200
+    return response.get_json()
+
+def test_search_by_name_category_and_policy_text(client):
+    assert [app["app_id"] for app in search(client, "chat")["apps"]] == ["com.example.chat"]
+    assert [app["app_id"] for app in search(client, "travel")["apps"]] == ["com.example.maps"]
+    result = search(client, "location history")
+    assert result["apps"][0]["app_name"] == "City Maps" and result["total"] == 1
+    assert "[location] [history]" in result["apps"][0]["snippet"]
+    # The last word is a prefix, and FTS5 syntax in the text is taken literally
+    assert search(client, "frien")["total"] == 1
+    assert search(client, 'contacts" OR "sell')["total"] == 0
+
+def test_index_follows_writes(client, fake_pipeline, analysis_db):
+    conn = sqlite3.connect(analysis_db)
+    # The scrapers save a policy with INSERT OR REPLACE
+    conn.execute("INSERT OR REPLACE INTO policies (app_id, app_name, policy_text) VALUES "
+                 "('com.example.chat', 'Friendly Chat', 'We read your messages.')")
+    conn.commit()
+    conn.close()
+    assert search(client, "contacts")["total"] == 0
+    assert search(client, "messages")["total"] == 1
+
+    # Flagged sentences come from the analysis, as written in the policy
+    NLPAnalysis_single("com.example.maps")
+    conn = connect()
+    flagged = conn.execute("SELECT flagged_sentences FROM app_search WHERE app_search MATCH 'app_id:maps'").fetchone()[0]
+    assert flagged == "We collect your fingerprint for biometric login."
+    conn.execute("DELETE FROM policies WHERE app_id = 'com.example.maps'")
+    conn.commit()
+    conn.close()
+    assert search(client, "partners")["total"] == 0
+
+def test_ranked_pages_and_filters(client):
+    for i in range(5):
+        conn = connect()
+        conn.execute("INSERT INTO policies (app_id, app_name, policy_text) VALUES (?, ?, ?)",
+                     (f"com.more.app{i}", f"Tracker {i}", "We share data with partners."))
+        conn.commit()
+        conn.close()
+    # A match in the app name ranks above matches in policy text
+    assert search(client, "maps partners")["apps"][0]["app_id"] == "com.example.maps"
+    first = search(client, "partners", limit=4)
+    second = search(client, "partners", limit=4, after=first["next"])
+    assert (first["total"], len(first["apps"]), second["next"]) == (6, 4, None)
+    assert {app["app_id"] for app in first["apps"] + second["apps"]} == {
+        "com.example.maps", *(f"com.more.app{i}" for i in range(5))}
+    assert [app["app_id"] for app in search(client, "partners", rating="bad")["apps"]] == ["com.example.maps"]
+    assert client.get("/search?q=%20").status_code == 400
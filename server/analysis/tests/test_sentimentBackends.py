@@ -0,0 +1,84 @@
+import sqlite3
+import pytest
+from analysis.jobQueue import AnalysisJobQueue
+from analysis.NLPAnalysis_single import NLPAnalysis_single, provisional_analysis
+from analysis.backendCalibration import calibrate
+from analysis.sentimentBackends import LexiconBackend, get_backend
+from conftest import add_app
+
+POLICY = ("We collect your fingerprint for biometric login. We may sell your usage data to advertisers. "
+          "Contact us for more information. Your data is encrypted and protected.")
+
+def test_lexicon_scores_on_stanza_scale():
+    backend = LexiconBackend()
+    assert backend.score([
+        "We may sell your usage data to advertisers.",
+        "We do not sell your personal information.",
+        "We never share your location.",
+        "Your data is encrypted and protected.",
+        "Your settings are stored on the device.",
+    ]) == [0, 2, 2, 2, 1]
+
+def test_get_backend():
+    assert get_backend("lexicon").name == "lexicon"
+    with pytest.raises(ValueError):
+        get_backend("missing")
+
+def test_backend_is_stored_and_part_of_the_unchanged_check(analysis_db, fake_pipeline):
+    add_app(analysis_db, "com.example.app", POLICY)
+    NLPAnalysis_single("com.example.app", backend="lexicon")
+    assert fake_pipeline.calls == 0
+
+    conn = sqlite3.connect(analysis_db)
+    assert conn.execute("SELECT sentiment_backend FROM analysis_log").fetchone() == ("lexicon",)
+    # Lexicon scores are not mixed into the Stanza sentiment cache
+    assert conn.execute("SELECT COUNT(*) FROM sentence_sentiment").fetchone() == (0,)
+
+    # Same inputs but a different backend: --force re-analyses instead of returning the stored result
+    assert NLPAnalysis_single("com.example.app", force_flag=True) is None
+    assert fake_pipeline.calls == 1
+    assert conn.execute("SELECT sentiment_backend FROM analysis_log").fetchone() == ("stanza",)
+    conn.close()
+
+def test_provisional_analysis_stores_nothing(analysis_db):
+    add_app(analysis_db, "com.example.app", POLICY)
+    result = provisional_analysis("com.example.app", str(analysis_db))
+
+    assert result["provisional"] is True
+    assert result["sentiment_backend"] == "lexicon"
+    assert result["privacy_concern"] == "we may sell your usage data to advertisers."
+    assert result["rating"] in ("good", "okay", "bad")
+    conn = sqlite3.connect(analysis_db)
+    assert conn.execute("SELECT rating FROM policies").fetchone() == (None,)
+    conn.close()
+
+    with pytest.raises(LookupError):
+        provisional_analysis("com.missing.app", str(analysis_db))
+
+def test_nlp_provisional_answers_and_queues_accurate_analysis(analysis_db, monkeypatch):
+    import server
+    add_app(analysis_db, "com.example.app", POLICY)
+    queue = AnalysisJobQueue(str(analysis_db), workers=1, analyze=lambda *args: {"message": "done"})
+    monkeypatch.setattr(server, "job_queue", queue)
+    try:
+        response = server.app.test_client().get("/nlp?app_id=com.example.app&provisional=true")
+        assert response.status_code == 202
+        body = response.get_json()
+        assert body["provisional"]["rating"] in ("good", "okay", "bad")
+        assert queue.get(body["job_id"])["app_id"] == "com.example.app"
+
+        assert server.app.test_client().get("/nlp?app_id=com.missing.app&provisional=true").status_code == 404
+    finally:
+        queue.stop()
+
+def test_calibration_compares_with_stored_stanza_scores(analysis_db, fake_pipeline):
+    add_app(analysis_db, "com.example.app", POLICY)
+    NLPAnalysis_single("com.example.app")
+
+    report = calibrate(str(analysis_db))
+    assert (report["apps"], report["sentences"]) == (1, 4)
+    # FakePipeline: 'sell' -> 0, otherwise 1; the lexicon scores the encrypted/protected sentence 2
+    assert report["sentence_confusion"]["0"]["0"] == 1
+    assert report["sentence_confusion"]["1"]["2"] == 1
+    assert report["sentence_agreement"] == 0.75
+    assert sum(sum(row.values()) for row in report["rating_confusion"].values()) == 1
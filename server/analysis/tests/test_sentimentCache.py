@@ -0,0 +1,64 @@
+import sqlite3
+from analysis.NLPAnalysis_single import process_policy, score_policy_sentences
+from analysis.migrations import migrate
+from analysis.sentimentCache import SentimentCache
+
+POLICY = "We may sell your data to advertisers. We keep your email address safe. We may sell your data to advertisers."
+OTHER_POLICY = "WE MAY SELL YOUR DATA TO ADVERTISERS.  Your photos stay on your device."
+
+def memory_db():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    return conn
+
+def test_repeated_sentences_are_scored_once_across_apps(fake_pipeline):
+    cache = SentimentCache(memory_db())
+
+    first = score_policy_sentences(POLICY, cache=cache)
+    assert [score for _, _, score in first] == [0, 1, 0]
+    assert [POLICY[offset:offset + len(text)] for offset, text, _ in first] == [text for _, text, _ in first]
+    assert fake_pipeline.sentences_scored == 2
+
+    # Normalisation makes the upper-case copy of the boilerplate sentence a cache hit
+    score_policy_sentences(OTHER_POLICY, cache=cache)
+    assert fake_pipeline.sentences_scored == 3
+    assert cache.hits == 1 and cache.misses == 3
+
+def test_cache_evicts_least_recently_used(fake_pipeline):
+    cache = SentimentCache(memory_db(), max_entries=2)
+    cache.put_many({"a": 1.0})
+    cache.flush()
+    cache.put_many({"b": 0.0})
+    cache.flush()
+    cache.get_many(["a"])
+    cache.put_many({"c": 2.0})
+    cache.flush()
+
+    assert cache.size() == 2
+    assert set(cache.get_many(["a", "b", "c"])) == {"a", "c"}
+    assert cache.stats()["evictions"] == 1
+
+def test_nothing_is_written_or_committed_before_flush(fake_pipeline):
+    conn = memory_db()
+    cache = SentimentCache(conn)
+    cache.put_many({"a": 1.0})
+    assert cache.get_many(["a"]) == {"a": 1.0}
+    assert cache.size() == 0
+    cache.flush()
+    conn.commit()
+    stored = conn.execute("SELECT last_used FROM sentence_sentiment").fetchone()[0]
+
+    # Lookups do not write; the hit's last_used is written by the next flush, uncommitted
+    changes = conn.total_changes
+    cache.get_many(["a", "b"])
+    assert conn.total_changes == changes and not conn.in_transaction
+    cache.flush()
+    assert conn.execute("SELECT last_used FROM sentence_sentiment").fetchone()[0] >= stored
+    assert conn.in_transaction
+
+def test_process_policy_results_match_with_and_without_cache(fake_pipeline):
+    cache = SentimentCache(memory_db())
+    terms = (["email"], ["contact us"])
+    uncached = process_policy(POLICY, *terms)
+    process_policy(POLICY, *terms, cache=cache)
+    assert process_policy(POLICY, *terms, cache=cache) == uncached
@@ -0,0 +1,84 @@
+import sqlite3
+from analysis.NLPAnalysis_single import NLPAnalysis_single
+from analysis.passAllApps import group_by_policy, run_batch
+from conftest import add_app
+
+POLICY = ("We collect your fingerprint for biometric login. We may sell your usage data to advertisers. "
+          "Contact us for more information. Your settings are stored on the device.")
+
+def stored(db_path, app_id):
+    conn = sqlite3.connect(db_path)
+    log = conn.execute('''
+        SELECT privacy_concern, sensitive_sentences, generic_sentences, privacy_sentiment, sentence_count,
+               worst_permissions, rating
+        FROM analysis_log WHERE app_id = ?
+    ''', (app_id,)).fetchone()
+    sentences = conn.execute('''
+        SELECT sentence_offset, sentence_text, score, category, matched_terms, adjusted_score
+        FROM analysis_sentences WHERE app_id = ? ORDER BY sentence_offset
+    ''', (app_id,)).fetchall()
+    terms = conn.execute("SELECT term, sentence_offset FROM analysis_sentence_terms WHERE app_id = ? ORDER BY 1, 2",
+                         (app_id,)).fetchall()
+    policy = conn.execute("SELECT privacy_concern, worst_permissions, rating FROM policies WHERE app_id = ?",
+                          (app_id,)).fetchone()
+    conn.close()
+    return log, sentences, terms, policy
+
+def test_apps_sharing_a_policy_reuse_its_analysis(analysis_db, fake_pipeline, capsys):
+    add_app(analysis_db, "com.publisher.one", POLICY, permissions="precise location (Location)")
+    add_app(analysis_db, "com.publisher.two", POLICY, permissions="read the contents of your USB storage (Storage)")
+
+    NLPAnalysis_single("com.publisher.one")
+    capsys.readouterr()
+    NLPAnalysis_single("com.publisher.two")
+    assert "Reusing its policy analysis" in capsys.readouterr().out
+
+    one_log, one_sentences, one_terms, one_policy = stored(analysis_db, "com.publisher.one")
+    two_log, two_sentences, two_terms, two_policy = stored(analysis_db, "com.publisher.two")
+    # Policy-level results are fanned out; permissions and rating are per app
+    assert two_log[:5] == one_log[:5]
+    assert two_sentences == one_sentences and two_terms == one_terms
+    assert two_policy[0] == one_policy[0] == "we may sell your usage data to advertisers."
+    assert (one_log[5], two_log[5]) == ('["(\'location\', \'precise location\', 0.1)"]',
+                                        '["(\'storage\', \'read the contents of your USB storage\', 1.0)"]')
+    assert (one_policy[2], two_policy[2]) == ("bad", "okay")
+
+def test_rerun_does_not_reuse(analysis_db, fake_pipeline, capsys):
+    add_app(analysis_db, "com.publisher.one", POLICY)
+    add_app(analysis_db, "com.publisher.two", POLICY)
+    NLPAnalysis_single("com.publisher.one")
+    capsys.readouterr()
+    NLPAnalysis_single("com.publisher.two", rerun_flag=True)
+    assert "Reusing" not in capsys.readouterr().out
+
+def test_batch_runs_nlp_once_per_distinct_policy(analysis_db, fake_pipeline):
+    for app_id in ("a", "b", "c"):
+        add_app(analysis_db, app_id, POLICY)
+    add_app(analysis_db, "d", "Your settings are stored on the device.")
+    db = str(analysis_db)
+    assert group_by_policy(db, ["a", "b", "c", "d"]) == [["a", "b", "c"], ["d"]]
+
+    summary = run_batch(workers=2, rerun_flag=True, db_path=db)
+    assert (summary["total"], summary["distinct_policies"], summary["analysed"]) == (4, 2, 4)
+    assert stored(db, "b")[1] == stored(db, "a")[1] == stored(db, "c")[1]
+    assert len(stored(db, "d")[1]) == 1
+
+    # Only the first app of each group split and scored its policy
+    conn = sqlite3.connect(db)
+    assert dict(conn.execute("SELECT app_id, sentence_count FROM analysis_timings")) == {"a": 4, "b": 0, "c": 0, "d": 1}
+    conn.close()
+
+def test_grouping_reads_only_changed_policies(analysis_db, fake_pipeline, monkeypatch):
+    for app_id in ("a", "b"):
+        add_app(analysis_db, app_id, POLICY)
+    db = str(analysis_db)
+    run_batch(workers=1, db_path=db)
+    hashed = []
+    monkeypatch.setattr("analysis.passAllApps.content_digest", lambda text: hashed.append(text) or text)
+
+    # Both analyses are current: their stored digests group them
+    assert group_by_policy(db, ["a", "b"]) == [["a", "b"]]
+    assert hashed == []
+    add_app(analysis_db, "b", "Your settings are stored on the device.")
+    assert group_by_policy(db, ["a", "b"]) == [["a"], ["b"]]
+    assert hashed == ["Your settings are stored on the device."]
@@ -0,0 +1,42 @@
+from analysis.NLPAnalysis_single import classify_sentences, is_generic_sentence
+from analysis.termMatcher import get_generic_matcher, get_sensitive_matcher, terms_version
+
+GENERIC_TERMS = ["privacy", "Privacy Policy", "privacy center", "contact us", "will not receive", "receive", "is available at www. "]
+SENSITIVE_TERMS = ["location", "geolocation", "address", "email", "insurance", "insurance", "DNA"]
+
+def test_privacy_is_not_matched_inside_privacy_policy():
+    assert get_generic_matcher(GENERIC_TERMS).find("read our privacy policy for details") == ["privacy policy"]
+    assert get_generic_matcher(GENERIC_TERMS).find("visit the privacy center for details") == ["privacy", "privacy center"]
+
+def test_negated_terms_are_ignored():
+    matcher = get_generic_matcher(GENERIC_TERMS)
+    assert matcher.find("you will not receive any marketing") == ["will not receive"]
+    assert matcher.find("we do not receive your data from partners") == []
+    assert matcher.find("please never contact us about this") == []
+
+def test_whole_word_rule():
+    assert get_generic_matcher(GENERIC_TERMS).find("we keep your receivers list private") == []
+    assert get_generic_matcher(GENERIC_TERMS).find("the policy is available at www.example.com now") == ["is available at www."]
+
+def test_sensitive_terms_are_substrings_in_list_order():
+    matcher = get_sensitive_matcher(SENSITIVE_TERMS)
+    assert matcher.find("we use geolocation and your ip address") == ["location", "geolocation", "address"]
+    assert matcher.find("your insurance provider") == ["insurance", "insurance"]
+    # Sentences are lower-cased before matching, so upper-case terms never match (unchanged behaviour)
+    assert matcher.find("dna samples are never collected") == []
+
+def test_short_sentences_are_generic():
+    assert is_generic_sentence("Contact us", GENERIC_TERMS) == (True, "sentence fewer than 4 words")
+    assert is_generic_sentence("Please Contact Us with any questions", GENERIC_TERMS) == (True, ["contact us"])
+
+def test_matcher_is_built_once_per_term_list_version():
+    assert get_generic_matcher(list(GENERIC_TERMS)) is get_generic_matcher(list(GENERIC_TERMS))
+    assert get_generic_matcher(GENERIC_TERMS + ["support"]) is not get_generic_matcher(GENERIC_TERMS)
+    assert terms_version(GENERIC_TERMS) != terms_version(GENERIC_TERMS + ["support"])
+
+def test_empty_term_lists_match_nothing():
+    assert get_generic_matcher([]).find("contact us about your privacy") == []
+    assert get_sensitive_matcher([]).find("we share your location") == []
+    # e.g. missing term files, which load_terms reads as []
+    classified = classify_sentences([(0, "We share your location with partners.", 0)], [], [])
+    assert [(s.category, s.matched_terms) for s in classified] == [("other", [])]
@@ -2,61 +2,141 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 import sqlite3
 import bcrypt
+import json
 import datetime
-from analysis.NLPAnalysis_single import NLPAnalysis_single
+import atexit
+from analysis.NLPAnalysis_single import NLPAnalysis_single, provisional_analysis
+from analysis.pipelineRegistry import warm_up, shutdown as shutdown_pipelines
+from analysis.inferenceScheduler import shutdown as shutdown_scheduler
+from analysis.reclassify import reclassify_stale
+from analysis.jobQueue import AnalysisJobQueue
+from analysis.refreshScheduler import RefreshScheduler
+from analysis.database import connect, close_all as close_connections
+from analysis.catalogueCache import CatalogueCache
+from analysis.migrations import REVIEW_STATES, ensure_schema
 
 app = Flask(__name__)
 CORS(app)
 
-DATABASE = 'scrapers/privacy_policies.db'
+# The database is configured in analysis.database ($PRIVACY_DB_PATH or scrapers/privacy_policies.db)
+# and shared with the analysis, which runs on the same connection pool
+
+# Background workers for /nlp/jobs; started on the first submission
+job_queue = AnalysisJobQueue()
+
+# Re-analyses apps whose policy or permissions changed, most viewed first; started in __main__
+refresh_scheduler = RefreshScheduler()
+
+# Encoded /apps and /app/<app_id> responses, invalidated by any write to the catalogue tables
+catalogue_cache = CatalogueCache()
 
 def get_db_connection():
-    conn = sqlite3.connect(DATABASE)
-    conn.execute('PRAGMA foreign_keys = ON')  # Enable foreign key constraints
-    conn.row_factory = sqlite3.Row
+    # Pooled WAL connection; close() hands it back to the pool. The first connection of the
+    # process brings the schema up to date.
+    conn = connect(row_factory=sqlite3.Row, foreign_keys=True)
+    ensure_schema(conn)
     return conn
 
-# Endpoint to fetch all apps
+APP_FIELDS = ["app_id", "app_name", "icon_url", "rating", "permissions", "category"]
+MAX_APPS_PAGE = 500
+
+def extract_permission_types(permission_string):
+    """Extracts permission categories from raw permission text."""
+    if not permission_string:
+        return []
+    permissions = permission_string.split(";")  # Assuming permissions are separated by ";"
+    extracted_permissions = set()
+    for perm in permissions:
+        if "(" in perm and ")" in perm:
+            permission_type = perm.split("(")[-1].replace(")", "").strip()
+            extracted_permissions.add(permission_type)
+    return list(extracted_permissions)
+
+def app_filters(args):
+    """
+    SQL conditions and parameters for the /apps filters:
+    rating and category (comma-separated, any of), permission (comma-separated, all of)
+    and q (app name contains).
+    """
+    conditions, params = [], []
+    for column in ('rating', 'category'):
+        values = [value.strip().lower() for value in args.get(column, '').split(',') if value.strip()]
+        if values:
+            conditions.append(f"lower(p.{column}) IN ({','.join(['?'] * len(values))})")
+            params += values
+    for permission in [value.strip() for value in args.get('permission', '').split(',') if value.strip()]:
+        # Same rule as extract_permission_types: the type is the text in brackets
+        conditions.append("p.permissions LIKE ?")
+        params.append(f"%({permission})%")
+    if args.get('q'):
+        conditions.append("p.app_name LIKE ?")
+        params.append(f"%{args['q'].strip()}%")
+    return conditions, params
+
+# Apps in the catalogue, e.g. /apps?limit=50&fields=app_id,app_name,icon_url&rating=good,okay
+# Without limit every matching app is returned as a list. With limit the response is one page,
+# {"apps": [...], "next": <cursor>, "total": <matching apps>}; pass the cursor back as after=
+# for the following page. Responses are served from catalogue_cache and carry an ETag;
+# If-None-Match gets a 304.
 @app.route('/apps', methods=['GET'])
 def get_apps():
+    return catalogue_cache.respond(request, build_apps_response)
+
+def build_apps_response():
+    fields = [field.strip() for field in request.args.get('fields', ','.join(APP_FIELDS)).split(',') if field.strip()]
+    unknown = [field for field in fields if field not in APP_FIELDS]
+    if unknown or not fields:
+        return jsonify({'error': f"Invalid fields. Use any of: {', '.join(APP_FIELDS)}"}), 400
+    limit = request.args.get('limit', type=int)
+    if limit is not None and not 0 < limit <= MAX_APPS_PAGE:
+        return jsonify({'error': f'limit must be between 1 and {MAX_APPS_PAGE}'}), 400
+    after = request.args.get('after')
+
+    conditions, params = app_filters(request.args)
+    columns = ["p.app_id"] + [f"p.{field}" for field in fields if field not in ("app_id", "icon_url")]
+    join = ''
+    if "icon_url" in fields:
+        columns.append("i.icon_url")
+        join = 'LEFT JOIN app_icons i ON i.app_id = p.app_id'
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    page_where = f"WHERE {' AND '.join(conditions + ['p.app_id > ?'])}" if after is not None else where
+
     conn = get_db_connection()
-    # Fetch all app details from the policies table
-    apps = conn.execute('SELECT app_id, app_name, rating, permissions, category FROM policies').fetchall()
-    # Fetch all icons from the app_icons table
-    icons = conn.execute('SELECT app_id, icon_url FROM app_icons').fetchall()
-    conn.close()
+    try:
+        # Keyset pagination on the primary key: each page is an index range scan
+        query = f"SELECT {', '.join(columns)} FROM policies p {join} {page_where} ORDER BY p.app_id"
+        page_params = params + ([after] if after is not None else [])
+        if limit is not None:
+            # One extra row tells whether there is a next page
+            rows = conn.execute(query + " LIMIT ?", page_params + [limit + 1]).fetchall()
+            total = conn.execute(f"SELECT COUNT(*) FROM policies p {where}", params).fetchone()[0]
+        else:
+            rows = conn.execute(query, page_params).fetchall()
+    except sqlite3.Error as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        conn.close()
 
-    # Create a mapping from app_id to icon_url
-    icon_map = {icon["app_id"]: icon["icon_url"] for icon in icons}
-
-    def extract_permission_types(permission_string):
-        """Extracts permission categories from raw permission text."""
-        if not permission_string:
-            return []
-        permissions = permission_string.split(";")  # Assuming permissions are separated by ";"
-        extracted_permissions = set()
-        for perm in permissions:
-            if "(" in perm and ")" in perm:
-                permission_type = perm.split("(")[-1].replace(")", "").strip()
-                extracted_permissions.add(permission_type)
-        return list(extracted_permissions)
-    
-    # Convert rows to dict and merge icon data
-    result = []
-    for app in apps:
-        result.append({
-            "app_id": app["app_id"],
-            "app_name": app["app_name"],
-            "icon_url": icon_map.get(app["app_id"]),  # Use the mapping to add the icon URL.
-            "rating": app["rating"],
-            "permissions": extract_permission_types(app["permissions"]),
-            "category": app["category"]
-        })
-    return jsonify(result)
+    more = limit is not None and len(rows) > limit
+    rows = rows[:limit] if limit is not None else rows
+    apps = []
+    for row in rows:
+        app_data = {field: row[field] for field in fields if field != "permissions"}
+        if "permissions" in fields:
+            app_data["permissions"] = extract_permission_types(row["permissions"])
+        apps.append(app_data)
+
+    if limit is None:
+        return jsonify(apps)
+    return jsonify({'apps': apps, 'next': rows[-1]["app_id"] if more else None, 'total': total})
 
 # Endpoint to fetch details for a specific app by its app_id
 @app.route('/app/<string:app_id>', methods=['GET'])
 def get_app_details(app_id):
+    refresh_scheduler.record_view(app_id)
+    return catalogue_cache.respond(request, lambda: build_app_details_response(app_id))
+
+def build_app_details_response(app_id):
     conn = get_db_connection()
     
     # Fetch details from policies table
@@ -73,6 +153,15 @@ def get_app_details(app_id):
         WHERE app_id = ?
     ''', (app_id,)).fetchone()
     
+    # Compact format: one table of analysed sentences instead of the stringified-tuple lists
+    compact = request.args.get('format') == 'compact'
+    sentences = None
+    if compact and analysis_details:
+        sentences = conn.execute('''
+            SELECT sentence_offset, sentence_text, category, matched_terms, adjusted_score
+            FROM analysis_sentences WHERE app_id = ? ORDER BY sentence_offset
+        ''', (app_id,)).fetchall()
+
     conn.close()
     
     if app_details:
@@ -80,12 +169,139 @@ def get_app_details(app_id):
         result['icon_url'] = icon_details['icon_url'] if icon_details else None
 
         if analysis_details:
-            result.update(dict(analysis_details))
+            analysis = dict(analysis_details)
+            if compact:
+                for column in ('privacy_concern', 'sensitive_sentences', 'generic_sentences'):
+                    analysis.pop(column)
+                result['sentences'] = compact_sentences(sentences)
+            result.update(analysis)
 
         return jsonify(result)
     else:
         return jsonify({'error': 'App not found'}), 404
+
+SENTENCE_FIELDS = ["offset", "text", "category", "terms", "score"]
+
+def compact_sentences(rows):
+    """Encode analysis_sentences rows as {"fields": [...], "rows": [[...], ...]}."""
+    return {
+        "fields": SENTENCE_FIELDS,
+        "rows": [[row["sentence_offset"], row["sentence_text"], row["category"],
+                  json.loads(row["matched_terms"] or "[]"), row["adjusted_score"]] for row in rows]
+    }
+
+SENTENCE_CATEGORIES = {
+    'generic': ('generic',),
+    'sensitive': ('sensitive',),
+    'other': ('other',),
+    'concerning': ('sensitive', 'other'),  # everything that is not generic
+}
+
+# Worst analysed sentences of an app, e.g. /app/<app_id>/sentences?category=concerning&limit=5
+@app.route('/app/<string:app_id>/sentences', methods=['GET'])
+def get_app_sentences(app_id):
+    category = request.args.get('category', 'concerning')
+    if category not in SENTENCE_CATEGORIES:
+        return jsonify({'error': f"Invalid category. Use one of: {', '.join(SENTENCE_CATEGORIES)}"}), 400
+    limit = request.args.get('limit', 5, type=int)
+
+    categories = SENTENCE_CATEGORIES[category]
+    conn = get_db_connection()
+    try:
+        rows = conn.execute(f'''
+            SELECT sentence_offset, sentence_text, category, matched_terms, adjusted_score
+            FROM analysis_sentences
+            WHERE app_id = ? AND category IN ({','.join(['?'] * len(categories))})
+            ORDER BY adjusted_score, sentence_offset
+            LIMIT ?
+        ''', (app_id, *categories, limit)).fetchall()
+    except sqlite3.Error as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        conn.close()
+
+    return jsonify({'app_id': app_id, 'category': category, 'sentences': compact_sentences(rows)})
+
+# Apps whose analysed policy mentions a term, e.g. /apps/byTerm?term=biometric
+@app.route('/apps/byTerm', methods=['GET'])
+def get_apps_by_term():
+    term = (request.args.get('term') or '').strip().lower()
+    if not term:
+        return jsonify({'error': 'Missing term'}), 400
+
+    conn = get_db_connection()
+    try:
+        rows = conn.execute('''
+            SELECT t.app_id, p.app_name, COUNT(*) AS sentence_count
+            FROM analysis_sentence_terms t
+            LEFT JOIN policies p ON p.app_id = t.app_id
+            WHERE t.term = ?
+            GROUP BY t.app_id
+        ''', (term,)).fetchall()
+    except sqlite3.Error as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        conn.close()
+
+    return jsonify({'term': term, 'apps': [dict(row) for row in rows]})
     
+MAX_SEARCH_PAGE = 50
+# bm25 weights of the app_search columns: app_id, app_name, category, policy_text, flagged_sentences
+SEARCH_WEIGHTS = (5.0, 10.0, 3.0, 1.0, 2.0)
+
+def fts_query(text):
+    """
+    An FTS5 query for free text typed by a user: every word must match, the last one as a
+    prefix (so results appear while typing). Words are quoted, so FTS5 syntax is taken literally.
+    """
+    words = re.findall(r"\w+", text.lower())
+    if not words:
+        return None
+    quoted = ['"' + word + '"' for word in words]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+# Full-text search over app names and ids, categories, policy texts and the concerning sentences
+# of each analysis, best matches first, e.g. /search?q=fingerprint&limit=20. Accepts the /apps
+# filters (rating, category, permission). Each app has a snippet of its best matching text, with
+# the matches in [brackets]. Paged like /apps: {"apps": [...], "next": <cursor>, "total": <matches>}.
+@app.route('/search', methods=['GET'])
+def search_apps():
+    query = fts_query(request.args.get('q', ''))
+    if query is None:
+        return jsonify({'error': 'Missing search text'}), 400
+    limit = request.args.get('limit', 20, type=int)
+    if not 0 < limit <= MAX_SEARCH_PAGE:
+        return jsonify({'error': f'limit must be between 1 and {MAX_SEARCH_PAGE}'}), 400
+    # Ranked results have no stable key to continue from, so the cursor is an offset
+    offset = request.args.get('after', 0, type=int)
+
+    conditions, params = app_filters({key: value for key, value in request.args.items() if key != 'q'})
+    where = ''.join(f' AND {condition}' for condition in conditions)
+    conn = get_db_connection()
+    try:
+        rows = conn.execute(f'''
+            SELECT p.app_id, p.app_name, i.icon_url, p.rating, p.category,
+                   snippet(app_search, -1, '[', ']', '...', 12) AS snippet
+            FROM app_search
+            JOIN policies p ON p.app_id = app_search.app_id
+            LEFT JOIN app_icons i ON i.app_id = p.app_id
+            WHERE app_search MATCH ?{where}
+            ORDER BY bm25(app_search, {', '.join(map(str, SEARCH_WEIGHTS))}), app_search.rowid
+            LIMIT ? OFFSET ?
+        ''', [query] + params + [limit + 1, offset]).fetchall()
+        total = conn.execute(f'''
+            SELECT COUNT(*) FROM app_search JOIN policies p ON p.app_id = app_search.app_id
+            WHERE app_search MATCH ?{where}
+        ''', [query] + params).fetchone()[0]
+    except sqlite3.Error as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        conn.close()
+
+    more = len(rows) > limit
+    return jsonify({'apps': [dict(row) for row in rows[:limit]], 'next': offset + limit if more else None, 'total': total})
+
 # User Registration
 @app.route('/register', methods=['POST'])
 def register():
@@ -219,12 +435,25 @@ def analyze():
     if not app_id_to_analyze:
         return jsonify({"error": "app_id is required"}), 400
     
-    # If flag is provided as 'force', override any previous analysis
-    force_flag = '--force' in flag.split(',')
+    # If flag is provided as 'force', override any previous analysis whose inputs changed;
+    # 'rerun' re-analyses even when policy, permissions and terms are unchanged
+    force_flag, rerun_flag = parse_analysis_flags(flag)
+
+    # provisional=true answers at once with a rating from the fast lexicon backend and queues
+    # the accurate analysis; its result replaces the provisional one at /nlp/jobs/<job_id>/result
+    if request.args.get('provisional', '').lower() in ('1', 'true'):
+        try:
+            provisional = provisional_analysis(app_id_to_analyze)
+            job = job_queue.submit(app_id_to_analyze, force_flag, rerun_flag)
+        except LookupError as e:
+            return jsonify({"error": str(e)}), 404
+        except sqlite3.Error as e:
+            return jsonify({"error": str(e)}), 500
+        return jsonify({"provisional": provisional, "job_id": job["job_id"], "status": job["status"]}), 202
 
     try:
-        # Call NLPAnalysis_single with app_id and the force flag
-        result = NLPAnalysis_single(app_id_to_analyze, force_flag)
+        # Call NLPAnalysis_single with app_id and the force flags
+        result = NLPAnalysis_single(app_id_to_analyze, force_flag, rerun_flag)
         
         # Return the analysis results as JSON response
         return jsonify(result), 200
@@ -232,6 +461,56 @@ def analyze():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def parse_analysis_flags(flag):
+    """Return (force_flag, rerun_flag) from a comma-separated flag string such as '--force,--rerun'."""
+    flags = (flag or '').split(',')
+    return '--force' in flags, '--rerun' in flags
+
+# Queue an analysis and return its job id immediately
+@app.route('/nlp/jobs', methods=['POST'])
+def submit_analysis_job():
+    data = request.get_json(silent=True) or {}
+    app_id_to_analyze = data.get('app_id') or request.args.get('app_id')
+    if not app_id_to_analyze:
+        return jsonify({"error": "app_id is required"}), 400
+
+    force_flag, rerun_flag = parse_analysis_flags(data.get('flag') or request.args.get('flag'))
+    try:
+        # A job already queued or running for this app is returned instead of a new one
+        job = job_queue.submit(app_id_to_analyze, force_flag, rerun_flag)
+        return jsonify({"job_id": job["job_id"], "app_id": job["app_id"], "status": job["status"]}), 202
+    except sqlite3.Error as e:
+        return jsonify({"error": str(e)}), 500
+
+# Status of an analysis job
+@app.route('/nlp/jobs/<int:job_id>', methods=['GET'])
+def analysis_job_status(job_id):
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    job.pop("result")
+    return jsonify(job), 200
+
+# Result of a finished analysis job (202 while it is still queued or running)
+@app.route('/nlp/jobs/<int:job_id>/result', methods=['GET'])
+def analysis_job_result(job_id):
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    if job["status"] == "failed":
+        return jsonify({"job_id": job_id, "status": "failed", "error": job["error"]}), 500
+    if job["status"] != "done":
+        return jsonify({"job_id": job_id, "status": job["status"]}), 202
+    return jsonify(job["result"]), 200
+
+# Apps waiting for a change-driven re-analysis
+@app.route('/nlp/stale', methods=['GET'])
+def stale_analyses():
+    try:
+        return jsonify(refresh_scheduler.status()), 200
+    except sqlite3.Error as e:
+        return jsonify({"error": str(e)}), 500
+
 # Check if app is in manual_review table with pending status
 @app.route('/appInManualPending', methods=['GET'])
 def is_app_in_manual_pending():
@@ -286,6 +565,65 @@ def add_app():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+MAX_LOOKUP_IDS = 2000
+LOOKUP_FIELDS = ["app_name", "icon_url", "rating", "privacy_concern", "worst_permissions", "category"]
+
+# What the server knows about a device's installed apps, in one request instead of a
+# getAppDetails / appInManualPending / addApp round trip per package:
+#   POST /apps/lookup {"app_ids": ["com.a", "com.b", ...], "add_unknown": false}
+# Returns the known apps with their summary fields, permission types (as in /apps) and whether
+# each is pending manual review, the unknown ids (those pending manual review listed in
+# pending_review), and with add_unknown the unknown ids are inserted as placeholder policies
+# in one statement, as /addApp does one at a time; they are listed in added.
+@app.route('/apps/lookup', methods=['POST'])
+def lookup_apps():
+    data = request.get_json(silent=True) or {}
+    app_ids = data.get('app_ids')
+    if not isinstance(app_ids, list) or not all(isinstance(app_id, str) and app_id for app_id in app_ids):
+        return jsonify({'error': 'app_ids must be a list of package ids'}), 400
+    if len(app_ids) > MAX_LOOKUP_IDS:
+        return jsonify({'error': f'At most {MAX_LOOKUP_IDS} app_ids per request'}), 400
+    app_ids = list(dict.fromkeys(app_ids))  # drop duplicates, keep the device's order
+
+    conn = get_db_connection()
+    try:
+        # One pass: the ids arrive as a single JSON parameter and are joined against each table.
+        # An app can have several manual_review rows, so pending review is an EXISTS test.
+        rows = conn.execute('''
+            SELECT ids.value AS app_id, p.app_id IS NOT NULL AS known, p.app_name, i.icon_url, p.rating,
+                   p.privacy_concern, p.worst_permissions, p.category, p.permissions,
+                   EXISTS (SELECT 1 FROM manual_review m WHERE m.app_id = ids.value AND m.status = 'pending')
+                       AS pending_review
+            FROM json_each(?) ids
+            LEFT JOIN policies p ON p.app_id = ids.value
+            LEFT JOIN app_icons i ON i.app_id = ids.value
+            ORDER BY ids.key
+        ''', (json.dumps(app_ids),)).fetchall()
+
+        unknown = [row['app_id'] for row in rows if not row['known']]
+        added = []
+        if data.get('add_unknown') and unknown:
+            conn.executemany("INSERT OR IGNORE INTO policies (app_id) VALUES (?)", [(app_id,) for app_id in unknown])
+            conn.commit()
+            added = unknown
+
+    except sqlite3.Error as e:
+        conn.rollback()
+        return jsonify({'error': str(e)}), 500
+    finally:
+        conn.close()
+
+    known = [dict({'app_id': row['app_id']}, **{field: row[field] for field in LOOKUP_FIELDS},
+                  permissions=extract_permission_types(row['permissions']),
+                  pending_review=bool(row['pending_review']))
+             for row in rows if row['known']]
+    return jsonify({
+        'known': known,
+        'unknown': unknown,
+        'pending_review': [row['app_id'] for row in rows if row['pending_review']],
+        'added': added,
+    }), 200
+
 # Update specified column in database
 @app.route('/update', methods=['PUT'])
 def update():
@@ -339,29 +677,16 @@ def submit_feedback():
     conn = get_db_connection()
     feedback_id = None  # Ensure it's defined even if insertion fails
     try:
-        # Check if the app_id exists in policies
-        cursor = conn.execute("SELECT COUNT(*) FROM policies WHERE app_id = ?", (app_id,))
-        if cursor.fetchone()[0] == 0:
-            # If app_id does not exist, insert a placeholder entry in policies
-            conn.execute("INSERT INTO policies (app_id, user_feedback) VALUES (?, ?)", (app_id, ""))
-            conn.commit()  # Commit to ensure the foreign key constraint doesn't fail later
-
-        # Insert feedback into feedback table
+        # One transaction: a placeholder policy for an app not scraped yet, then the feedback.
+        # Feedback is found through feedback.app_id, so nothing in policies is rewritten.
+        conn.execute("INSERT OR IGNORE INTO policies (app_id) VALUES (?)", (app_id,))
         cursor = conn.execute(
             'INSERT INTO feedback (user_id, app_id, reason, status, date, type) VALUES (?, ?, ?, ?, ?, ?)',
             (user_id, app_id, reason, status, date, feedback_type)
         )
         feedback_id = cursor.lastrowid
-
-        # Update user_feedback in policies table
-        cursor = conn.execute('SELECT user_feedback FROM policies WHERE app_id = ?', (app_id,))
-        result = cursor.fetchone()
-        user_feedback_list = result[0].split(',') if result and result[0] else []
-        user_feedback_list.append(str(feedback_id))
-
-        conn.execute('UPDATE policies SET user_feedback = ? WHERE app_id = ?', (','.join(user_feedback_list), app_id))
         conn.commit()
-    
+
     except sqlite3.Error as e:
         conn.rollback()
         app.logger.error(f"Error inserting feedback: {str(e)}")
@@ -371,70 +696,65 @@ def submit_feedback():
 
     return jsonify({'message': 'Feedback submitted successfully', 'feedback_id': feedback_id}), 201
 
-# Get Feedback
+MAX_FEEDBACK_PAGE = 200
+
+# Get Feedback for an app, newest first, e.g. /getFeedback?app_id=com.example&limit=20
+# Without limit all of it is returned. With limit the response also has "next": pass it back
+# as before= for the following (older) page, until it is null.
 @app.route('/getFeedback', methods=['GET'])
 def get_feedback():
     app_id = request.args.get('app_id')
 
     if not app_id:
         return jsonify({'error': 'Missing app_id'}), 400
+    limit = request.args.get('limit', type=int)
+    if limit is not None and not 0 < limit <= MAX_FEEDBACK_PAGE:
+        return jsonify({'error': f'limit must be between 1 and {MAX_FEEDBACK_PAGE}'}), 400
+    before = request.args.get('before', type=int)
 
     conn = get_db_connection()
     try:
-        cursor = conn.cursor()
-
-        # Get feedback IDs from policies table
-        cursor.execute('SELECT user_feedback FROM policies WHERE app_id = ?', (app_id,))
-        result = cursor.fetchone()
-
-        if not result or not result[0]:
-            return jsonify({'feedback': []}), 200  # Return empty list if no feedback exists
-
-        feedback_ids = result[0].split(',')
-
-        # Ensure feedback_ids contains valid values before querying
-        if not feedback_ids or feedback_ids == ['']:
-            return jsonify({'feedback': []}), 200
-
-        # Get detailed feedback from feedback table
-        placeholders = ','.join(['?'] * len(feedback_ids))
-        cursor.execute(f'''
-            SELECT feedback_id, user_id, app_id, reason, status, date, type
-            FROM feedback 
-            WHERE feedback_id IN ({placeholders})
-        ''', feedback_ids)
-
-        feedback_data = cursor.fetchall()
-
-        # For each feedback, get the user email
-        feedback_list = []
-        for row in feedback_data:
-            feedback_id, user_id, app_id, reason, status, date, feedback_type = row
-
-            # Get the user email for each feedback
-            cursor.execute('SELECT email FROM users WHERE id = ?', (user_id,))
-            user_result = cursor.fetchone()
-            user_email = user_result[0] if user_result else None
-
-            # Add the feedback details with user email
-            feedback_list.append({
-                'feedback_id': feedback_id,
-                'user_id': user_id,
-                'app_id': app_id,
-                'reason': reason,
-                'status': status,
-                'date': date,
-                'type': feedback_type,
-                'user_email': user_email  # Added user email from users table
-            })
-
-        return jsonify({'feedback': feedback_list}), 200
+        # One query for the page and the users' emails: a range of idx_feedback_app
+        query = '''
+            SELECT f.feedback_id, f.user_id, f.app_id, f.reason, f.status, f.date, f.type, u.email
+            FROM feedback f
+            LEFT JOIN users u ON u.id = f.user_id
+            WHERE f.app_id = ?
+        '''
+        params = [app_id]
+        if before is not None:
+            query += ' AND f.feedback_id < ?'
+            params.append(before)
+        query += ' ORDER BY f.feedback_id DESC'
+        if limit is not None:
+            # One extra row tells whether there is an older page
+            query += ' LIMIT ?'
+            params.append(limit + 1)
+        rows = conn.execute(query, params).fetchall()
 
     except sqlite3.Error as e:
         return jsonify({'error': str(e)}), 500
     finally:
         conn.close()
 
+    more = limit is not None and len(rows) > limit
+    rows = rows[:limit] if limit is not None else rows
+    feedback_list = [{
+        'feedback_id': row['feedback_id'],
+        'user_id': row['user_id'],
+        'app_id': row['app_id'],
+        'reason': row['reason'],
+        'status': row['status'],
+        'date': row['date'],
+        'type': row['type'],
+        'user_email': row['email']
+    } for row in rows]
+
+    result = {'feedback': feedback_list}
+    if limit is not None:
+        result['next'] = rows[-1]['feedback_id'] if more else None
+    return jsonify(result), 200
+
 # Get feedback by user id
 @app.route('/userFeedback', methods=['GET'])
 def get_user_feedback():
@@ -491,102 +811,121 @@ def get_user_feedback():
     finally:
         conn.close()
 
-# Get feedback with Other - other, pending review types 
+MAX_REVIEW_PAGE = 200
+MAX_STATUS_UPDATES = 500
+
+# The admin review queue: feedback in one review_state (default pending), newest first,
+# e.g. /otherFeedback?limit=50. Without limit the whole queue is returned as a list. With limit
+# the response is {"feedback": [...], "next": <cursor>, "total": <items in the queue>}; pass the
+# cursor back as before= for the following (older) page.
 @app.route('/otherFeedback', methods=['GET'])
 def get_other_feedback():
+    state = request.args.get('state', 'pending').strip().lower()
+    if state not in REVIEW_STATES:
+        return jsonify({'error': f"state must be one of: {', '.join(REVIEW_STATES)}"}), 400
+    limit = request.args.get('limit', type=int)
+    if limit is not None and not 0 < limit <= MAX_REVIEW_PAGE:
+        return jsonify({'error': f'limit must be between 1 and {MAX_REVIEW_PAGE}'}), 400
+    before = request.args.get('before', type=int)
+
     conn = get_db_connection()
     try:
-        cursor = conn.cursor()
-
-        # Fetch feedback with:
-        # 1. Type = 'Other - other Update' and Status not in ('Approved', 'Rejected')
-        # 2. Any type where Reason contains 'pending review' (case-insensitive)
-        cursor.execute("""
-            SELECT feedback_id, user_id, app_id, reason, status, date, type
-            FROM feedback
-            WHERE (type = 'Other - other Update' AND status NOT IN ('Approved', 'Rejected'))
-               OR (LOWER(status) LIKE '%pending review%')
-        """)
-        feedback_list = cursor.fetchall()
-
-        # Debugging: Print fetched raw data
-        print("Raw feedback from DB:", feedback_list)
-
-        feedback_data = []
-        for row in feedback_list:
-            feedback_item = {
-                "feedback_id": row[0],
-                "user_id": row[1],
-                "user_email": None,  # Placeholder for user email
-                "app_id": row[2],
-                "app_name": None,  # Placeholder for app name
-                "reason": row[3],
-                "otherItemChange": None,  # Extracted from reason
-                "otherReason": None,  # Extracted from reason
-                "status": row[4],
-                "date": row[5],
-                "type": row[6],
-            }
-
-            # Extract otherItemChange and otherReason using regex (only for 'Other - other Update' type)
-            if row[6] == "Other - other Update":
-                match = re.match(r"Other - other: (.+?) - (.+)", row[3])
-                if match:
-                    feedback_item["otherItemChange"] = match.group(1)  # First capture group
-                    feedback_item["otherReason"] = match.group(2)  # Second capture group
-
-            # Fetch user email if user_id exists
-            if row[1]:  
-                cursor.execute("SELECT email FROM users WHERE id = ?", (row[1],))
-                user_email_row = cursor.fetchone()
-                if user_email_row:
-                    feedback_item["user_email"] = user_email_row[0]
-
-            # Fetch app name if app_id exists
-            if row[2]:  
-                cursor.execute("SELECT app_name FROM policies WHERE app_id = ?", (row[2],))
-                app_name_row = cursor.fetchone()
-                if app_name_row:
-                    feedback_item["app_name"] = app_name_row[0]
-
-            feedback_data.append(feedback_item)
-
-        # Debugging: Print final JSON response
-        print("Formatted feedback data:", feedback_data)
-
-        return jsonify(feedback_data)
+        # One query for the page, the users' emails and the app names: a range of idx_feedback_review_state
+        query = '''
+            SELECT f.feedback_id, f.user_id, u.email, f.app_id, p.app_name, f.reason, f.status,
+                   f.review_state, f.date, f.type
+            FROM feedback f
+            LEFT JOIN users u ON u.id = f.user_id
+            LEFT JOIN policies p ON p.app_id = f.app_id
+            WHERE f.review_state = ?
+        '''
+        params = [state]
+        if before is not None:
+            query += ' AND f.feedback_id < ?'
+            params.append(before)
+        query += ' ORDER BY f.feedback_id DESC'
+        if limit is not None:
+            # One extra row tells whether there is an older page
+            query += ' LIMIT ?'
+            params.append(limit + 1)
+        rows = conn.execute(query, params).fetchall()
+        if limit is not None:
+            total = conn.execute("SELECT COUNT(*) FROM feedback WHERE review_state = ?", (state,)).fetchone()[0]
 
-    except Exception as e:
-        print("Error fetching feedback:", e)
+    except sqlite3.Error as e:
+        app.logger.error(f"Error fetching review queue: {str(e)}")
         return jsonify({"error": "Server error"}), 500
-
     finally:
         conn.close()
 
-# Update processing status
+    more = limit is not None and len(rows) > limit
+    rows = rows[:limit] if limit is not None else rows
+    feedback_data = []
+    for row in rows:
+        feedback_item = {
+            "feedback_id": row["feedback_id"],
+            "user_id": row["user_id"],
+            "user_email": row["email"],
+            "app_id": row["app_id"],
+            "app_name": row["app_name"],
+            "reason": row["reason"],
+            "otherItemChange": None,  # Extracted from reason
+            "otherReason": None,  # Extracted from reason
+            "status": row["status"],
+            "review_state": row["review_state"],
+            "date": row["date"],
+            "type": row["type"],
+        }
+
+        # Extract otherItemChange and otherReason using regex (only for 'Other - other Update' type)
+        if row["type"] == "Other - other Update" and row["reason"]:
+            match = re.match(r"Other - other: (.+?) - (.+)", row["reason"])
+            if match:
+                feedback_item["otherItemChange"] = match.group(1)  # First capture group
+                feedback_item["otherReason"] = match.group(2)  # Second capture group
+
+        feedback_data.append(feedback_item)
+
+    if limit is None:
+        return jsonify(feedback_data)
+    return jsonify({'feedback': feedback_data, 'next': rows[-1]["feedback_id"] if more else None, 'total': total})
+
+# Update processing status, of one feedback row:
+#   {"feedback_id": 1, "user_id": 2, "status": "Done"}
+# or of many in one transaction, all or none of them (e.g. approving a page of the review queue):
+#   {"updates": [{"feedback_id": 1, "user_id": 2, "status": "Approved. Changes done."}, ...]}
 @app.route('/updateStatus', methods=['POST'])
 def update_status():
     data = request.json
-    feedback_id = data.get('feedback_id')
-    user_id = data.get('user_id')  # Include user ID
-    status = data.get('status')
     date = data.get('date') or datetime.datetime.now().isoformat()
+    bulk = 'updates' in data
+    updates = data.get('updates') if bulk else [data]
 
-    if not all([feedback_id, user_id, status, date]):
+    if not isinstance(updates, list) or not updates or not all(
+            isinstance(update, dict) and all([update.get('feedback_id'), update.get('user_id'), update.get('status')])
+            for update in updates):
         app.logger.error('Missing required fields')
         return jsonify({'error': 'Missing required fields'}), 400
+    if len(updates) > MAX_STATUS_UPDATES:
+        return jsonify({'error': f'At most {MAX_STATUS_UPDATES} updates per request'}), 400
 
     conn = get_db_connection()
     try:
-        cursor = conn.cursor()
-        cursor.execute('''
-            UPDATE feedback
-            SET status = ?, date = ?
-            WHERE feedback_id = ? AND user_id = ?
-        ''', (status, date, feedback_id, user_id))
-
-        if cursor.rowcount == 0:
-            return jsonify({'error': 'No feedback found or unauthorized'}), 404
+        missing = []
+        for update in updates:
+            cursor = conn.execute('''
+                UPDATE feedback
+                SET status = ?, date = ?
+                WHERE feedback_id = ? AND user_id = ?
+            ''', (update['status'], update.get('date') or date, update['feedback_id'], update['user_id']))
+            if cursor.rowcount == 0:
+                missing.append(update['feedback_id'])
+
+        if missing:
+            conn.rollback()
+            if not bulk:
+                return jsonify({'error': 'No feedback found or unauthorized'}), 404
+            return jsonify({'error': 'No feedback found or unauthorized', 'feedback_ids': missing}), 404
 
         conn.commit()
     except sqlite3.Error as e:
@@ -596,7 +935,10 @@ def update_status():
     finally:
         conn.close()
 
-    return jsonify({'message': 'Feedback status updated successfully', 'feedback_id': feedback_id}), 200
+    if not bulk:
+        return jsonify({'message': 'Feedback status updated successfully', 'feedback_id': data['feedback_id']}), 200
+    return jsonify({'message': 'Feedback statuses updated successfully',
+                    'feedback_ids': [update['feedback_id'] for update in updates]}), 200
 
 
 #------------------------------------------------------------------------------------------------------------
@@ -604,6 +946,7 @@ def update_status():
 #-------------------------------------------------------------------------------------------------------------
 import os
 import re
+import threading
 
 # File paths:
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # Server directory
@@ -633,6 +976,20 @@ def check_and_append_phrase(file_path, phrase):
 
     return {"message": f"Phrase added successfully to {os.path.basename(file_path)}"}
 
+# Only one re-classification runs at a time; later ones pick up whatever is still stale
+reclassify_lock = threading.Lock()
+
+def start_reclassification():
+    """Re-classify stale analyses in the background so /addTerms returns immediately."""
+    def run():
+        with reclassify_lock:
+            try:
+                reclassify_stale()
+            except Exception as e:
+                app.logger.error(f"Error re-classifying analyses: {str(e)}")
+
+    threading.Thread(target=run, daemon=True).start()
+
 @app.route("/addTerms", methods=["POST"])
 def check_append_api():
     """API endpoint to check and append a phrase in the correct file."""
@@ -654,11 +1011,28 @@ def check_append_api():
 
         # Process the phrase
         result = check_and_append_phrase(file_path, term)
+
+        # Stored analyses were classified with the old terms; refresh them from their stored scores
+        if not result["message"].startswith("Phrase already exists"):
+            start_reclassification()
+            result["reclassification"] = "started"
         return jsonify(result)
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 if __name__ == '__main__':
+    # Load the Stanza pipeline before serving so the first /nlp call does not pay for it.
+    # Skipped in the debug reloader's parent process, which never serves requests.
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        warm_up()
+        refresh_scheduler.start()
+    # atexit runs these in reverse order: stop the workers, then the scheduler, then free the pipeline
+    # and close the pooled connections
+    atexit.register(close_connections)
+    atexit.register(shutdown_pipelines)
+    atexit.register(shutdown_scheduler)
+    atexit.register(job_queue.stop, 5)
+    atexit.register(refresh_scheduler.stop, 5)
     app.run(debug=True, port=5000)
 
@@ -1,17 +1,40 @@
 const API_URL = 'http://10.0.2.2'; // For Android emulator; for physical device, use your computer's IP
 
-// Fetch all app IDs from the policies table
-export const getAppIds = async () => {
+// Fetch one page of apps: { apps, next, total }.
+// params: limit, after (the previous page's next), fields, rating, category, permission, q
+export const getApps = async (params = {}) => {
+    const query = Object.entries(params)
+        .filter(([, value]) => value !== undefined && value !== null && value !== '')
+        .map(([key, value]) => `${key}=${encodeURIComponent(value)}`)
+        .join('&');
     try {
-        const response = await fetch(`${API_URL}:5000/apps`);
+        const response = await fetch(`${API_URL}:5000/apps?${query}`);
         if (!response.ok) {
-            throw new Error('Failed to fetch app IDs');
+            throw new Error('Failed to fetch apps');
         }
-        const data = await response.json();
-        console.log('Fetched app IDs:', data);
-        return data;
+        return await response.json();
+    } catch (error) {
+        console.error('Error fetching apps:', error);
+        throw error;
+    }
+};
+
+// Full-text search over app names, categories, policies and flagged sentences, best matches
+// first: { apps, next, total }, each app with a snippet of the text it matched.
+// params: { q, limit, after, rating, category, permission }
+export const searchApps = async (params = {}) => {
+    const query = Object.entries(params)
+        .filter(([, value]) => value !== undefined && value !== null && value !== '')
+        .map(([key, value]) => `${key}=${encodeURIComponent(value)}`)
+        .join('&');
+    try {
+        const response = await fetch(`${API_URL}:5000/search?${query}`);
+        if (!response.ok) {
+            throw new Error('Failed to search apps');
+        }
+        return await response.json();
     } catch (error) {
-        console.error('Error fetching app IDs:', error);
+        console.error('Error searching apps:', error);
         throw error;
     }
 };
@@ -33,6 +56,25 @@ export const getAppDetails = async (appId) => {
     }
 };
 
+// Look up a device's installed apps in one request: { known, unknown, pending_review, added }.
+// With addUnknown the unknown ones are added to the database, as addApp does for one app.
+export const lookupApps = async (appIds, { addUnknown = false } = {}) => {
+    try {
+        const response = await fetch(`${API_URL}:5000/apps/lookup`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ app_ids: appIds, add_unknown: addUnknown })
+        });
+        if (!response.ok) {
+            throw new Error('Failed to look up apps');
+        }
+        return await response.json();
+    } catch (error) {
+        console.error('Error looking up apps:', error);
+        return { error: error.message || 'Network error' };
+    }
+};
+
 // Check if app is in manual_review table with pending status
 export const isAppManualPending = async (appId) => {
     try {
@@ -167,20 +209,45 @@ export const deleteUser = async (user_id) => {
     }
 };
 
-// Analyze policy & permissions & update in database
-export const analyze = async (app_id) => {
+// Analyze policy & permissions & update in database.
+// Submits a background job and polls for its result, so long analyses don't time out.
+// If onProvisional is given, it is called straight away with a quick provisional rating.
+export const analyze = async (app_id, onProvisional) => {
     try {
-        const response = await fetch(`${API_URL}:5000/nlp?app_id=${app_id}`, {
-            method: 'GET',
-            headers: { 'Content-Type': 'application/json' }
-        });
+        const submitResponse = onProvisional
+            ? await fetch(`${API_URL}:5000/nlp?app_id=${encodeURIComponent(app_id)}&provisional=true`)
+            : await fetch(`${API_URL}:5000/nlp/jobs`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ app_id })
+            });
+
+        if (!submitResponse.ok) {
+            console.error('Error analyzing policy & permissions:', submitResponse.status);
+            return { error: 'Failed to analyze policy & permissions' };
+        }
 
-        if (response.ok) {
-            return await response.json();
-        } else {
+        const { job_id, provisional } = await submitResponse.json();
+        if (onProvisional && provisional) {
+            onProvisional(provisional);
+        }
+
+        // Poll every 2s for up to 10 minutes
+        for (let attempt = 0; attempt < 300; attempt++) {
+            const response = await fetch(`${API_URL}:5000/nlp/jobs/${job_id}/result`);
+
+            if (response.status === 202) {
+                await new Promise(resolve => setTimeout(resolve, 2000));
+                continue;
+            }
+            if (response.ok) {
+                return await response.json();
+            }
             console.error('Error analyzing policy & permissions:', response.status);
             return { error: 'Failed to analyze policy & permissions' };
         }
+
+        return { error: 'Analysis is taking too long, please check again later' };
     } catch (error) {
         console.error('Error during analyzing policy & permissions:', error);
         return { error: 'Network error' };
@@ -231,9 +298,12 @@ export const submitFeedback = async (appId, userId, reason, status, type) => {
     }
 };
 
-export const getFeedback = async (appId) => {
+// Feedback for an app, newest first. Pass { limit, before } for one page at a time:
+// the response's next is the before of the following page.
+export const getFeedback = async (appId, { limit, before } = {}) => {
+    const page = (limit ? `&limit=${limit}` : '') + (before ? `&before=${before}` : '');
     try {
-        const response = await fetch(`${API_URL}:5000/getFeedback?app_id=${appId}`);
+        const response = await fetch(`${API_URL}:5000/getFeedback?app_id=${encodeURIComponent(appId)}${page}`);
         if (!response.ok) {
             throw new Error('Failed to fetch feedback');
         }
@@ -270,10 +340,13 @@ export const getUserFeedback = async (userId) => {
     }
 };
 
-export const getOtherFeedback = async() => {
+// The admin review queue, newest first. Pass { limit, before } for one page at a time:
+// the response is then { feedback, next, total }, and next is the before of the following page.
+export const getOtherFeedback = async ({ limit, before } = {}) => {
+    const page = [limit && `limit=${limit}`, before && `before=${before}`].filter(Boolean).join('&');
     for (let attempt = 1; attempt <= 3; attempt++) {
         try {
-            const response = await fetch(`${API_URL}:5000/otherFeedback`);
+            const response = await fetch(`${API_URL}:5000/otherFeedback${page ? `?${page}` : ''}`);
             
             if (!response.ok) {
                 throw new Error(`Failed to fetch "Other - other " feedback.`);
@@ -318,6 +391,30 @@ export const updateProcessingStatus = async (feedbackId, userId, status) => {
     }
 };
 
+// Update the status of many feedback rows in one transaction, all or none of them.
+// updates: [{ feedback_id, user_id, status }, ...]
+export const updateProcessingStatuses = async (updates) => {
+    try {
+        const date = new Date().toISOString();
+        const response = await fetch(`${API_URL}:5000/updateStatus`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ updates, date })
+        });
+
+        if (!response.ok) {
+            const errorText = await response.text();
+            console.error('Error response:', errorText);
+            throw new Error(`Failed to update feedback statuses: ${errorText}`);
+        }
+
+        return await response.json();
+    } catch (error) {
+        console.error('Error updating feedback statuses:', error);
+        return { error: error.message || 'Network error' };
+    }
+};
+
 // Check and add generic/sensitive terms
 export const addTerm = async (term, category) => {
     try {
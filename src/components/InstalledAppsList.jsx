@@ -10,13 +10,12 @@ import {
   SafeAreaView,
   Alert
 } from 'react-native';
-import axios from 'axios';
 import { InstalledApps } from 'react-native-launcher-kit';
 import { useNavigation, useFocusEffect } from '@react-navigation/native';
 import { useAppList } from '../contexts/AppListContext';
 import { globalStyles } from '../styles/styles';
+import { lookupApps } from '../api/api';
 
-const API_URL = "http://10.0.2.2:5000";
 const currentAppPackage = "com.privacyratingapp"; // Exclude current app
 
 // Helper to normalize TikTok entries
@@ -63,17 +62,15 @@ const InstalledAppsList = ({ filterText = '',  category = 'All'}) => {
     }
   };
 
-  // Fetch apps from the database API
-  const fetchDatabaseApps = async () => {
-    try {
-      console.log("Fetching apps from database API...");
-      const response = await axios.get(`${API_URL}/apps`);
-      console.log(`Fetched ${response.data.length} apps from database`);
-      return response.data;
-    } catch (error) {
-      console.error("Error fetching database apps:", error);
+  // Look up the installed apps in the database, all in one request
+  const fetchDatabaseApps = async (deviceApps) => {
+    console.log("Looking up installed apps in database...");
+    const result = await lookupApps(deviceApps.map(app => app.packageName));
+    if (result.error) {
       return [];
     }
+    console.log(`Found ${result.known.length} of ${deviceApps.length} installed apps in database`);
+    return result.known;
   };
 
   // Merge installed apps with database apps using a dictionary for faster lookups
@@ -115,10 +112,8 @@ const InstalledAppsList = ({ filterText = '',  category = 'All'}) => {
   // Fetch both installed apps and database apps, then merge and update state.
   const fetchAllData = async () => {
     try {
-      const [deviceApps, databaseApps] = await Promise.all([
-        fetchInstalledApps(),
-        fetchDatabaseApps(),
-      ]);
+      const deviceApps = await fetchInstalledApps();
+      const databaseApps = await fetchDatabaseApps(deviceApps);
       const merged = mergeAppsData(deviceApps, databaseApps);
       console.log("Merged apps data:", merged.map(app => `${app.app_name} (${app.packageName})`));
       setInstalledAppsInDB(merged);
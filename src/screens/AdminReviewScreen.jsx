@@ -2,42 +2,38 @@ import React, { useState, useEffect } from 'react';
 import { View, Text, StyleSheet, TouchableOpacity, ScrollView, Alert, Modal, TextInput, Button} from 'react-native';
 import { useNavigation } from '@react-navigation/native'; 
 import Icon from 'react-native-vector-icons/FontAwesome';
-import { getOtherFeedback, updateProcessingStatus } from "../api/api"; 
+import { getOtherFeedback, updateProcessingStatuses } from "../api/api"; 
 import { globalStyles } from '../styles/styles';
 
+// Review items loaded per page
+const PAGE_SIZE = 50;
+
 const AdminReviewScreen = () => {
     const navigation = useNavigation();
     const [feedbackList, setFeedbackList] = useState([]);
     const [modalVisible, setModalVisible] = useState(false);
-    const [selectedFeedback, setSelectedFeedback] = useState(null);
+    // Feedback the open rejection modal applies to
+    const [rejectedFeedback, setRejectedFeedback] = useState([]);
+    // Feedback ticked for a bulk approve or reject
+    const [selectedIds, setSelectedIds] = useState([]);
     const [rejectionReason, setRejectionReason] = useState("");
+    const [nextCursor, setNextCursor] = useState(null);
+    const [total, setTotal] = useState(0);
 
-const fetchOtherFeedbacks = async () => {
+// Load the first page of the queue, or the page after the loaded ones when more is true
+const fetchOtherFeedbacks = async (more = false) => {
     try {
-        const response = await getOtherFeedback(); // No need to pass app_id
-        
-        console.log("Feedback API Response: ", response);
+        const response = await getOtherFeedback({ limit: PAGE_SIZE, before: more ? nextCursor : undefined });
 
         if (response.error) {
             console.error("API Error:", response.error);
             return;
         }
 
-        if (response.length > 0) { // Directly check if array has data
-            // Filter out feedback that has already been approved or rejected
-            const filteredFeedback = response.filter(feedback => {
-                const status = feedback.status ? feedback.status.trim().toLowerCase() : "";
-                return !(status.startsWith("rejected") || status.startsWith("approved"));
-            });                           
-
-            feedbackList.forEach(f => console.log(`Status: '${f.status}'`));
-
-            // Sort feedback by date in descending order (latest first)
-            const sortedFeedback = filteredFeedback.sort((a, b) => new Date(b.date) - new Date(a.date));
-            setFeedbackList(sortedFeedback);
-        } else {
-            setFeedbackList([]);
-        }
+        // The server only returns feedback still pending review, newest first
+        setFeedbackList(more ? [...feedbackList, ...response.feedback] : response.feedback);
+        setNextCursor(response.next);
+        setTotal(response.total);
     } catch (error) {
         console.error("Error fetching feedback:", error);
     }
@@ -47,13 +43,36 @@ const fetchOtherFeedbacks = async () => {
         fetchOtherFeedbacks();
       }, []);
 
-    // Handle Approve or Reject
-    const handleAction = async (feedback, isApproved) => {
+    const toggleSelected = (feedback) => {
+        setSelectedIds(selectedIds.includes(feedback.feedback_id)
+            ? selectedIds.filter(id => id !== feedback.feedback_id)
+            : [...selectedIds, feedback.feedback_id]);
+    };
+
+    const selectedFeedback = () => feedbackList.filter(feedback => selectedIds.includes(feedback.feedback_id));
+
+    // Set the status of the given feedback in one request; the server updates all or none
+    const updateStatuses = async (feedbackItems, status) => {
+        const response = await updateProcessingStatuses(feedbackItems.map(feedback => (
+            { feedback_id: feedback.feedback_id, user_id: feedback.user_id, status }
+        )));
+        if (response.error) {
+            Alert.alert("Update failed", response.error);
+            return;
+        }
+        setSelectedIds([]);
+        fetchOtherFeedbacks(); // Refresh feedback list
+    };
+
+    // Handle Approve or Reject of some feedback
+    const handleAction = async (feedbackItems, isApproved) => {
+        if (feedbackItems.length === 0) {
+            return;
+        }
         if (isApproved) {
-            await updateProcessingStatus(feedback.feedback_id, feedback.user_id, "Approved. Changes done.");
-            fetchOtherFeedbacks(); // Refresh feedback list
+            await updateStatuses(feedbackItems, "Approved. Changes done.");
         } else {
-            setSelectedFeedback(feedback);
+            setRejectedFeedback(feedbackItems);
             setModalVisible(true); // Show modal for rejection reason
         }
     };
@@ -64,10 +83,9 @@ const fetchOtherFeedbacks = async () => {
             Alert.alert("Please enter a valid reason.");
             return;
         }
-        await updateProcessingStatus(selectedFeedback.feedback_id, selectedFeedback.user_id, `Rejected. ${rejectionReason}`);
+        await updateStatuses(rejectedFeedback, `Rejected. ${rejectionReason}`);
         setModalVisible(false);
         setRejectionReason("");
-        fetchOtherFeedbacks(); // Refresh feedback list
     };
     
     
@@ -82,16 +100,29 @@ const fetchOtherFeedbacks = async () => {
             </TouchableOpacity>
         </View>
         <View style={styles.container}>
-            <Text style={styles.screenTitle}>Review</Text>
+            <Text style={styles.screenTitle}>Review{total > 0 ? ` (${total})` : ""}</Text>
+            {selectedIds.length > 0 && (
+                <View style={styles.buttonContainer}>
+                    <TouchableOpacity style={[styles.button, styles.bulkButton]} onPress={() => handleAction(selectedFeedback(), false)}>
+                        <Text style={styles.buttonText}>{`Reject selected (${selectedIds.length})`}</Text>
+                    </TouchableOpacity>
+                    <TouchableOpacity style={[styles.button, styles.bulkButton]} onPress={() => handleAction(selectedFeedback(), true)}>
+                        <Text style={styles.buttonText}>{`Approve selected (${selectedIds.length})`}</Text>
+                    </TouchableOpacity>
+                </View>
+            )}
             <ScrollView style={styles.sectionContentScrollView}>
             {feedbackList.length === 0 ? (
                 <Text style={styles.noText}>No feedback available</Text>
             ) : (
                 feedbackList.map((feedback, index) => (
-                    <View key={index} style={styles.feedbackContainer}>
+                    <View key={feedback.feedback_id} style={styles.feedbackContainer}>
                         <View>
                             <View style={styles.nameEmailDateContainer}>
-                                <Text style={styles.appName}>{feedback.app_name || feedback.app_id}</Text>
+                                <TouchableOpacity style={styles.selectRow} onPress={() => toggleSelected(feedback)}>
+                                    <Icon name={selectedIds.includes(feedback.feedback_id) ? "check-square-o" : "square-o"} style={styles.selectIcon} />
+                                    <Text style={styles.appName}>{feedback.app_name || feedback.app_id}</Text>
+                                </TouchableOpacity>
                                 {/* User Email & Date */}
                                 <View>
                                     <Text style={styles.feedbackUser}>{feedback.user_email || "Unknown User"}</Text>
@@ -116,13 +147,13 @@ const fetchOtherFeedbacks = async () => {
                             <View style={styles.buttonContainer}>
                                 <TouchableOpacity
                                     style={styles.button}
-                                    onPress={() => handleAction(feedback, false)}
+                                    onPress={() => handleAction([feedback], false)}
                                 >
                                     <Text style={styles.buttonText}>Reject</Text>
                                 </TouchableOpacity>
                                 <TouchableOpacity
                                     style={styles.button}
-                                    onPress={() => handleAction(feedback, true)}
+                                    onPress={() => handleAction([feedback], true)}
                                 >
                                     <Text style={styles.buttonText}>Approve</Text>
                                 </TouchableOpacity>
@@ -131,6 +162,11 @@ const fetchOtherFeedbacks = async () => {
                     </View>
                 ))
             )}
+            {nextCursor && (
+                <TouchableOpacity style={styles.loadMoreButton} onPress={() => fetchOtherFeedbacks(true)}>
+                    <Text style={styles.buttonText}>Load more</Text>
+                </TouchableOpacity>
+            )}
         </ScrollView>
         </View>
         {/* Modal for Rejection Reason */}
@@ -235,6 +271,25 @@ const styles = StyleSheet.create({
     },
     buttonText: {
         color: "black",
+    },
+    bulkButton: {
+        width: 150,
+    },
+    selectRow: {
+        flexDirection: "row",
+        alignItems: "center",
+    },
+    selectIcon: {
+        fontSize: 16,
+        color: "black",
+        marginRight: 6,
+    },
+    loadMoreButton: {
+        backgroundColor: "white",
+        borderWidth: 0.5,
+        alignItems: "center",
+        paddingVertical: 8,
+        marginBottom: 20,
     }
 });
 
@@ -4,58 +4,65 @@ import Icon from "react-native-vector-icons/FontAwesome";
 import HeaderComponent from "../components/Header"; // Example custom header
 import { globalStyles } from "../styles/styles";
 import { useNavigation, useRoute } from "@react-navigation/native";
-import { getAppIds } from "../api/api"; // Import your API function
+import { getApps, searchApps } from "../api/api"; // Import your API function
 
 const PAGE_SIZE = 8;
+const LIST_FIELDS = "app_id,app_name,icon_url,rating";
 
 const SearchScreen = () => {
-  const [apps, setApps] = useState([]);
+  const [paginatedApps, setPaginatedApps] = useState([]);
+  const [totalApps, setTotalApps] = useState(0);
+  // cursors[i] is the "after" cursor of page i + 1 (an app_id when listing, an offset when searching)
+  const [cursors, setCursors] = useState([null]);
   const [searchTerm, setSearchTerm] = useState("");
   const [selectedCategory, setSelectedCategory] = useState("All");
   const [currentPage, setCurrentPage] = useState(1);
   const navigation = useNavigation();
   const route = useRoute();
 
-  // Fetch all apps from the database on mount
   useEffect(() => {
     if (route.params?.query) {
       setSearchTerm(route.params.query);
     }
+  }, [route.params]);
+
+  // Fetch only the current page, filtered by rating on the server. With search text the apps
+  // come from the full-text search, best matches first; without, from the catalogue listing.
+  useEffect(() => {
+    let cancelled = false;
     const fetchApps = async () => {
       try {
-        const data = await getAppIds(); // Calls API function
-        setApps(data);
+        const params = {
+          limit: PAGE_SIZE,
+          after: cursors[currentPage - 1],
+          rating: selectedCategory === "All" ? "good,okay,bad" : selectedCategory, // apps without a rating are left out
+        };
+        const page = searchTerm.trim()
+          ? await searchApps({ ...params, q: searchTerm })
+          : await getApps({ ...params, fields: LIST_FIELDS });
+        if (cancelled) return;
+        setPaginatedApps(page.apps);
+        setTotalApps(page.total);
+        setCursors((prev) => {
+          const next = prev.slice(0, currentPage);
+          next[currentPage] = page.next;
+          return next;
+        });
       } catch (error) {
         console.error("Error fetching apps:", error);
       }
     };
     fetchApps();
-  }, [route.params]);
-
-  // Filter apps based on the searchTerm and selected category
-  const filteredApps = apps.filter((app) => {
-    if (!app.rating) return false; // Ignore apps without a rating
-
-    const matchesName = app.app_name.toLowerCase().includes(searchTerm.toLowerCase());
-    const matchesCategory = 
-      selectedCategory === "All" || 
-      app.rating.toLowerCase() === selectedCategory.toLowerCase();
-    
-    return matchesName && matchesCategory;
-  });
+    return () => { cancelled = true; };
+  }, [searchTerm, selectedCategory, currentPage]);
 
   // Calculate the range of displayed items
-  const totalApps = filteredApps.length;
   const totalPages = Math.ceil(totalApps / PAGE_SIZE);
-  const startIndex = (currentPage - 1) * PAGE_SIZE + 1;
   const endIndex = Math.min(currentPage * PAGE_SIZE, totalApps);
 
-  // Get current page's data
-  const paginatedApps = filteredApps.slice(startIndex - 1, endIndex);
-
   // Handlers for page navigation
   const nextPage = () => {
-    if (endIndex < totalApps) {
+    if (cursors[currentPage]) {
       setCurrentPage((prev) => prev + 1);
     }
   };
@@ -69,6 +76,7 @@ const SearchScreen = () => {
   // Reset page when search term or category changes
   useEffect(() => {
     setCurrentPage(1);
+    setCursors([null]);
   }, [searchTerm, selectedCategory]);
 
   const handleCategoryPress = (category) => {
@@ -172,7 +180,12 @@ const SearchScreen = () => {
                     <Text style={styles.noIconText}>No Icon</Text>
                     </View>
                 )}
-                <Text style={styles.resultText}>{item.app_name}</Text>
+                <View style={styles.resultTextContainer}>
+                    <Text style={styles.resultText}>{item.app_name}</Text>
+                    {item.snippet ? (
+                    <Text style={styles.snippetText} numberOfLines={2}>{item.snippet}</Text>
+                    ) : null}
+                </View>
                 </TouchableOpacity>
             )}
             contentContainerStyle={styles.FlatList}
@@ -279,6 +292,13 @@ const styles = StyleSheet.create({
     fontSize: 14,
     color: "black",
   },
+  resultTextContainer: {
+    flex: 1,
+  },
+  snippetText: {
+    fontSize: 11,
+    color: "#555",
+  },
   installAppsRow: {
     flexDirection: 'row',
     justifyContent: 'space-between',
@@ -7,7 +7,10 @@ import { useAuth } from '../contexts/AuthContext';
 import { useAppList } from "../contexts/AppListContext"; 
 import Icon from 'react-native-vector-icons/FontAwesome';
 import { useNavigation, useFocusEffect } from "@react-navigation/native";
-import { getAppIds, submitFeedback, changePassword, deleteUser, logOut } from "../api/api"; 
+import { getApps, lookupApps, submitFeedback, changePassword, deleteUser, logOut } from "../api/api"; 
+
+const PAGE_SIZE = 50;
+const LIST_FIELDS = "app_id,app_name,permissions,category";
 
 const SettingsScreen = () => {
     const { user, logOut } = useAuth();
@@ -23,7 +26,8 @@ const SettingsScreen = () => {
     const [selectedCategoryFilterCategory, setSelectedCategoryFilterCategory] = useState("All");
 
     const [apps, setApps] = useState([]);
-    const [filteredApps, setFilteredApps] = useState([]);
+    const [totalApps, setTotalApps] = useState(0);
+    const [nextCursor, setNextCursor] = useState(null);
 
     const [feedbackText, setFeedbackText] = useState("");
 
@@ -33,76 +37,76 @@ const SettingsScreen = () => {
     const [error, setError] = useState({ password: "", confirmPassword: ""});
 
     const [deleteEmail, setDeleteEmail] = useState("");
+
+    const installedOnly = !!user && (selectedFilterCategory === "Permission"
+        ? selectedPermissionFilterCategory === "Installed Apps"
+        : selectedCategoryFilterCategory === "Installed Apps");
+
+    // Server-side filter for the selected permission or category
+    const appFilter = () => selectedFilterCategory === "Permission"
+        ? { permission: selectedPermissionType }
+        : { category: selectedCategoryType };
+
+    // Fetch the apps for the current selection. The catalogue is filtered on the server and
+    // fetched a page at a time; installed apps are looked up by id in one request.
     useEffect(() => {
+        let cancelled = false;
         const fetchApps = async () => {
           try {
-             // Step 1: Get all app IDs
-            const appIds = await getAppIds();
-            setApps(appIds);
+            if (installedOnly) {
+                const result = await lookupApps(installedAppsInDB.map(app => app.app_id));
+                if (cancelled || result.error) return;
+                const matching = result.known.filter(app => selectedFilterCategory === "Permission"
+                    ? app.permissions.includes(selectedPermissionType)
+                    : app.category === selectedCategoryType);
+                setApps(matching);
+                setTotalApps(matching.length);
+                setNextCursor(null);
+            } else {
+                const page = await getApps({ ...appFilter(), limit: PAGE_SIZE, fields: LIST_FIELDS });
+                if (cancelled) return;
+                setApps(page.apps);
+                setTotalApps(page.total);
+                setNextCursor(page.next);
+            }
           } catch (error) {
             console.error("Error fetching apps:", error);
           } 
         };
     
         fetchApps();
-      }, []);
-    
-    // Filter apps when the selection changes
+        return () => { cancelled = true; };
+    }, [installedOnly, selectedFilterCategory, selectedPermissionType, selectedCategoryType, installedAppsInDB]);
+
+    const loadMoreApps = async () => {
+        try {
+            const page = await getApps({ ...appFilter(), limit: PAGE_SIZE, fields: LIST_FIELDS, after: nextCursor });
+            setApps(prev => [...prev, ...page.apps]);
+            setNextCursor(page.next);
+        } catch (error) {
+            console.error("Error fetching apps:", error);
+        }
+    };
+
+    // Installed apps can only be shown to a logged-in user
     useEffect(() => {
-        let filtered = [...apps];
-    
-        // Check if the user is logged in
-        if (user) {
-            // If logged in, filter installed apps based on permissions or category selection
-            if (selectedFilterCategory === "Permission") {
-                filtered = apps.filter(app => app.permissions?.includes(selectedPermissionType));
-                if (selectedPermissionFilterCategory === "Installed Apps") {
-                    filtered = filtered.filter(app =>
-                        installedAppsInDB.some(installed => installed.packageName === app.app_id)
-                    );
-                }
-            } else if (selectedFilterCategory === "Category") {
-                filtered = apps.filter(app => app.category === selectedCategoryType);
-                if (selectedCategoryFilterCategory === "Installed Apps") {
-                    filtered = filtered.filter(app =>
-                        installedAppsInDB.some(installed => installed.packageName === app.app_id)
-                    );
-                }
-            }
-        } else {
-            // If not logged in, show an alert or prompt to log in if the user clicks on "Installed Apps"
-            if (selectedPermissionFilterCategory === "Installed Apps" || selectedCategoryFilterCategory === "Installed Apps") {
-                // Show login prompt (or navigate to login screen)
-                Alert.alert(
-                    "Please log in",
-                    "You need to log in to view installed apps.",
-                    [
-                        { 
-                            text: "OK", 
-                            onPress: () => { 
-                                setSelectedPermissionFilterCategory("All");
-                                setSelectedCategoryFilterCategory("All");
-                            } 
+        if (!user && (selectedPermissionFilterCategory === "Installed Apps" || selectedCategoryFilterCategory === "Installed Apps")) {
+            // Show login prompt (or navigate to login screen)
+            Alert.alert(
+                "Please log in",
+                "You need to log in to view installed apps.",
+                [
+                    { 
+                        text: "OK", 
+                        onPress: () => { 
+                            setSelectedPermissionFilterCategory("All");
+                            setSelectedCategoryFilterCategory("All");
                         } 
-                    ]
-                );
-            }
-    
-            // Apply other filters based on category or permission
-            if (selectedFilterCategory === "Permission") {
-                filtered = apps.filter(app => app.permissions?.includes(selectedPermissionType));
-            } else if (selectedFilterCategory === "Category") {
-                filtered = apps.filter(app => app.category === selectedCategoryType);
-            }
+                    } 
+                ]
+            );
         }
-    
-        setFilteredApps(filtered);
-    }, [
-        user,
-        selectedFilterCategory, selectedPermissionType, selectedCategoryType, 
-        selectedPermissionFilterCategory, selectedCategoryFilterCategory, 
-        apps, installedAppsInDB
-    ]);    
+    }, [user, selectedPermissionFilterCategory, selectedCategoryFilterCategory]);
 
     // Use useFocusEffect to clear input fields when the screen loses focus.
       useFocusEffect(
@@ -406,7 +410,7 @@ const SettingsScreen = () => {
                                             </View>
                                             <View style={styles.filterTitleContainer}>
                                                 <Text style={styles.filterTitle}>Permission - {selectedPermissionType}</Text>
-                                                <Text style={styles.totalText}>Total items: {filteredApps.length}</Text>
+                                                <Text style={styles.totalText}>Total items: {totalApps}</Text>
                                             </View>
                                             <View style={styles.installAppsRow}>
                                     {/* Left Column: "All" button */}
@@ -455,12 +459,17 @@ const SettingsScreen = () => {
                                     </View>
                                 </View>
                                 <ScrollView style={styles.sectionContentScrollView}>
-                                {filteredApps.map((app, index) => (
+                                {apps.map((app, index) => (
                                 <View key={index} style={styles.appItem}>
                                     <Text style={styles.appName}>{app.app_name}</Text>
                                     <Text style={styles.appDetails}>{app.permissions.join(", ")}</Text>
                                 </View>
                                 ))}
+                                {nextCursor && (
+                                <TouchableOpacity style={styles.loadMoreButton} onPress={loadMoreApps}>
+                                    <Text style={styles.appName}>Load more</Text>
+                                </TouchableOpacity>
+                                )}
                                 </ScrollView>
                                     </View>
                                 )}
@@ -488,7 +497,7 @@ const SettingsScreen = () => {
                                             </View>
                                             <View style={styles.filterTitleContainer}>
                                             <Text style={styles.filterTitle}>Category - {selectedCategoryType}</Text>
-                                            <Text style={styles.totalText}>Total items: {filteredApps.length}</Text>
+                                            <Text style={styles.totalText}>Total items: {totalApps}</Text>
                                             </View>
                                             <View style={styles.installAppsRow}>
                                     {/* Left Column: "All" button */}
@@ -537,12 +546,17 @@ const SettingsScreen = () => {
                                     </View>
                                 </View>
                                 <ScrollView style={styles.sectionContentScrollView}>
-                                {filteredApps.map((app, index) => (
+                                {apps.map((app, index) => (
                                 <View key={index} style={styles.appItem}>
                                     <Text style={styles.appName}>{app.app_name}</Text>
                                     <Text style={styles.appDetails}>{app.category}</Text>
                                 </View>
                                 ))}
+                                {nextCursor && (
+                                <TouchableOpacity style={styles.loadMoreButton} onPress={loadMoreApps}>
+                                    <Text style={styles.appName}>Load more</Text>
+                                </TouchableOpacity>
+                                )}
                                 </ScrollView>
                                     </View>
                                 )}
@@ -849,6 +863,12 @@ const styles = StyleSheet.create({
       appDetails: {
         fontSize: 10,
       },
+      loadMoreButton: {
+        alignItems: "center",
+        borderWidth: 0.5,
+        paddingVertical: 5,
+        marginBottom: 10,
+      },
       textInputContainer: {
         marginVertical: 10,
       },